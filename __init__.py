@@ -1,9 +1,33 @@
+import atexit
+import importlib
 import json
 import os
+import warnings
 from datetime import datetime
 
-import numpy as np
-import pandas as pd
+### the modules needing pandas or numpy (artefacts, blobs, metrics) are imported on first
+### use, see _module, so that a run only logging statuses, scores and params never imports them
+try:
+    from .background import BackgroundWriter
+    from .events import EVENT_INTERVAL, EventLog
+    from .profiling import Profiler
+    from .records import LogRecord, RunRecord
+    from .storage import LOG_COLUMNS, RUNMASTER_COLUMNS, encode_param, epochns, open_runstore, seconds
+    from .workspace import Workspace
+except ImportError:
+    from background import BackgroundWriter
+    from events import EVENT_INTERVAL, EventLog
+    from profiling import Profiler
+    from records import LogRecord, RunRecord
+    from storage import LOG_COLUMNS, RUNMASTER_COLUMNS, encode_param, epochns, open_runstore, seconds
+    from workspace import Workspace
+
+
+def _module(name):
+    """
+    Helper function which imports a module of DeepFlow on first use
+    """
+    return importlib.import_module(f"{__package__}.{name}" if __package__ else name)
 
 
 class DeepFlow():
@@ -23,49 +47,198 @@ class DeepFlow():
     benchmark (float)   : (Optional) the benchmark score you are trying to beat
 
     params (dict)       : (Optional) a dictionary of params to be saved and shown on the dashboard
+
+    logflushevery (int) : (Optional) number of log rows after which the logs are flushed to disk,
+        defaults to 1 (every log), 0 flushes only when the run is Completed or Failed
+
+    storage (str)       : (Optional) 'sqlite' or 'csv', backend of the runmaster and logs,
+        existing projects keep their backend, new projects default to 'sqlite'
+
+    artefactformat (str): (Optional) default format of logged artefacts, 'csv' (default),
+        'parquet' or 'feather', the columnar formats need pyarrow
+
+    dedupartefacts (bool): (Optional) save artefacts in the content-addressed store of the project,
+        Artefacts/Blobs, so that an artefact identical to one already logged, eg: by the parent run,
+        is neither serialized nor written again, defaults to False. The artefacts folder of the run keeps
+        the <name>.meta.json sidecar pointing to the blob, unused blobs are removed by 'python blobs.py gc'
+
+    asynclogging (bool) : (Optional) write logs, runmaster updates and artefacts on a background
+        thread so that logging never blocks the training loop, defaults to False. Pending writes
+        are flushed by flush(), close(), a Completed or Failed status and on interpreter exit
+
+    profile (bool)      : (Optional) record the number of calls, latency and bytes written of the
+        logging methods, see stats(), saved as profile.json in the artefacts folder when the run ends.
+        Defaults to False, which leaves the methods uninstrumented
+
+    workspace (str)     : (Optional) path of the workspace catalog the project is registered in, which
+        lists the projects on the dashboard, defaults to workspace.db in $DEEPFLOW_WORKSPACE or ~/.deepflow.
+        False does not register the project. The catalog is opened by the first update, and a catalog
+        which cannot be written only warns, it never aborts the run
+
+    liveevents (bool)   : (Optional) send the start, status, score and end of the run to the event log
+        of the project, read by the Running now panel of the dashboard, defaults to True. Heartbeats
+        repeating the last status and message are sent at most once a second
     """
     def __init__(self, projectname, description, **kwargs):
 
+        self.profiler = Profiler() if kwargs.get('profile', False) else None
+        if self.profiler is not None:
+            initstart = self.profiler.clock()
+
         self.status = "Running"
 
         self.runmasterfile = os.path.join(os.getcwd(), "Artefacts/Overview/runmaster.csv")
 
-        self.runmastercols = [
-            'ProjectName', 'ExpID', 'ParentID', 'Description',
-            'StartTime', 'EndTime', 'Duration', 'ScoreType', 'Metric',
-            'Score', 'ParentScore', 'ImprovementParent', 'Benchmark',
-            'ImprovementBenchmark', 'Status', 'Params'
-        ]
+        self.runmastercols = RUNMASTER_COLUMNS
+
+        self.runmaster = open_runstore(os.path.join(os.getcwd(), "Artefacts/Overview"), kwargs.get('storage'))
+
+        ### catalog of the projects of the workspace, updated when the run starts and ends, see _updatecatalog
+        self.projectroot = os.getcwd()
+        self.workspacefile = kwargs.get('workspace')
+        self.workspace = None
 
-        self.dfcurrentrun = pd.DataFrame(columns=self.runmastercols)
+        ### live events of the run, appended to the event log of the project
+        self.events = None
+        if kwargs.get('liveevents', True):
+            self.events = EventLog(os.path.join(self.runmaster.overviewpath, "events.jsonl"))
+            self.events.rotate()
+        self.lastevent = None
 
-        self.dfcurrentrun['ProjectName'] = [projectname]
-        self.dfcurrentrun['StartTime'] = datetime.now()
-        self.dfcurrentrun['Description'] = description
-        self.dfcurrentrun['Status'] = self.status
+        if self.profiler is not None:
+            self._instrument()
 
-        if os.path.exists(self.runmasterfile):
-            self.dfrunmaster = pd.read_csv(self.runmasterfile)
+        self.artefactformat = kwargs.get('artefactformat', 'csv')
 
-            if description.lower() in self.dfrunmaster['Description'].str.lower().values:
+        self.blobstore = None
+        if kwargs.get('dedupartefacts', False):
+            self.blobstore = _module('blobs').BlobStore(os.path.join(os.getcwd(), "Artefacts", "Blobs"))
+
+        ### background writer of the run, only started once the ExpID is reserved
+        self.writer = None
+
+        ### Only the record of the current run is kept in memory, the history of the project
+        ### stays in the run store and is queried when needed, eg: the score of the parent
+        starttime = datetime.now()
+        self.run = RunRecord(
+            ProjectName=projectname,
+            Description=description,
+            StartTime=starttime,
+            Status=self.status,
+            Benchmark=kwargs.get('benchmark', float('nan'))
+        )
+
+        if 'params' in kwargs:
+            self.params = kwargs['params']
+        else:
+            self.params = dict()
+
+        ### encoded params already saved to the params table, only changed params are written
+        self.savedparams = dict()
+        ### last row written to the runmaster, heartbeats which change nothing are not written again
+        self.savedrun = None
+
+        ### The ExpID is reserved by saving the run while holding the runmaster lock,
+        ### so parallel runs of the same project never share an ExpID
+        with self.runmaster.lock:
+            self._reserveexpid(projectname, description, **kwargs)
+        self.expid = self.run.ExpID
+
+        self.artefactpath = os.path.join(os.getcwd(), "Artefacts/", f"exp_{self.expid} - {description}")
+        if not os.path.exists(self.artefactpath):
+            os.makedirs(self.artefactpath)
+
+        with open(f"{self.artefactpath}/observations.csv", "w") as f:
+            f.write("Observations\n")
+
+        ### metric curves, buffered in memory and appended to metrics.bin in chunks,
+        ### the buffer is created by the first log_metric
+        self.metrics = None
+
+        self.logcols = LOG_COLUMNS
+        self.logfile = f"{self.artefactpath}/logs.csv"
+        if kwargs.get('asynclogging', False):
+            ### the background writer flushes the logs after every batch it writes
+            self.logwriter = self.runmaster.logwriter(self.logfile, 0)
+            self.writer = BackgroundWriter(onflush=[self.logwriter.flush])
+        else:
+            self.logwriter = self.runmaster.logwriter(self.logfile, kwargs.get('logflushevery', 1))
+        ### buffered metrics and logs are written on interpreter exit, even if the run never ends
+        atexit.register(self.close)
+
+        if self.profiler is not None:
+            self.logwriter.write = self.profiler.wrap('write_logs', self.logwriter.write, lambda nbytes, *args : nbytes)
+
+        ### Only the last log is kept in memory, it is needed for DurationSinceLog
+        self.lastlog = LogRecord(
+            ExpID=self.expid,
+            Description=description,
+            Status='Started',
+            StartTime=starttime,
+            LogTime=datetime.now()
+        )
+        self._submit(self.logwriter.write, self.lastlog)
+
+        self._submit(self._updatecatalog, 'runstarted', self.projectroot, projectname, self.runmaster.backend,
+            self.expid, epochns(starttime))
+        self._emit('start', Description=description, Status=self.status, StartTime=epochns(starttime))
+
+        if self.profiler is not None:
+            self.profiler.record('__init__', self.profiler.clock() - initstart)
+
+    def _instrument(self):
+        """
+        Helper function which replaces the logging methods of this run by timed versions,
+        the writes record the bytes they wrote
+        """
+        for name in ('log_status', 'log_score', 'log_param', 'log_metric', 'log_artefact', 'log_artefact_chunks',
+                '_saverunmaster'):
+            setattr(self, name, self.profiler.wrap(name, getattr(self, name)))
+
+        self._writeartefact = self.profiler.wrap('write_artefact', self._writeartefact, lambda nbytes, *args : nbytes)
+        self.runmaster.saverow = self.profiler.wrap('write_runmaster', self.runmaster.saverow, lambda nbytes, *args : nbytes)
+
+    @property
+    def dfcurrentrun(self):
+        """
+        The runmaster row of the run as a one-row DataFrame, built on demand from the run record
+        """
+        return self.run.frame()
+
+    def stats(self):
+        """
+        Returns the calls, cumulative and p50/p99 latency and bytes written of the logging methods
+        of the run, keyed by method, an empty dictionary when the run was created without profile=True
+        """
+        if self.profiler is None:
+            return {}
+        return self.profiler.stats()
+
+    def _reserveexpid(self, projectname, description, **kwargs):
+        """
+        Helper function which validates the run against the runmaster, allocates the next ExpID
+        and saves the run, must be called while holding the runmaster lock
+        """
+        if self.runmaster.exists():
+            if self.runmaster.hasdescription(description):
                 raise AssertionError("Experiment Description must be unique")
 
-            self.dfcurrentrun['ExpID'] = max(self.dfrunmaster.ExpID) + 1
+            self.run.ExpID = self.runmaster.maxexpid() + 1
 
             if 'parentID' not in kwargs:
                 raise AssertionError("Please provide a parent expID")
 
-            if int(kwargs['parentID']) not in self.dfrunmaster['ExpID'].values:
+            parent = self.runmaster.getrow(int(kwargs['parentID']))
+            if parent is None:
                 raise AssertionError("Parent ID not found in existing experiments")
 
-            self.dfcurrentrun['ParentID'] = kwargs['parentID']
-            self.dfcurrentrun['ParentScore'] = self.dfrunmaster.Score[self.dfrunmaster.ExpID == kwargs['parentID']].values[0]
+            self.run.ParentID = kwargs['parentID']
+            self.run.ParentScore = float('nan') if parent['Score'] is None else parent['Score']
         else:
             print(f"Starting your first experiment for {projectname}? , Best of Luck \U0001f600")
-            self.dfrunmaster = pd.DataFrame()
-            self.dfcurrentrun['ExpID'] = 1
-            self.dfcurrentrun['ParentID'] = np.NaN
-            self.dfcurrentrun['ParentScore'] = np.NaN
+            self.run.ExpID = 1
+            self.run.ParentID = float('nan')
+            self.run.ParentScore = float('nan')
 
             overviewpath = os.path.join(os.getcwd(), "Artefacts/Overview")
 
@@ -73,50 +246,12 @@ class DeepFlow():
                 os.makedirs(overviewpath)
 
             #### Create blank Learnings and Observations files
-            learnings = pd.DataFrame({
-                'Learnings' : []
-            })
-            learnings.to_csv(f"{overviewpath}/learnings.csv", index=False)
-
-            observations = pd.DataFrame({
-                'Observations' : []
-            })
-            observations.to_csv(f"{overviewpath}/observations.csv", index=False)
+            with open(f"{overviewpath}/learnings.csv", "w") as f:
+                f.write("Learnings\n")
 
-        self.artefactpath = os.path.join(os.getcwd(), "Artefacts/", f"exp_{self.dfcurrentrun['ExpID'].values[0]} - {description}")
-        if not os.path.exists(self.artefactpath):
-            os.makedirs(self.artefactpath)
-
-        observations = pd.DataFrame({
-            'Observations' : []
-        })
-
-        observations.to_csv(f"{self.artefactpath}/observations.csv", index=False)
+            with open(f"{overviewpath}/observations.csv", "w") as f:
+                f.write("Observations\n")
 
-        if 'benchmark' in kwargs:
-            self.dfcurrentrun['Benchmark'] = kwargs['benchmark']
-        else:
-            self.dfcurrentrun['Benchmark'] = np.NaN
-
-        if 'params' in kwargs:
-            self.params = kwargs['params']
-        else:
-            self.params = dict()
-
-        self.logcols = [
-            'ExpID', 'Description', 'Status', 'LogMessage', 'ErrorMessage',
-            'StartTime', 'LogTime', 'DurationSinceLog', 'DurationSinceStart'
-        ]
-        self.dflogs = pd.DataFrame(columns = self.logcols)
-        self.logfile = f"{self.artefactpath}/logs.csv"
-        self.dflogs = pd.concat([self.dflogs, self.dfcurrentrun], axis=0)
-        self.dflogs['Status'] = 'Started'
-        self.dflogs = self.dflogs[self.logcols]
-        self.dflogs['LogTime'] = datetime.now()
-        logsavefile = self.dflogs.copy()
-        for col in ['StartTime', 'LogTime']:
-            logsavefile[col] = logsavefile[col].apply(lambda x : str(x)[:-7])
-        logsavefile.to_csv(self.logfile, index=False)
         self._saverunmaster()
 
     def log_status(self, status="Running", logmessage="", errormessage=""):
@@ -135,53 +270,135 @@ class DeepFlow():
             raise AssertionError(f"Status should be 'Running', 'Failed' or 'Completed', {status} was passed")
         self.status = status
         logtime = datetime.now()
-        newlog = self.dflogs.tail(1).copy()
-        newlog['Status'] = status
-        newlog['LogMessage'] = logmessage
-        newlog['ErrorMessage'] = errormessage
-        newlog['DurationSinceLog'] = logtime - newlog['LogTime']
-        newlog['DurationSinceStart'] = logtime - newlog['StartTime']
-        newlog['LogTime'] = logtime
-
-        self.dflogs = pd.concat([self.dflogs, newlog], axis=0)
-        self.dflogs = self.dflogs[self.logcols]
-
-        logsavefile = self.dflogs.copy()
-        for col in ['StartTime', 'LogTime', 'DurationSinceLog', 'DurationSinceStart']:
-            logsavefile[col] = logsavefile[col].apply(lambda x : str(x)[:-7])
-        logsavefile.to_csv(self.logfile, index=False)
-
-        self.dfcurrentrun['Status'] = status
+        newlog = self.lastlog.copy(
+            Status=status,
+            LogMessage=logmessage,
+            ErrorMessage=errormessage,
+            DurationSinceLog=logtime - self.lastlog.LogTime,
+            DurationSinceStart=logtime - self.lastlog.StartTime,
+            LogTime=logtime
+        )
+
+        self._submit(self.logwriter.write, newlog)
+        self.lastlog = newlog
+        if self.metrics is not None and self.metrics.due():
+            self._flushmetrics()
+
+        if (status != 'Running' or self.lastevent[:2] != (status, logmessage)
+                or (logtime - self.lastevent[2]).total_seconds() >= EVENT_INTERVAL):
+            self._emit('end' if status != 'Running' else 'status', Status=status, Message=logmessage)
+
+        self.run.Status = status
+
+        if status in ("Completed", "Failed"):
+            self.run.EndTime = datetime.now()
+            self.run.Duration = self.run.EndTime - self.run.StartTime
+
         self._saverunmaster()
 
         if status in ("Completed", "Failed"):
-            self.dfcurrentrun['EndTime'] = datetime.now()
-            self.dfcurrentrun['Duration'] = self.dfcurrentrun['EndTime'] - self.dfcurrentrun['StartTime']
-            self._saverunmaster()
+            self._submit(self._updatecatalog, 'runended', self.projectroot, self.run.ProjectName,
+                self.runmaster.backend, self.expid, epochns(self.run.EndTime), self.run.Metric, self.run.ScoreType,
+                self.run.Score if status == "Completed" else None)
+            self.close()
 
             if status == 'Failed':
                 raise Exception(errormessage)
 
             print("\nAll Done : Please make sure to keep the observations and learnings artefacts updated")
 
-    def _saverunmaster(self):
+    def _emit(self, event, **fields):
+        """
+        Helper function which sends a live event of the run to the event log of the project
         """
-        Helper function which saves the runmaster file with the current status of the run
+        now = datetime.now()
+        self.lastevent = (fields.get('Status'), fields.get('Message'), now)
+        if self.events is None:
+            return
+        fields.update({'Event' : event, 'ExpID' : int(self.expid), 'Time' : epochns(now)})
+        self._submit(self.events.emit, fields)
+
+    def _updatecatalog(self, method, *args):
         """
-        params = self.params.copy()
-        for key in params:
-            params[key] = str(params[key])
+        Helper function which records the start or end of the run in the workspace catalog, see
+        workspace.Workspace. The catalog is opened on the first update, errors are only warned about
+        since the catalog is an index of the projects and must never abort, or leave unfinished, a run
+        """
+        if self.workspacefile is False:
+            return
+        try:
+            if self.workspace is None:
+                self.workspace = Workspace(self.workspacefile)
+            getattr(self.workspace, method)(*args)
+        except Exception as e:
+            warnings.warn(f"Could not update the workspace catalog : {e}")
+
+    def _submit(self, function, *args, key=None):
+        """
+        Helper function which runs a write right away, or queues it on the background
+        writer when asynclogging is on
+        """
+        if self.writer is None:
+            function(*args)
+        else:
+            self.writer.submit(function, *args, key=key)
+
+    def flush(self):
+        """
+        Blocks until every log, metric, runmaster update and artefact logged so far is written to disk
+        """
+        self._flushmetrics()
+        if self.writer is not None:
+            self.writer.flush()
+        else:
+            self.logwriter.flush()
 
-        self.dfcurrentrun['Params'] = json.dumps(params)
-        runmastersavefile = self.dfrunmaster.copy()
-        runmastersavefile = pd.concat([runmastersavefile, self.dfcurrentrun], axis=0)
-        for col in ['StartTime', 'EndTime', 'Duration']:
-            runmastersavefile[col] = ["" if pd.isna(i) else str(i).split('.')[0]
-                for i in runmastersavefile[col]]
+    def close(self):
+        """
+        Flushes the pending writes and closes the logs, called by log_status when the run is
+        Completed or Failed and on interpreter exit
+        """
+        atexit.unregister(self.close)
+        self._flushmetrics()
+        if self.writer is not None:
+            try:
+                self.writer.close()
+            finally:
+                self.logwriter.close()
+        else:
+            self.logwriter.close()
 
-        runmastersavefile = runmastersavefile[self.runmastercols]
+        if self.profiler is not None:
+            self.profiler.save(f"{self.artefactpath}/profile.json")
 
-        runmastersavefile.to_csv(self.runmasterfile, index=False)
+    def _saverunmaster(self):
+        """
+        Helper function which saves the current status of the run to the run store,
+        only the current run is formatted and written so the cost does not grow with history.
+        Queued saves of the run are coalesced, only the latest status is written, and a save which
+        changes neither the run nor its params, eg: a heartbeat, is skipped so the runmaster, and the
+        version the dashboard refreshes on, only change with the run. Params are saved to the typed
+        params table of the run store when they change, the Params column keeps a json copy for tools
+        reading the runmaster directly
+        """
+        encoded = {key : encode_param(value) for key, value in self.params.items()}
+        changed = {key : row for key, row in encoded.items() if self.savedparams.get(key) != row}
+        if len(changed):
+            self._submit(self.runmaster.saveparams, self.run.ExpID, changed)
+            self.savedparams.update(changed)
+
+        params = {key : str(value) for key, value in self.params.items()}
+        saved = ([str(value) for value in self.run.values()], params)
+        if saved == self.savedrun:
+            return
+        self.savedrun = saved
+        self._submit(self._writerunmaster, self.run.copy(), params, key='runmaster')
+
+    def _writerunmaster(self, run, params):
+        ### times are saved as epoch-ns and the duration as seconds
+        run.Params = json.dumps(params)
+        run.StartTime, run.EndTime, run.Duration = epochns(run.StartTime), epochns(run.EndTime), seconds(run.Duration)
+        return self.runmaster.saverow(run.values())
 
 
     def log_score(self, scoretype, metric, score, decimals=2):
@@ -198,32 +415,123 @@ class DeepFlow():
         if scoretype.lower() not in ('error', 'accuracy'):
             raise AssertionError(f"Expected 'Error' or 'Accuracy' for metric, '{scoretype}' was passed")
 
-        bench = self.dfcurrentrun['Benchmark'].values[0]
-        improveparent = round(score - self.dfcurrentrun['ParentScore'].values[0], decimals)
-        improvebench = round(score - bench, decimals)
+        self.run.ScoreType = scoretype.lower()
+        self.run.Metric = metric.upper()
+        self.run.Score = round(score, decimals)
+        self.run.ImprovementParent = round(score - self.run.ParentScore, decimals)
+        self.run.ImprovementBenchmark = round(score - self.run.Benchmark, decimals)
 
-        self.dfcurrentrun['ScoreType'] = scoretype.lower()
-        self.dfcurrentrun['Metric'] = metric.upper()
-        self.dfcurrentrun['Score'] = round(score, decimals)
-        self.dfcurrentrun['ImprovementParent'] = improveparent
-        self.dfcurrentrun['ImprovementBenchmark'] = improvebench
+        self._emit('score', Status=self.status, Message=self.lastevent[1], Metric=self.run.Metric,
+            Score=float(self.run.Score))
 
-    def log_artefact(self, artefact, name):
+    def log_artefact(self, artefact, name, format=None, compression=None):
         """
-        Saves any artefact dataframe into Artefacts/exp_num folder as a csv, eg: feature importance,
-        helps in maintaining a clean folder structure for the project
+        Saves any artefact dataframe into Artefacts/exp_num folder, eg: feature importance,
+        helps in maintaining a clean folder structure for the project. A <name>.meta.json
+        sidecar with the format, row count, dtypes and size is saved next to it
 
         Parameters:
         -----------
             artefact (pandas.Dataframe) : the dataframe to be saved, when saving feature importance,
             colnames should include 'Feature' and 'Importance'
             name (str) : 'importance' when saving importance, custom name when storing anything else
+            format (str) : (Optional) 'csv', 'parquet' or 'feather', defaults to artefactformat of the run
+            compression (str) : (Optional) compression codec, eg: 'zstd', 'snappy', 'gzip'
+        """
+        self.params['Artefacts'] = self.artefactpath
+
+        ### the artefact is copied when queued, so that the caller can keep modifying it
+        if self.writer is not None:
+            artefact = artefact.copy()
+        self._submit(self._writeartefact, artefact, name, format or self.artefactformat, compression)
+
+    def _writeartefact(self, artefact, name, format, compression):
+        artefacts = _module('artefacts')
+        metadata = artefacts.write_artefact(artefact, self.artefactpath, name, format, compression, self.blobstore)
+        artefactfile = metadata['path']
+
+        if metadata.get('deduplicated'):
+            print(f"Artefact {name} already saved in : {artefactfile}")
+        else:
+            print(f"Saved artefact in dir : {artefactfile}")
+
+        ### normalized importance vector read by the dashboard
+        if name == 'importance':
+            artefacts.save_importance(artefact, self.artefactpath)
+
+        self.runmaster.saveartefact({
+            'ExpID' : self.expid,
+            'Name' : name,
+            'Path' : artefactfile,
+            'Rows' : metadata['rows'],
+            'Bytes' : metadata['bytes'],
+            'SavedTime' : datetime.now()
+        })
+        return 0 if metadata.get('deduplicated') else metadata['bytes']
+
+    def log_artefact_chunks(self, chunks, name, format="parquet", compression=None):
+        """
+        Saves an artefact too large to be held in memory, eg: out of fold predictions of hundreds of
+        millions of rows, from the dataframes it is produced in. Chunks are appended to a single file
+        of the Artefacts/exp_num folder as they come, so only one chunk is held in memory at a time,
+        see artefacts.ChunkedArtefactWriter. The <name>.meta.json sidecar records the schema, the row
+        count and the number of chunks, and the dashboard samples or aggregates the artefact from it
+        without reading it whole. Chunks are written by the caller even with asynclogging, and are
+        not deduplicated
+
+        Parameters:
+        -----------
+            chunks (iterable) : pandas.DataFrames with the same columns, eg: a generator over the folds
+            name (str) : name of the artefact
+            format (str) : (Optional) 'parquet', 'feather' or 'csv', defaults to parquet
+            compression (str) : (Optional) compression codec, eg: 'zstd', 'snappy', 'gzip'
         """
         self.params['Artefacts'] = self.artefactpath
 
-        print(f"Saving artefact in dir : {self.artefactpath}/{name}.csv")
+        with _module('artefacts').ChunkedArtefactWriter(self.artefactpath, name, format, compression) as writer:
+            for chunk in chunks:
+                writer.write(chunk)
+        metadata = writer.metadata
+
+        print(f"Saved artefact in dir : {metadata['path']}")
+        self._submit(self.runmaster.saveartefact, {
+            'ExpID' : self.expid,
+            'Name' : name,
+            'Path' : metadata['path'],
+            'Rows' : metadata['rows'],
+            'Bytes' : metadata['bytes'],
+            'SavedTime' : datetime.now()
+        })
+
+    def log_metric(self, name, value, step=None):
+        """
+        logs one point of a metric curve, eg: the loss of every epoch or iteration. Points are
+        buffered and written to metrics.bin in the artefacts folder in chunks, once 8192 are buffered
+        or the oldest has waited a few seconds, and on flush, close or interpreter exit. Use log_score
+        for the final score of the run
+
+        Parameters
+        ----------
+            name (str)      : name of the metric eg. 'train_loss', 'valid_rmse'
+            value (float)   : value of the metric
+            step (int)      : (Optional) step of the value eg. epoch or iteration,
+                defaults to the step after the last one logged for this metric
+        """
+        if 'Artefacts' not in self.params:
+            self.params['Artefacts'] = self.artefactpath
 
-        artefact.to_csv(f"{self.artefactpath}/{name}.csv", index=False)
+        if self.metrics is None:
+            self.metrics = _module('metrics').MetricBuffer()
+        if self.metrics.append(name, value, step):
+            self._flushmetrics()
+
+    def _flushmetrics(self):
+        """
+        Helper function which writes the buffered metric values as one chunk
+        """
+        if self.metrics is None or len(self.metrics) == 0:
+            return
+        self._submit(_module('metrics').write_metrics, self.artefactpath, *self.metrics.take())
 
     def log_param(self, param, value):
         """
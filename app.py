@@ -1,43 +1,287 @@
 # -*- coding: utf-8 -*-
+import importlib
+import json
+import re
+
 import dash
 import dash_core_components as dcc
 import dash_html_components as html
 from dash.dependencies import Input, Output, State
-from utils import make_unordered_list
-from pages import (
-    overview,
-    details
-)
+from dash.exceptions import PreventUpdate
 
-import pandas as pd
+from flask import Response, request
 
 app = dash.Dash(
-    __name__, meta_tags=[{"name": "viewport", "content": "width=device-width"}]
+    __name__, meta_tags=[{"name": "viewport", "content": "width=device-width"}],
+    suppress_callback_exceptions=True
 )
 server = app.server
 
-# Describe the layout/ UI of the app
-app.layout = html.Div([
-        overview.new_first_page(app),
-        overview.journey_page(app),
-        overview.top_features_page(app),
-        overview.detailed_log_page(app),
-        details.create_layout(app, 21)
-        # tuple(details.create_layout(app, i) for i in range(50))
-    ]
-)
+# Seconds between checks for new runs
+REFRESH_INTERVAL = 30
+
+# Seconds between reads of the new events of the running runs
+LIVE_INTERVAL = 2
+
+# Page, sort and filter the detailed log on the server, only the visible page is sent
+SERVER_SIDE_LOG = True
+
+# Number of best runs the top features are aggregated over
+TOP_FEATURE_RUNS = 5
+
+# Pages of a project of the workspace are served under /project/<ProjectID>, eg:
+# /project/3/exp/12, pages without the prefix show the project opened last
+PROJECT_PATH = re.compile(r"^/project/(?P<projectid>\d+)(?P<page>/.*)?$")
+
+# Experiment pages are served at /exp/<ExpID>
+EXPERIMENT_PATH = re.compile(r"^/exp/(?P<expid>\d+)/?$")
+
+# Comparisons are served at /compare/<ExpID>,<ExpID>,...
+COMPARE_PATH = re.compile(r"^/compare/?(?P<expids>[\d,]*)/?$")
+
+# The pages, the data loaders and with them pandas and plotly are imported by the
+# first request which needs them rather than when the app starts, see lazy
+def lazy(module):
+    """
+    Returns a module of the dashboard, eg: lazy("pages.overview"), imported on first use
+    """
+    return importlib.import_module(module)
+
+# Describe the layout/ UI of the app, the page itself is filled in by display_page
+# from the url so that the data is only read when it is first requested
+def serve_layout():
+    return html.Div([
+            dcc.Location(id='url', refresh=False),
+            dcc.Interval(id='refresh-interval', interval=REFRESH_INTERVAL * 1000),
+            html.Div(id='page-content')
+        ]
+    )
+
+app.layout = serve_layout
+
+def overview_pages(projectdata):
+    overview = lazy("pages.overview")
+    return html.Div([
+            dcc.Store(id='data-version', data=projectdata.version()),
+            overview.new_first_page(app, projectdata),
+            overview.running_page(app, projectdata, interval=LIVE_INTERVAL),
+            overview.journey_page(app, projectdata),
+            overview.top_features_page(app, projectdata, topruns=TOP_FEATURE_RUNS),
+            overview.detailed_log_page(app, projectdata, serverside=SERVER_SIDE_LOG)
+        ]
+    )
+
+def project_for(pathname):
+    """
+    Returns (ProjectData, page path) of a url, eg: /project/3/exp/12 -> project 3 of the
+    workspace and /exp/12, urls without the prefix are pages of the default project.
+    The ProjectData is None when the project is not in the workspace catalog. Every
+    callback resolves its project from the url, so requests never share a selection
+    """
+    loaders = lazy("loaders")
+    pathname = pathname or "/"
+    match = PROJECT_PATH.match(pathname)
+    if match is None:
+        return loaders.project_data(), pathname
+
+    overviewpath = loaders.workspacedata.overviewpath(int(match.group('projectid')))
+    if overviewpath is None:
+        return None, match.group('page') or "/overview"
+    return loaders.project_data(overviewpath), match.group('page') or "/overview"
+
+# Route the url to the project picker, the overview or to an experiment page, experiment
+# pages are built on demand and memoized by details.experiment_layout
+@app.callback(Output("page-content", "children"),
+              [Input("url", "pathname")])
+def display_page(pathname):
+    projectdata, page = project_for(pathname)
+    if projectdata is None:
+        projectid = PROJECT_PATH.match(pathname).group('projectid')
+        return html.Div([html.H6(f"Project {projectid} not found")], className="page")
+
+    if page == "/" and len(lazy("loaders").workspacedata.projects()):
+        return lazy("pages.projects").create_layout(app)
+    message = projectdata.unavailable()
+    if message is not None:
+        return html.Div([html.H6(message)], className="page")
+
+    match = EXPERIMENT_PATH.match(page)
+    if match is not None:
+        return lazy("pages.details").experiment_layout(app, projectdata, int(match.group('expid')))
+    match = COMPARE_PATH.match(page)
+    if match is not None:
+        return lazy("pages.compare").create_layout(app, projectdata, parse_expids(match.group('expids')))
+    return overview_pages(projectdata)
+
+def project_prefix(pathname):
+    """
+    /project/<ProjectID> of the url, links of the page keep it so they stay in the project
+    """
+    match = PROJECT_PATH.match(pathname or "/")
+    return "" if match is None else f"/project/{match.group('projectid')}"
+
+def parse_expids(expids):
+    return [int(expid) for expid in (expids or "").split(",") if expid.strip().isdigit()]
+
+# Open the comparison of the experiments picked on the comparison page
+@app.callback(Output("url", "pathname", allow_duplicate=True),
+              [Input("compare-picker", "value")],
+              [State("url", "pathname")],
+              prevent_initial_call=True)
+def pick_comparison(expids, pathname):
+    return project_prefix(pathname) + "/compare/" + ",".join(str(expid) for expid in expids or [])
+
+# Fill the experiment picker with the runs matching what is typed, the page only ships the picked runs
+@app.callback(Output("compare-picker", "options"),
+              [Input("compare-picker", "search_value")],
+              [State("compare-picker", "value"),
+               State("compare-picker", "options"),
+               State("url", "pathname")],
+              prevent_initial_call=True)
+def search_runs(search, expids, options, pathname):
+    projectdata, _ = project_for(pathname)
+    if not search or projectdata is None:
+        raise PreventUpdate
+    picked = [option for option in options or [] if option['value'] in (expids or [])]
+    return lazy("pages.compare").run_options(projectdata, search, picked)
+
+# Comparison of several experiments as json : /api/compare?ids=1,2,3&top=20&project=<ProjectID>
+@server.route("/api/compare")
+def compare_api():
+    import plotly
+
+    loaders = lazy("loaders")
+    projectdata = loaders.project_data()
+    if request.args.get('project', '').isdigit():
+        overviewpath = loaders.workspacedata.overviewpath(int(request.args['project']))
+        if overviewpath is None:
+            return Response("null", status=404, mimetype="application/json")
+        projectdata = loaders.project_data(overviewpath)
+    if projectdata.unavailable() is not None:
+        return Response("null", status=404, mimetype="application/json")
+    top = request.args.get('top', '20')
+    if not top.isdigit() or int(top) == 0:
+        return Response(json.dumps({'error' : "top should be a positive integer"}), status=400,
+            mimetype="application/json")
+    comparison = projectdata.compare(parse_expids(request.args.get('ids')), int(top))
+    if comparison is not None:
+        comparison = {
+            'runs' : comparison['runs'].to_dict('records'),
+            'params' : comparison['params'].to_dict('index'),
+            'features' : comparison['features'],
+            'importance' : comparison['importance'],
+            'correlation' : comparison['correlation']
+        }
+    return Response(json.dumps(comparison, cls=plotly.utils.PlotlyJSONEncoder), mimetype="application/json")
+
+# Open the experiment page of a run when its ExpID is clicked in the detailed log, the
+# row of the active cell is a row of the page shown, after sorting and filtering
+@app.callback(Output("url", "pathname"),
+              [Input("detailed-log", "active_cell")],
+              [State("detailed-log", "derived_viewport_data"),
+               State("url", "pathname")],
+              prevent_initial_call=True)
+def open_experiment(active_cell, data, pathname):
+    if active_cell is None or active_cell['column_id'] != 'ExpID':
+        raise PreventUpdate
+    return f"{project_prefix(pathname)}/exp/{data[active_cell['row']]['ExpID']}"
+
+# Open the overview of a project when its ProjectID is clicked on the project picker
+@app.callback(Output("url", "pathname", allow_duplicate=True),
+              [Input("project-picker", "active_cell")],
+              [State("project-picker", "derived_viewport_data")],
+              prevent_initial_call=True)
+def open_project(active_cell, data):
+    if active_cell is None or active_cell['column_id'] != 'ProjectID':
+        raise PreventUpdate
+    return f"/project/{data[active_cell['row']]['ProjectID']}"
+
+# Push new runs to the overview, only when the runmaster has changed
+@app.callback([Output("data-version", "data"),
+               Output("graph-2", "figure"),
+               Output("road-to-best", "children")],
+              [Input("refresh-interval", "n_intervals")],
+              [State("data-version", "data"),
+               State("url", "pathname")])
+def refresh_overview(n_intervals, version, pathname):
+    projectdata, _ = project_for(pathname)
+    if projectdata is None:
+        raise PreventUpdate
+    newversion = projectdata.version()
+    if newversion == version:
+        raise PreventUpdate
+
+    dfrunmaster = projectdata.runmaster()
+    return (
+        newversion,
+        lazy("utils").create_journey_figure(dfrunmaster),
+        lazy("pages.overview").road_to_best(dfrunmaster)
+    )
+
+# Push the state of the running runs to the Running now panel, only the events
+# appended since the last tick are read. Every client sends the version it last
+# rendered, and is updated whenever it is behind
+@app.callback([Output("running-now", "data"),
+               Output("running-version", "data")],
+              [Input("live-interval", "n_intervals")],
+              [State("running-version", "data"),
+               State("url", "pathname")],
+              prevent_initial_call=True)
+def update_running(n_intervals, version, pathname):
+    projectdata, _ = project_for(pathname)
+    if projectdata is None:
+        raise PreventUpdate
+    newversion, dfrunning = projectdata.liveruns()
+    if newversion == version:
+        raise PreventUpdate
+    return lazy("pages.overview").running_table(dfrunning), newversion
+
+if SERVER_SIDE_LOG:
+    @app.callback([Output("detailed-log", "data"),
+                   Output("detailed-log", "page_count"),
+                   Output("detailed-log", "style_data_conditional")],
+                  [Input("detailed-log", "page_current"),
+                   Input("detailed-log", "page_size"),
+                   Input("detailed-log", "sort_by"),
+                   Input("detailed-log", "filter_query"),
+                   Input("data-version", "data")],
+                  [State("url", "pathname")])
+    def update_detailed_log(page_current, page_size, sort_by, filter_query, version, pathname):
+        projectdata, _ = project_for(pathname)
+        if projectdata is None:
+            raise PreventUpdate
+        return lazy("pages.overview").detailed_log_query(projectdata, page_current or 0, page_size, sort_by,
+            filter_query)
+else:
+    @app.callback([Output("detailed-log", "data"),
+                   Output("detailed-log", "style_data_conditional")],
+                  [Input("data-version", "data")],
+                  [State("url", "pathname")],
+                  prevent_initial_call=True)
+    def update_detailed_log(version, pathname):
+        projectdata, _ = project_for(pathname)
+        if projectdata is None:
+            raise PreventUpdate
+        return lazy("pages.overview").detailed_log_table(projectdata.runmaster())
 
 # # Update feature observations
 @app.callback(Output("feature_observations", "children"),
               [Input("submit_observation", "n_clicks")],
-              [State('input_observation', 'value')])
-def update_observations(n_clicks, value):
-    observations = pd.read_csv('../Artefacts/Overview/observations.csv')
+              [State('input_observation', 'value'),
+               State("url", "pathname")])
+def update_observations(n_clicks, value, pathname):
+    import pandas as pd
+
+    projectdata, _ = project_for(pathname)
+    if projectdata is None:
+        raise PreventUpdate
+    observationsfile = f"{projectdata.overviewpath}/observations.csv"
+    observations = pd.read_csv(observationsfile)
     if n_clicks > 0:
         newobservation = pd.DataFrame({'Observations':[value]})
         observations = pd.concat([observations, newobservation], axis=0)
-        observations.to_csv('../Artefacts/Overview/observations.csv', index=False)
-    return make_unordered_list(observations['Observations'].values)
+        observations.to_csv(observationsfile, index=False)
+    return lazy("utils").make_unordered_list(observations['Observations'].values)
 
 
 if __name__ == "__main__":
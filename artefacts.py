@@ -0,0 +1,548 @@
+import json
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+### rows read at once by iter_artefact, and rows buffered by ChunkedArtefactWriter before a write
+ARTEFACT_CHUNK_ROWS = 100000
+
+
+class CSVSerializer():
+    """
+    Artefacts saved as csv, readable by any tool but slow and large for big frames
+    """
+    extension = ".csv"
+
+    def __init__(self, compression=None):
+        self.compression = compression
+
+    def write(self, artefact, path):
+        artefact.to_csv(path, index=False, compression=self.compression)
+
+    def read(self, path, columns=None):
+        return pd.read_csv(path, usecols=columns, compression=self.compression)
+
+    def appender(self, path, chunk):
+        if self.compression == "zip":
+            raise AssertionError("Chunked csv artefacts cannot be zip compressed, use gzip or a columnar format")
+        return CSVAppender(path, self.compression)
+
+    def batches(self, path, columns=None, chunkrows=ARTEFACT_CHUNK_ROWS, skip=None):
+        start = 0
+        for batch in pd.read_csv(path, usecols=columns, compression=self.compression, chunksize=chunkrows):
+            if skip is None or not skip(start, batch.shape[0]):
+                yield start, batch
+            start += batch.shape[0]
+
+
+class ParquetSerializer():
+    """
+    Artefacts saved as compressed, columnar parquet files (needs pyarrow)
+    """
+    extension = ".parquet"
+
+    def __init__(self, compression="zstd"):
+        self.compression = compression
+
+    def write(self, artefact, path):
+        artefact.to_parquet(path, index=False, compression=self.compression)
+
+    def read(self, path, columns=None):
+        return pd.read_parquet(path, columns=columns)
+
+    def appender(self, path, chunk):
+        return ArrowAppender(path, chunk, "parquet", self.compression)
+
+    def batches(self, path, columns=None, chunkrows=ARTEFACT_CHUNK_ROWS, skip=None):
+        import pyarrow.parquet as pq
+
+        parquetfile = pq.ParquetFile(path)
+        start = 0
+        for group in range(parquetfile.num_row_groups):
+            rows = parquetfile.metadata.row_group(group).num_rows
+            ### row groups are skipped from the footer, without being read
+            if skip is None or not skip(start, rows):
+                yield from _slices(start, parquetfile.read_row_group(group, columns=columns), chunkrows, skip)
+            start += rows
+
+
+class FeatherSerializer():
+    """
+    Artefacts saved as Arrow IPC (feather) files, the fastest to read back (needs pyarrow)
+    """
+    extension = ".feather"
+
+    def __init__(self, compression="zstd"):
+        self.compression = compression
+
+    def write(self, artefact, path):
+        artefact.reset_index(drop=True).to_feather(path, compression=self.compression)
+
+    def read(self, path, columns=None):
+        return pd.read_feather(path, columns=columns)
+
+    def appender(self, path, chunk):
+        return ArrowAppender(path, chunk, "feather", self.compression)
+
+    def batches(self, path, columns=None, chunkrows=ARTEFACT_CHUNK_ROWS, skip=None):
+        import pyarrow as pa
+
+        with pa.memory_map(path) as source:
+            reader = pa.ipc.open_file(source)
+            start = 0
+            for index in range(reader.num_record_batches):
+                batch = reader.get_batch(index)
+                if skip is None or not skip(start, batch.num_rows):
+                    batch = batch if columns is None else batch.select(columns)
+                    yield from _slices(start, batch, chunkrows, skip)
+                start += batch.num_rows
+
+
+class CSVAppender():
+    """
+    Appends chunks to a csv file, the header is written with the first chunk
+    """
+    def __init__(self, path, compression=None):
+        self.path = path
+        self.compression = compression
+        self.header = True
+
+    def write(self, chunk):
+        chunk.to_csv(self.path, index=False, header=self.header, mode="w" if self.header else "a",
+            compression=self.compression)
+        self.header = False
+
+    def close(self):
+        pass
+
+
+class ArrowAppender():
+    """
+    Appends chunks to a parquet file, one row group per chunk, or to an Arrow IPC file,
+    one record batch per chunk. Every chunk is cast to the schema of the first one (needs pyarrow)
+    """
+    def __init__(self, path, chunk, format, compression):
+        import pyarrow as pa
+
+        self.schema = pa.Schema.from_pandas(chunk, preserve_index=False)
+        if format == "parquet":
+            import pyarrow.parquet as pq
+            self.writer = pq.ParquetWriter(path, self.schema, compression=compression)
+        else:
+            compression = None if compression == "uncompressed" else compression
+            self.writer = pa.ipc.new_file(path, self.schema, options=pa.ipc.IpcWriteOptions(compression=compression))
+
+    def write(self, chunk):
+        import pyarrow as pa
+
+        self.writer.write_table(pa.Table.from_pandas(chunk, schema=self.schema, preserve_index=False))
+
+    def close(self):
+        self.writer.close()
+
+
+def _slices(start, table, chunkrows, skip):
+    """
+    Helper function which yields (first row, dataframe) for every slice of `chunkrows`
+    rows of an arrow table or record batch, the slices skipped are not converted
+    """
+    for offset in range(0, table.num_rows, chunkrows):
+        rows = min(chunkrows, table.num_rows - offset)
+        if skip is None or not skip(start + offset, rows):
+            yield start + offset, table.slice(offset, rows).to_pandas()
+
+
+SERIALIZERS = {
+    'csv' : CSVSerializer,
+    'parquet' : ParquetSerializer,
+    'feather' : FeatherSerializer
+}
+
+
+def get_serializer(format="csv", compression=None):
+    """
+    Returns the serializer of an artefact format
+
+    Parameters
+    ----------
+        format (str)        : 'csv', 'parquet' or 'feather'
+        compression (str)   : (Optional) compression codec, each format has its own default
+    """
+    if format not in SERIALIZERS:
+        raise AssertionError(f"Artefact format should be one of {list(SERIALIZERS)}, {format} was passed")
+    if compression is None:
+        return SERIALIZERS[format]()
+    return SERIALIZERS[format](compression)
+
+
+def write_artefact(artefact, exppath, name, format="csv", compression=None, blobstore=None):
+    """
+    Saves an artefact dataframe with the given serializer, along with a <name>.meta.json
+    sidecar holding the format, row count, dtypes and size of the file. Returns the metadata
+
+    With a blobstore (see blobs.BlobStore) the artefact is saved once per content in the
+    store, and the sidecar points to the blob through its relative path and digest
+    """
+    serializer = get_serializer(format, compression)
+    if blobstore is None:
+        path = f"{exppath}/{name}{serializer.extension}"
+        serializer.write(artefact, path)
+        digest, written = None, True
+    else:
+        path, digest, written = blobstore.put(artefact, format, serializer)
+
+    metadata = {
+        'name' : name,
+        'format' : format,
+        'compression' : serializer.compression,
+        'file' : os.path.basename(path) if digest is None else os.path.relpath(path, exppath),
+        'rows' : int(artefact.shape[0]),
+        'dtypes' : {str(col) : str(dtype) for col, dtype in artefact.dtypes.items()},
+        'bytes' : os.path.getsize(path),
+        'savedtime' : str(datetime.now()).split('.')[0]
+    }
+    if digest is not None:
+        metadata['blob'] = digest
+        metadata['deduplicated'] = not written
+    with open(f"{exppath}/{name}.meta.json", "w") as f:
+        json.dump(metadata, f)
+
+    metadata['path'] = path
+    return metadata
+
+
+class ChunkedArtefactWriter():
+    """
+    Saves an artefact too large to be held in memory from the chunks it is produced in, eg: the
+    out of fold predictions of every fold. Chunks are appended to the file as they come, smaller
+    chunks are buffered up to `chunkrows` rows, so the memory used is bounded by a chunk and the
+    buffer. The file is written under a temporary name and the <name>.meta.json sidecar with the
+    schema, row count and number of chunks is saved when the writer is closed, an artefact whose
+    chunks failed is discarded. Use as a context manager
+
+        with ChunkedArtefactWriter(exppath, 'predictions') as writer:
+            for fold in folds:
+                writer.write(predict(fold))
+
+    Attributes
+    ----------
+    exppath (str)       : artefact folder of the experiment
+    name (str)          : name of the artefact
+    format (str)        : (Optional) 'parquet', 'feather' or 'csv', defaults to parquet
+    compression (str)   : (Optional) compression codec, each format has its own default
+    chunkrows (int)     : (Optional) chunks are buffered until they add up to this many rows
+    """
+    def __init__(self, exppath, name, format="parquet", compression=None, chunkrows=ARTEFACT_CHUNK_ROWS):
+        self.exppath = exppath
+        self.name = name
+        self.format = format
+        self.serializer = get_serializer(format, compression)
+        self.chunkrows = chunkrows
+
+        self.path = f"{exppath}/{name}{self.serializer.extension}"
+        self.tmpfile = f"{self.path}.{os.getpid()}.tmp"
+        self.appender = None
+        self.columns = None
+        self.dtypes = None
+        self.pending = []
+        self.pendingrows = 0
+        self.rows = 0
+        self.chunks = 0
+        self.metadata = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exctype, exc, traceback):
+        if exctype is None:
+            self.close()
+        else:
+            self.abort()
+
+    def write(self, chunk):
+        """
+        Appends a chunk, its columns should be the columns of the first chunk
+
+        Parameters
+        ----------
+            chunk (pandas.DataFrame) : the next rows of the artefact
+        """
+        columns = [str(col) for col in chunk.columns]
+        if self.columns is None:
+            self.columns = columns
+            self.dtypes = {col : str(dtype) for col, dtype in zip(columns, chunk.dtypes)}
+        elif columns != self.columns:
+            raise AssertionError(f"Chunk columns {columns} differ from the columns of the artefact {self.columns}")
+
+        self.pending.append(chunk)
+        self.pendingrows += chunk.shape[0]
+        if self.pendingrows >= self.chunkrows:
+            self._flush()
+
+    def _flush(self):
+        if len(self.pending) == 0:
+            return
+        chunk = self.pending[0] if len(self.pending) == 1 else pd.concat(self.pending, ignore_index=True)
+        self.pending, self.pendingrows = [], 0
+
+        if self.appender is None:
+            self.appender = self.serializer.appender(self.tmpfile, chunk)
+        self.appender.write(chunk)
+        self.rows += chunk.shape[0]
+        self.chunks += 1
+
+    def close(self):
+        """
+        Writes the buffered rows, moves the file in place and saves the sidecar, returns the metadata
+        """
+        if self.metadata is not None:
+            return self.metadata
+        if self.columns is None:
+            raise AssertionError(f"No chunk was written to artefact {self.name}")
+
+        self._flush()
+        self.appender.close()
+        os.replace(self.tmpfile, self.path)
+
+        self.metadata = {
+            'name' : self.name,
+            'format' : self.format,
+            'compression' : self.serializer.compression,
+            'file' : os.path.basename(self.path),
+            'rows' : self.rows,
+            'dtypes' : self.dtypes,
+            'bytes' : os.path.getsize(self.path),
+            'savedtime' : str(datetime.now()).split('.')[0],
+            'chunks' : self.chunks
+        }
+        with open(f"{self.exppath}/{self.name}.meta.json", "w") as f:
+            json.dump(self.metadata, f)
+
+        self.metadata['path'] = self.path
+        return self.metadata
+
+    def abort(self):
+        """
+        Discards the rows written so far
+        """
+        self.pending = []
+        if self.appender is not None:
+            self.appender.close()
+        if os.path.exists(self.tmpfile):
+            os.remove(self.tmpfile)
+
+
+def read_metadata(exppath, name):
+    """
+    Returns the sidecar metadata of an artefact, None for artefacts saved without one
+    """
+    if not os.path.exists(f"{exppath}/{name}.meta.json"):
+        return None
+    with open(f"{exppath}/{name}.meta.json", "r") as f:
+        return json.load(f)
+
+
+def artefact_files(exppath, name):
+    """
+    Every file an artefact can be saved in, used to detect changes
+    """
+    return [f"{exppath}/{name}.meta.json"] + [
+        f"{exppath}/{name}{serializer.extension}" for serializer in SERIALIZERS.values()
+    ]
+
+
+def find_artefact(exppath, name):
+    """
+    Returns (path, serializer) of a saved artefact, detected from its sidecar or its
+    extension, (None, None) if the artefact does not exist
+    """
+    metadata = read_metadata(exppath, name)
+    if metadata is not None and os.path.exists(f"{exppath}/{metadata['file']}"):
+        return f"{exppath}/{metadata['file']}", get_serializer(metadata['format'], metadata['compression'])
+
+    for format, serializer in SERIALIZERS.items():
+        if os.path.exists(f"{exppath}/{name}{serializer.extension}"):
+            return f"{exppath}/{name}{serializer.extension}", get_serializer(format)
+    return None, None
+
+
+def read_artefact(exppath, name, columns=None):
+    """
+    Reads an artefact whatever format it was saved in, None if it does not exist
+
+    Parameters
+    ----------
+        exppath (str)   : artefact folder of the experiment
+        name (str)      : name the artefact was logged with
+        columns (list)  : (Optional) only read these columns
+    """
+    path, serializer = find_artefact(exppath, name)
+    if path is None:
+        return None
+    return serializer.read(path, columns)
+
+
+def iter_artefact(exppath, name, columns=None, chunkrows=ARTEFACT_CHUNK_ROWS):
+    """
+    Yields an artefact in dataframes of at most `chunkrows` rows, whatever format it was
+    saved in, so that artefacts larger than memory can be scanned. Yields nothing if it does not exist
+
+    Parameters
+    ----------
+        exppath (str)   : artefact folder of the experiment
+        name (str)      : name the artefact was logged with
+        columns (list)  : (Optional) only read these columns
+        chunkrows (int) : (Optional) rows per dataframe
+    """
+    path, serializer = find_artefact(exppath, name)
+    if path is None:
+        return
+    for _, batch in serializer.batches(path, columns, chunkrows):
+        yield batch
+
+
+def sample_artefact(exppath, name, rows=1000, columns=None, seed=0, chunkrows=ARTEFACT_CHUNK_ROWS):
+    """
+    Returns a uniform sample of `rows` rows of an artefact, in the order of the file, None if it
+    does not exist. The rows are drawn from the row count of the sidecar, and the row groups of
+    parquet and feather artefacts without a sampled row are not read
+
+    Parameters
+    ----------
+        exppath (str)   : artefact folder of the experiment
+        name (str)      : name the artefact was logged with
+        rows (int)      : (Optional) number of rows sampled
+        columns (list)  : (Optional) only read these columns
+        seed (int)      : (Optional) seed of the sample
+    """
+    path, serializer = find_artefact(exppath, name)
+    if path is None:
+        return None
+
+    metadata = read_metadata(exppath, name)
+    if metadata is None:
+        ### artefacts saved without a sidecar were logged whole and fit in memory
+        artefact = serializer.read(path, columns)
+        return artefact.sample(min(rows, artefact.shape[0]), random_state=seed).sort_index().reset_index(drop=True)
+    if metadata['rows'] <= rows:
+        return serializer.read(path, columns)
+
+    positions = np.sort(np.random.default_rng(seed).choice(metadata['rows'], rows, replace=False))
+
+    def skip(start, nrows):
+        first = np.searchsorted(positions, start)
+        return first == len(positions) or positions[first] >= start + nrows
+
+    samples = []
+    for start, batch in serializer.batches(path, columns, chunkrows, skip):
+        first, last = np.searchsorted(positions, [start, start + batch.shape[0]])
+        samples.append(batch.iloc[positions[first:last] - start])
+    return pd.concat(samples, ignore_index=True)
+
+
+def aggregate_artefact(exppath, name, by, values=None, chunkrows=ARTEFACT_CHUNK_ROWS):
+    """
+    Returns the count, sum, mean, min and max of columns of an artefact by group, computed chunk by
+    chunk so that only the groups are held in memory, None if the artefact does not exist
+
+    Parameters
+    ----------
+        exppath (str)   : artefact folder of the experiment
+        name (str)      : name the artefact was logged with
+        by (str/list)   : columns to group by, eg: 'fold' or ['store', 'fold']
+        values (list)   : (Optional) columns aggregated, defaults to the numeric columns
+        chunkrows (int) : (Optional) rows read at once
+    """
+    by = [by] if isinstance(by, str) else list(by)
+    columns = None if values is None else by + list(values)
+
+    dfagg = None
+    for batch in iter_artefact(exppath, name, columns, chunkrows):
+        if values is None:
+            values = batch.drop(columns=by).select_dtypes('number').columns.tolist()
+        partial = batch.groupby(by, dropna=False, observed=True)[values].agg(['count', 'sum', 'min', 'max'])
+        if dfagg is not None:
+            partial = pd.concat([dfagg, partial])
+            partial = partial.groupby(level=list(range(len(by))), dropna=False).agg(
+                {col : 'min' if col[1] == 'min' else 'max' if col[1] == 'max' else 'sum' for col in partial.columns})
+        dfagg = partial
+
+    if dfagg is None:
+        return None
+    for col in values:
+        dfagg[(col, 'mean')] = dfagg[(col, 'sum')] / dfagg[(col, 'count')]
+    return dfagg[[(col, stat) for col in values for stat in ['count', 'sum', 'mean', 'min', 'max']]]
+
+
+def normalize_importance(imp):
+    """
+    Returns (features, importance) arrays of a feature importance dataframe, the
+    importance of repeated features is summed and normalized to add up to 1
+
+    Parameters
+    ----------
+        imp (pandas.DataFrame) : dataframe with 'Feature' and 'Importance' columns (any case)
+    """
+    imp = imp.rename(columns={col : col.lower() for col in imp.columns})
+    codes, features = pd.factorize(imp['feature'].astype(str))
+    importance = np.bincount(codes, weights=imp['importance'].to_numpy(dtype=float),
+        minlength=len(features))
+    total = importance.sum()
+    if total != 0:
+        importance = importance / total
+    return np.asarray(features, dtype=str), importance
+
+
+def save_importance(imp, exppath):
+    """
+    Saves the normalized importance vector of an experiment as importance.npz,
+    which the dashboard reads instead of parsing and normalizing importance.csv
+    """
+    features, importance = normalize_importance(imp)
+    np.savez(f"{exppath}/importance.npz", features=features, importance=importance)
+
+
+def load_importance(exppath):
+    """
+    Returns the (features, importance) vector of an experiment, read from importance.npz
+    or computed from the importance artefact for experiments logged before the cache existed,
+    None if the experiment has no importance artefact
+    """
+    if os.path.exists(f"{exppath}/importance.npz"):
+        with np.load(f"{exppath}/importance.npz", allow_pickle=False) as cached:
+            return cached['features'], cached['importance']
+
+    imp = read_artefact(exppath, 'importance')
+    if imp is not None:
+        return normalize_importance(imp)
+
+    return None
+
+
+def merge_importance(vectors, topfeatures=10):
+    """
+    Sums the importance vectors of several experiments, returns the top features
+    with their normalized importance and the number of experiments they appear in
+
+    Parameters
+    ----------
+        vectors (list)      : (features, importance) tuples
+        topfeatures (int)   : (Optional) number of features returned
+    """
+    if len(vectors) == 0:
+        return pd.DataFrame({'feature' : [], 'importance' : [], 'count' : []})
+
+    codes, features = pd.factorize(np.concatenate([features for features, _ in vectors]))
+    importance = np.bincount(codes, weights=np.concatenate([values for _, values in vectors]))
+    count = np.bincount(codes)
+    if importance.sum() != 0:
+        importance = importance / importance.sum()
+
+    top = np.argsort(-importance, kind='stable')[:topfeatures][::-1]
+    return pd.DataFrame({
+        'feature' : np.asarray(features)[top],
+        'importance' : importance[top].round(2),
+        'count' : count[top]
+    })
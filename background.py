@@ -0,0 +1,112 @@
+import queue
+import threading
+import time
+
+
+class BackgroundWriter():
+    """
+    Runs the disk writes of a run on a background thread, so logging never blocks
+    the training loop. Calls are queued and executed in order, in batches of
+    everything queued since the last batch. A call submitted with a key replaces
+    the calls with the same key still waiting in the batch, eg: only the latest
+    state of the run is saved to the runmaster. The `onflush` callables are called
+    after every batch, errors of the writes are raised by the next flush() or close()
+
+    Attributes
+    ----------
+    onflush (list)          : (Optional) callables called after every batch, eg: flushing the log writer
+
+    flushinterval (float)   : (Optional) seconds the writer collects calls before writing them as a batch
+
+    maxpending (int)        : (Optional) calls queued before submit() blocks, bounds the memory held
+        by the queue when the writes cannot keep up with the training loop
+    """
+    def __init__(self, onflush=(), flushinterval=0.5, maxpending=10000):
+        self.onflush = list(onflush)
+        self.flushinterval = flushinterval
+        self.maxpending = maxpending
+        self.queue = queue.Queue(maxsize=maxpending)
+        self.error = None
+        self.closed = False
+
+        self.thread = threading.Thread(target=self._run, name="deepflow-writer", daemon=True)
+        self.thread.start()
+
+    def submit(self, function, *args, key=None):
+        """
+        Queues function(*args) to be run on the writer thread, blocks while `maxpending` calls are queued
+
+        Parameters
+        ----------
+            function (callable) : the write to run
+            key (hashable)      : (Optional) calls with the same key are coalesced, only the latest runs
+        """
+        if self.closed:
+            raise AssertionError("The background writer is closed")
+        self.queue.put((key, function, args))
+
+    def flush(self):
+        """
+        Blocks until every call submitted so far is written and flushed
+        """
+        if self.thread.is_alive():
+            done = threading.Event()
+            self.queue.put(done)
+            done.wait()
+        self._raise()
+
+    def close(self):
+        """
+        Flushes the pending calls and stops the writer thread
+        """
+        if self.closed:
+            return
+        self.closed = True
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join()
+        self._raise()
+
+    def _raise(self):
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+
+    def _run(self):
+        stop = False
+        while not stop:
+            batch = [self.queue.get()]
+            ### collect calls for up to flushinterval seconds so that writes are batched,
+            ### flush() and close() (None) end the batch right away, as does a full batch
+            deadline = time.monotonic() + self.flushinterval
+            try:
+                while isinstance(batch[-1], tuple) and len(batch) < self.maxpending:
+                    batch.append(self.queue.get(timeout=max(deadline - time.monotonic(), 0)))
+            except queue.Empty:
+                pass
+
+            stop = batch[-1] is None
+            calls = [item for item in batch if isinstance(item, tuple)]
+
+            ### only the last call of every key is run
+            latest = {call[0] : position for position, call in enumerate(calls) if call[0] is not None}
+            for position, (key, function, args) in enumerate(calls):
+                if key is not None and latest[key] != position:
+                    continue
+                self._call(function, *args)
+
+            for function in self.onflush:
+                self._call(function)
+
+            ### the written calls are released before waiting for the next batch
+            events = [item for item in batch if isinstance(item, threading.Event)]
+            batch = calls = latest = None
+            for event in events:
+                event.set()
+
+    def _call(self, function, *args):
+        try:
+            function(*args)
+        except Exception as e:
+            if self.error is None:
+                self.error = e
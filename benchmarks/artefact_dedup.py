@@ -0,0 +1,78 @@
+"""
+Benchmark of the deduplicated artefact store of DeepFlow.log_artefact
+
+Logs the same prediction and importance frames from a chain of child experiments,
+as children re-logging the artefacts of their parent do, with and without the blob
+store, and reports the time spent logging and the size of the Artefacts folder
+
+    python benchmarks/artefact_dedup.py --rows 1000000 --children 10
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from artefact_formats import predictions
+from artefacts import read_artefact, write_artefact
+from blobs import BlobStore
+
+
+def importance(features, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({'feature' : [f"f_{i}" for i in range(features)], 'importance' : rng.random(features)})
+
+
+def folder_bytes(path):
+    return sum(os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(path) for f in files)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--rows", type=int, default=1000000, help="rows of the prediction frame")
+    parser.add_argument("--features", type=int, default=500)
+    parser.add_argument("--children", type=int, default=10, help="child experiments re-logging the artefacts")
+    parser.add_argument("--format", default="parquet")
+    args = parser.parse_args()
+
+    artefacts = {'predictions' : predictions(args.rows), 'importance' : importance(args.features)}
+    results = []
+    for dedup in [False, True]:
+        with tempfile.TemporaryDirectory() as root:
+            artefactspath = os.path.join(root, "Artefacts")
+            blobstore = BlobStore(os.path.join(artefactspath, "Blobs")) if dedup else None
+
+            timings = []
+            for expid in range(1, args.children + 2):
+                exppath = os.path.join(artefactspath, f"exp_{expid} - child")
+                os.makedirs(exppath)
+                start = time.perf_counter()
+                for name, artefact in artefacts.items():
+                    write_artefact(artefact, exppath, name, args.format, blobstore=blobstore)
+                timings.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            read_artefact(exppath, 'predictions')
+            read = time.perf_counter() - start
+
+            results.append({
+                'dedup' : dedup,
+                'first_log_s' : round(timings[0], 3),
+                'child_log_s' : round(float(np.median(timings[1:])), 3),
+                'read_s' : round(read, 3),
+                'disk_mb' : round(folder_bytes(artefactspath) / 2**20, 2),
+                'usage' : blobstore.usage(artefactspath) if dedup else None
+            })
+
+    print(json.dumps({'rows' : args.rows, 'children' : args.children, 'format' : args.format,
+        'results' : results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Benchmark of the artefact formats of DeepFlow.log_artefact
+
+Writes and reads back a synthetic prediction frame with every serializer and
+reports write time, read time and size on disk
+
+    python benchmarks/artefact_formats.py --rows 2000000
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from artefacts import read_artefact, write_artefact
+
+FORMATS = [
+    ('csv', None),
+    ('csv', 'gzip'),
+    ('parquet', 'snappy'),
+    ('parquet', 'zstd'),
+    ('feather', 'lz4'),
+    ('feather', 'zstd'),
+]
+
+
+def predictions(rows, seed=0):
+    """
+    Out of fold predictions like frame, ids, dates, a few categoricals and float predictions
+    """
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'id' : np.arange(rows),
+        'date' : pd.Timestamp("2020-01-01") + pd.to_timedelta(rng.integers(0, 1000, rows), unit='D'),
+        'store' : rng.integers(0, 60, rows),
+        'item' : rng.integers(0, 20000, rows),
+        'fold' : rng.integers(0, 5, rows).astype(np.int8),
+        'target' : rng.poisson(3, rows).astype(float),
+        'prediction' : rng.gamma(2, 1.5, rows),
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--formats", nargs="*", default=None,
+        help="format:compression pairs, eg: parquet:zstd feather:lz4")
+    args = parser.parse_args()
+
+    formats = FORMATS
+    if args.formats:
+        formats = [tuple(f.split(":")) if ":" in f else (f, None) for f in args.formats]
+
+    df = predictions(args.rows)
+    results = []
+    with tempfile.TemporaryDirectory() as exppath:
+        for format, compression in formats:
+            name = f"predictions_{format}_{compression}"
+
+            start = time.perf_counter()
+            metadata = write_artefact(df, exppath, name, format, compression)
+            write = time.perf_counter() - start
+
+            start = time.perf_counter()
+            read_artefact(exppath, name)
+            read = time.perf_counter() - start
+
+            results.append({
+                'format' : format,
+                'compression' : compression,
+                'write_s' : round(write, 3),
+                'read_s' : round(read, 3),
+                'mb' : round(metadata['bytes'] / 2**20, 2)
+            })
+            os.remove(metadata['path'])
+
+    print(json.dumps({'rows' : args.rows, 'results' : results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Benchmark of the artefacts logged in chunks by DeepFlow.log_artefact_chunks
+
+Writes a prediction frame produced in chunks with ChunkedArtefactWriter and, for
+comparison, materialized whole with write_artefact, then times the dashboard reads:
+a full read, a sample and a group-by aggregate. Peak memory is the peak traced by
+tracemalloc, which follows numpy and pandas allocations but not the arrow memory pool
+
+    python benchmarks/chunked_artefacts.py --rows 20000000 --chunkrows 1000000
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import pandas as pd
+
+from artefact_formats import predictions
+from artefacts import (ChunkedArtefactWriter, aggregate_artefact, read_artefact, sample_artefact,
+                       write_artefact)
+
+
+def chunks(rows, chunkrows):
+    for seed, start in enumerate(range(0, rows, chunkrows)):
+        chunk = predictions(min(chunkrows, rows - start), seed)
+        chunk['id'] += start
+        yield chunk
+
+
+def measure(function):
+    """
+    Returns (result, seconds, peak MB traced) of a call, the call is repeated under
+    tracemalloc for the peak since tracing slows the allocations down
+    """
+    start = time.perf_counter()
+    function()
+    seconds = time.perf_counter() - start
+
+    tracemalloc.start()
+    result = function()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, round(seconds, 3), round(peak / 2**20, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--rows", type=int, default=5000000)
+    parser.add_argument("--chunkrows", type=int, default=500000, help="rows of every chunk produced")
+    parser.add_argument("--format", default="parquet")
+    parser.add_argument("--sample", type=int, default=1000, help="rows sampled")
+    parser.add_argument("--skipwhole", action="store_true", help="skip the materialized write and full read")
+    args = parser.parse_args()
+
+    results = {'rows' : args.rows, 'chunkrows' : args.chunkrows, 'format' : args.format}
+    with tempfile.TemporaryDirectory() as exppath:
+        def streamed():
+            with ChunkedArtefactWriter(exppath, 'streamed', args.format) as writer:
+                for chunk in chunks(args.rows, args.chunkrows):
+                    writer.write(chunk)
+            return writer.metadata
+        metadata, seconds, peak = measure(streamed)
+        results['chunked_write'] = {'s' : seconds, 'peak_mb' : peak, 'mb' : round(metadata['bytes'] / 2**20, 1),
+            'chunks' : metadata['chunks']}
+
+        _, seconds, peak = measure(lambda : sample_artefact(exppath, 'streamed', args.sample))
+        results['sample'] = {'s' : seconds, 'peak_mb' : peak}
+
+        _, seconds, peak = measure(lambda : aggregate_artefact(exppath, 'streamed', 'fold', ['target', 'prediction']))
+        results['aggregate'] = {'s' : seconds, 'peak_mb' : peak}
+
+        if not args.skipwhole:
+            def whole():
+                return write_artefact(pd.concat(chunks(args.rows, args.chunkrows), ignore_index=True),
+                    exppath, 'whole', args.format)
+            _, seconds, peak = measure(whole)
+            results['whole_write'] = {'s' : seconds, 'peak_mb' : peak}
+
+            _, seconds, peak = measure(lambda : read_artefact(exppath, 'streamed'))
+            results['full_read'] = {'s' : seconds, 'peak_mb' : peak}
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Multi-process stress benchmark for the runmaster registry
+
+Launches several processes which all create experiments in the same project
+at the same time, then checks that every run got its own ExpID and that no
+run record was lost
+
+    python benchmarks/concurrent_registry.py --processes 20 --runs 5 --storage sqlite
+"""
+import argparse
+import contextlib
+import io
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from __init__ import DeepFlow
+from storage import open_runstore
+from workspace import WORKSPACE_ENV
+
+
+def worker(projectdir, worker_id, runs, heartbeats):
+    os.chdir(projectdir)
+    with contextlib.redirect_stdout(io.StringIO()):
+        for run in range(runs):
+            flow = DeepFlow(
+                projectname="Stress",
+                description=f"worker {worker_id} run {run}",
+                parentID=1,
+                params={'worker' : worker_id, 'run' : run}
+            )
+            flow.log_score('Error', 'RMSE', worker_id + run / 10)
+            for _ in range(heartbeats):
+                flow.log_status(logmessage="HeartBeat")
+            flow.log_status("Completed")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--processes", type=int, default=20)
+    parser.add_argument("--runs", type=int, default=5, help="runs per process")
+    parser.add_argument("--heartbeats", type=int, default=10, help="log_status calls per run")
+    parser.add_argument("--storage", default="sqlite", choices=["sqlite", "csv"])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as projectdir:
+        os.chdir(projectdir)
+        ### the benchmark projects are catalogued in their own workspace, not the user's
+        os.environ[WORKSPACE_ENV] = projectdir
+        with contextlib.redirect_stdout(io.StringIO()):
+            DeepFlow(projectname="Stress", description="root", storage=args.storage).log_status("Completed")
+
+        start = time.perf_counter()
+        processes = [
+            multiprocessing.Process(target=worker, args=(projectdir, i, args.runs, args.heartbeats))
+            for i in range(args.processes)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        elapsed = time.perf_counter() - start
+
+        dfrunmaster = open_runstore(os.path.join(projectdir, "Artefacts/Overview")).read()
+        expected = args.processes * args.runs + 1
+        completed = (dfrunmaster.Status == "Completed").sum()
+        statuscalls = args.processes * args.runs * (args.heartbeats + 2)
+
+        print(f"storage              : {args.storage}")
+        print(f"processes            : {args.processes}")
+        print(f"runs expected        : {expected}")
+        print(f"runs found           : {dfrunmaster.shape[0]}")
+        print(f"unique ExpIDs        : {dfrunmaster.ExpID.nunique()}")
+        print(f"runs completed       : {completed}")
+        print(f"elapsed (s)          : {elapsed:.2f}")
+        print(f"status calls / s     : {statuscalls / elapsed:.0f}")
+
+        failed = [code for code in (p.exitcode for p in processes) if code != 0]
+        if failed or dfrunmaster.ExpID.nunique() != expected or completed != expected:
+            sys.exit("FAILED : runs were lost or share an ExpID")
+        print("OK")
+
+
+if __name__ == "__main__":
+    main()
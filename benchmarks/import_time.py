@@ -0,0 +1,114 @@
+"""
+Benchmark of the start up time of the logging client and of the dashboard
+
+Runs every target in fresh interpreters under python -X importtime: importing the DeepFlow
+package, a run which only logs params, statuses and a score, and importing the dashboard
+app. Reports the wall time of each, the modules with the largest cumulative import time
+and the heavy libraries which were imported. Exits with status 1 when a target exceeds its
+budget, or when the client imports pandas or numpy, so that it can be used as a check
+
+    python benchmarks/import_time.py --repeat 5 --client-budget 150 --dashboard-budget 800
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+### libraries reported when a target imports them
+HEAVY_MODULES = ['pandas', 'numpy', 'pyarrow', 'plotly', 'dash', 'flask']
+
+### libraries the logging client should never import for a run only logging statuses
+CLIENT_FORBIDDEN = ['pandas', 'numpy']
+
+PACKAGE = os.path.basename(ROOT)
+
+CLIENT_RUN = f"""
+from {PACKAGE} import DeepFlow
+flow = DeepFlow(projectname='Import time', description='status only', params={{'model' : 'LGB'}})
+flow.log_param('lr', 0.1)
+flow.log_status(logmessage='Training')
+flow.log_score('Error', 'RMSE', 1.0)
+flow.log_status('Completed')
+"""
+
+TARGETS = [
+    ('client_import', os.path.dirname(ROOT), f"import {PACKAGE}", 'client'),
+    ('client_run', os.path.dirname(ROOT), CLIENT_RUN, 'client'),
+    ('dashboard_import', ROOT, "import app", 'dashboard'),
+]
+
+
+def run_target(cwd, statement, workdir):
+    """
+    Runs a statement in a fresh interpreter, returns (wall seconds, heavy modules imported,
+    {module : cumulative import microseconds} of the modules imported by the top level ones)
+    """
+    code = (
+        "import json, os, sys, time\n"
+        f"sys.path.insert(0, {cwd!r})\n"
+        f"os.chdir({workdir!r})\n"
+        "start = time.perf_counter()\n"
+        f"exec(compile({statement!r}, '<target>', 'exec'))\n"
+        "print(json.dumps({'seconds' : time.perf_counter() - start,"
+        f" 'heavy' : [module for module in {HEAVY_MODULES!r} if module in sys.modules]}}))\n"
+    )
+    result = subprocess.run([sys.executable, "-X", "importtime", "-W", "ignore", "-c", code], cwd=cwd,
+        capture_output=True, text=True, env=dict(os.environ, DEEPFLOW_WORKSPACE=workdir))
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr[-2000:])
+
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, total, module = line.split("|")
+        ### modules imported directly by a module of the top level, eg: dash by app
+        if total.strip().isdigit() and len(module) - len(module.lstrip()) == 3:
+            cumulative[module.strip()] = int(total)
+    output = json.loads(result.stdout.strip().splitlines()[-1])
+    return output['seconds'], output['heavy'], cumulative
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--repeat", type=int, default=5, help="fresh interpreters per target, the fastest is kept")
+    parser.add_argument("--client-budget", type=float, default=150, help="ms allowed for the client targets")
+    parser.add_argument("--dashboard-budget", type=float, default=800, help="ms allowed to import the dashboard")
+    parser.add_argument("--top", type=int, default=5, help="slowest imports reported")
+    args = parser.parse_args()
+
+    budgets = {'client' : args.client_budget, 'dashboard' : args.dashboard_budget}
+    results, failed = [], False
+    for name, cwd, statement, kind in TARGETS:
+        best = None
+        for _ in range(args.repeat):
+            with tempfile.TemporaryDirectory() as workdir:
+                run = run_target(cwd, statement, workdir)
+            if best is None or run[0] < best[0]:
+                best = run
+        seconds, heavy, cumulative = best
+
+        slowest = sorted(cumulative.items(), key=lambda item : -item[1])[:args.top]
+        forbidden = [module for module in heavy if kind == 'client' and module in CLIENT_FORBIDDEN]
+        ok = 1000 * seconds <= budgets[kind] and len(forbidden) == 0
+        failed = failed or not ok
+        results.append({
+            'target' : name,
+            'ms' : round(1000 * seconds, 1),
+            'budget_ms' : budgets[kind],
+            'ok' : ok,
+            'heavy_modules' : heavy,
+            'forbidden_modules' : forbidden,
+            'slowest_imports_ms' : {module : round(us / 1000, 1) for module, us in slowest}
+        })
+
+    print(json.dumps(results, indent=2))
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
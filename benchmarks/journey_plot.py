@@ -0,0 +1,115 @@
+"""
+Benchmark of the journey plot of the overview page
+
+Compares the previous figure, one SVG Scatter per metric holding every run, with
+utils.create_journey_figure, which groups the runmaster once, downsamples every
+trace keeping extremes and the road to the best model, and switches to WebGL.
+Reports build time, JSON serialization time and payload size, the payload is
+what the browser has to parse and draw
+
+    python benchmarks/journey_plot.py --runs 1000 10000 100000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objs as go
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from utils import create_journey_figure
+
+
+def previous_figure(dfrunmaster):
+    """
+    Journey figure as it was before the downsampling, kept here as the baseline
+    """
+    figure = go.Figure()
+    for metric in dfrunmaster.Metric.unique():
+        figure.add_traces([
+            go.Scatter(
+                x=dfrunmaster[dfrunmaster.Metric==metric]['ExpID'],
+                y=dfrunmaster[dfrunmaster.Metric==metric]['Score'],
+                text=dfrunmaster[dfrunmaster.Metric==metric]['Description'],
+                mode="lines+markers",
+                name=metric,
+                hovertemplate= "%{text}<br>" + "<b>Score : <b>%{y}<br>"
+            )
+        ])
+    figure.add_traces([
+        go.Scatter(
+            x=dfrunmaster['ExpID'],
+            y=dfrunmaster['Benchmark'],
+            line={'dash':'dash'},
+            name="Benchmark",
+            hovertemplate="Benchmark %{y}"
+        )
+    ])
+    return figure
+
+
+def runmaster(runs, seed=0):
+    rng = np.random.default_rng(seed)
+    metric = rng.choice(['RMSE', 'MAE', 'AVERAGE RMSE'], runs)
+    score = np.abs(rng.normal(1, 0.2, runs)) - np.arange(runs) / (4 * runs)
+    dfrunmaster = pd.DataFrame({
+        'ExpID' : np.arange(1, runs + 1),
+        'Metric' : metric,
+        'Score' : score.round(4),
+        'Description' : [f"experiment {i}" for i in range(runs)],
+        'Benchmark' : 0.9,
+        'Chosen' : 0
+    })
+    ### road to the best model, a chain of improving runs
+    chain = np.sort(rng.choice(runs, min(50, runs), replace=False))
+    dfrunmaster.loc[chain, 'Chosen'] = 1
+    return dfrunmaster
+
+
+def measure(name, function, dfrunmaster, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        figure = function(dfrunmaster)
+        built = time.perf_counter()
+        payload = figure.to_json()
+        timings.append((built - start, time.perf_counter() - built))
+
+    chosen = set(dfrunmaster.loc[dfrunmaster.Chosen==1, 'ExpID'])
+    drawn = set(np.concatenate([np.asarray(trace.x) for trace in figure.data[:-1]]).tolist())
+    return {
+        'name' : name,
+        'build_ms' : round(1000 * min(t[0] for t in timings), 2),
+        'serialize_ms' : round(1000 * min(t[1] for t in timings), 2),
+        'payload_bytes' : len(payload),
+        'points' : sum(len(trace.x) for trace in figure.data),
+        'webgl' : any(trace.type == 'scattergl' for trace in figure.data),
+        'chosen_kept' : chosen <= drawn
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--runs", type=int, nargs="*", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    results = []
+    for runs in args.runs:
+        dfrunmaster = runmaster(runs)
+        results.append({
+            'runs' : runs,
+            'results' : [
+                measure('svg, every run', previous_figure, dfrunmaster, args.repeat),
+                measure('grouped, downsampled', create_journey_figure, dfrunmaster, args.repeat)
+            ]
+        })
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
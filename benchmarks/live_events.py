@@ -0,0 +1,71 @@
+"""
+Benchmark of the live events read by the Running now panel
+
+Fills an event log with a history of events, then times EventLog.emit and the
+EventTail read done on every tick of the dashboard, for several numbers of new
+events. The cost of a tick should follow the new events, not the size of the log
+
+    python benchmarks/live_events.py --history 10000 1000000 --new 0 10 1000
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from events import EventLog, EventTail, LiveRuns
+
+
+def event(expid, i):
+    return {'Event' : 'status', 'ExpID' : expid, 'Status' : 'Running', 'Message' : f"HeartBeat {i}",
+        'Time' : time.time_ns()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--history", type=int, nargs="*", default=[10000, 1000000], help="events already in the log")
+    parser.add_argument("--new", type=int, nargs="*", default=[0, 10, 1000], help="events appended between two ticks")
+    parser.add_argument("--runs", type=int, default=20, help="runs sending the events")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    results = []
+    for history in args.history:
+        with tempfile.TemporaryDirectory() as folder:
+            eventfile = os.path.join(folder, "events.jsonl")
+            with open(eventfile, "w") as f:
+                for i in range(history):
+                    f.write(json.dumps(event(i % args.runs, i), separators=(",", ":")) + "\n")
+
+            log = EventLog(eventfile)
+            start = time.perf_counter()
+            for i in range(1000):
+                log.emit(event(i % args.runs, i))
+            emit = (time.perf_counter() - start) / 1000
+
+            tail, runs = EventTail(eventfile), LiveRuns()
+            tail.read()
+            for new in args.new:
+                timings = []
+                for _ in range(args.repeat):
+                    for i in range(new):
+                        log.emit(event(i % args.runs, i))
+                    start = time.perf_counter()
+                    runs.apply(tail.read())
+                    runs.frame()
+                    timings.append(time.perf_counter() - start)
+                results.append({
+                    'history_events' : history,
+                    'log_bytes' : os.path.getsize(eventfile),
+                    'new_events' : new,
+                    'tick_ms' : round(1000 * min(timings), 3),
+                    'emit_us' : round(1e6 * emit, 1)
+                })
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Benchmark of the latency DeepFlow adds to the training loop
+
+Times every log_status, log_param, log_score and log_artefact call on the caller
+thread, with the synchronous writes and with asynclogging, and checks that every
+log reached the disk once the run is Completed
+
+    python benchmarks/logging_latency.py --heartbeats 1000 --storage sqlite
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from __init__ import DeepFlow
+from workspace import WORKSPACE_ENV
+
+
+def percentiles(timings):
+    timings = 1000 * np.asarray(timings)
+    return {
+        'calls' : len(timings),
+        'p50_ms' : round(float(np.percentile(timings, 50)), 4),
+        'p99_ms' : round(float(np.percentile(timings, 99)), 4),
+        'max_ms' : round(float(timings.max()), 4)
+    }
+
+
+def run(projectdir, storage, asynclogging, heartbeats, artefactrows):
+    os.chdir(projectdir)
+    timings = {'log_status' : [], 'log_param' : [], 'log_score' : [], 'log_artefact' : []}
+    predictions = pd.DataFrame({'id' : np.arange(artefactrows), 'prediction' : np.random.rand(artefactrows)})
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        flow = DeepFlow(projectname="Latency", description=f"async {asynclogging}", parentID=1,
+            storage=storage, asynclogging=asynclogging)
+
+        for step in range(heartbeats):
+            start = time.perf_counter()
+            flow.log_param('step', step)
+            timings['log_param'].append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            flow.log_status(logmessage="HeartBeat")
+            timings['log_status'].append(time.perf_counter() - start)
+
+            if step % 100 == 0:
+                start = time.perf_counter()
+                flow.log_score('Error', 'RMSE', 1 / (step + 1))
+                timings['log_score'].append(time.perf_counter() - start)
+
+                start = time.perf_counter()
+                flow.log_artefact(predictions, 'predictions')
+                timings['log_artefact'].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        flow.log_status("Completed")
+        close = time.perf_counter() - start
+
+    return flow, {name : percentiles(values) for name, values in timings.items()}, close
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--heartbeats", type=int, default=1000, help="log_status calls per run")
+    parser.add_argument("--artefactrows", type=int, default=100000, help="rows of the artefact logged every 100 steps")
+    parser.add_argument("--storage", default="sqlite", choices=["sqlite", "csv"])
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as projectdir:
+        os.chdir(projectdir)
+        ### the benchmark projects are catalogued in their own workspace, not the user's
+        os.environ[WORKSPACE_ENV] = projectdir
+        with contextlib.redirect_stdout(io.StringIO()):
+            DeepFlow(projectname="Latency", description="root", storage=args.storage).log_status("Completed")
+
+        for asynclogging in (False, True):
+            flow, timings, close = run(projectdir, args.storage, asynclogging, args.heartbeats, args.artefactrows)
+
+            if args.storage == "sqlite":
+                logs = flow.runmaster.readlogs(flow.expid).shape[0]
+            else:
+                logs = pd.read_csv(flow.logfile).shape[0]
+
+            results.append({
+                'asynclogging' : asynclogging,
+                'timings' : timings,
+                'completed_ms' : round(1000 * close, 2),
+                'logs_on_disk' : logs,
+                'logs_expected' : args.heartbeats + 2
+            })
+
+    print(json.dumps({'storage' : args.storage, 'heartbeats' : args.heartbeats, 'results' : results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Round trip check of the typed params table of both storage backends
+
+Saves params of every type with encode_param, then checks that getparams reads each
+value back with its type, and that findruns finds the run from the value it was
+logged with, eg: findruns([('flag', '=', True)])
+
+    python benchmarks/params_roundtrip.py --storage sqlite csv
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from storage import encode_param, open_runstore
+
+PARAMS = {
+    'flag' : True,
+    'off' : False,
+    'trees' : 500,
+    'lr' : 0.05,
+    'model' : 'LGB',
+    'lags' : '1,2,3',
+    'none' : None,
+    'layers' : [64, 32],
+}
+
+### a second run whose params differ in every key, so that a match on the wrong run is caught
+OTHER = {
+    'flag' : False,
+    'off' : True,
+    'trees' : 100,
+    'lr' : 0.5,
+    'model' : 'XGB',
+    'lags' : '4',
+    'none' : 'set',
+    'layers' : [16],
+}
+
+
+def check(storage):
+    """
+    Returns the failures of the round trip, (key, what failed, value found)
+    """
+    failures = []
+    with tempfile.TemporaryDirectory() as overviewpath:
+        runstore = open_runstore(overviewpath, storage)
+        for expid, params in ((1, PARAMS), (2, OTHER)):
+            runstore.saveparams(expid, {key : encode_param(value) for key, value in params.items()})
+
+        read = runstore.getparams(1)
+        for key, value in PARAMS.items():
+            if read.get(key) != value or type(read.get(key)) is not type(value):
+                failures.append((key, 'getparams', repr(read.get(key))))
+
+            found = runstore.findruns([(key, '=', value)])
+            if found != [1]:
+                failures.append((key, 'findruns =', found))
+        if runstore.findruns([(key, '=', value) for key, value in PARAMS.items()]) != [1]:
+            failures.append(('*', 'findruns all', None))
+        if runstore.findruns([('trees', '>', 200), ('flag', '!=', False)]) != [1]:
+            failures.append(('trees, flag', 'findruns > !=', None))
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--storage", nargs="*", default=["sqlite", "csv"], choices=["sqlite", "csv"])
+    args = parser.parse_args()
+
+    results = {storage : check(storage) for storage in args.storage}
+    print(json.dumps(results, indent=2))
+    if any(len(failures) for failures in results.values()):
+        sys.exit("FAILED : params did not round trip")
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Benchmark of the memory held by a DeepFlow run
+
+Measures with tracemalloc the size of the in-memory record of a run (a __slots__
+RunRecord, against the one-row DataFrame it replaces) and the memory of a long run
+in a project with a large history: the peak while the run is created, then the
+memory still allocated after every batch of heartbeats, which should stay flat.
+With asynclogging the memory grows with the writes still queued, up to the bound of
+the background writer, and drops back once they are flushed
+
+    python benchmarks/session_memory.py --history 100000 --heartbeats 100000
+"""
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import sys
+import tempfile
+import tracemalloc
+from datetime import datetime
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from __init__ import DeepFlow
+from records import RunRecord
+from storage import RUNMASTER_COLUMNS
+from suite import make_project
+from workspace import WORKSPACE_ENV
+
+
+def allocated(function, count):
+    """
+    Bytes still allocated per object after creating `count` objects with function()
+    """
+    gc.collect()
+    tracemalloc.start()
+    objects = [function() for _ in range(count)]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del objects
+    return round(current / count)
+
+
+def record_sizes(count):
+    values = {
+        'ProjectName' : "Benchmark", 'ExpID' : 1, 'Description' : "run", 'StartTime' : datetime.now(),
+        'Status' : "Running", 'Benchmark' : 1.0
+    }
+
+    def dataframe():
+        dfrun = pd.DataFrame(columns=RUNMASTER_COLUMNS)
+        for col, value in values.items():
+            dfrun[col] = [value]
+        return dfrun
+
+    return {
+        'dataframe_bytes' : allocated(dataframe, count),
+        'slots_record_bytes' : allocated(lambda : RunRecord(**values), count)
+    }
+
+
+def session(root, parentid, heartbeats, checkpoints, storage, **kwargs):
+    """
+    Memory of a run logging `heartbeats` heartbeats, measured `checkpoints` times
+    """
+    os.chdir(root)
+    gc.collect()
+    tracemalloc.start()
+    with contextlib.redirect_stdout(io.StringIO()):
+        flow = DeepFlow(projectname="Benchmark", description=f"session {datetime.now()}", parentID=parentid,
+            storage=storage, **kwargs)
+        _, constructpeak = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+
+        memory = []
+        every = max(1, heartbeats // checkpoints)
+        for i in range(1, heartbeats + 1):
+            flow.log_status(logmessage="HeartBeat")
+            flow.log_metric("loss", 1 / i)
+            if i % every == 0:
+                memory.append(tracemalloc.get_traced_memory()[0])
+        _, peak = tracemalloc.get_traced_memory()
+        flow.flush()
+        flushed, _ = tracemalloc.get_traced_memory()
+        flow.log_status("Completed")
+    tracemalloc.stop()
+
+    return {
+        'construct_peak_kb' : round(constructpeak / 1024, 1),
+        'first_checkpoint_kb' : round(memory[0] / 1024, 1),
+        'last_checkpoint_kb' : round(memory[-1] / 1024, 1),
+        'growth_per_1000_heartbeats_bytes' : round(1000 * (memory[-1] - memory[0]) / max(1, heartbeats - every)),
+        'peak_kb' : round(peak / 1024, 1),
+        'after_flush_kb' : round(flushed / 1024, 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--history", type=int, nargs="*", default=[1000, 100000], help="runs already in the project")
+    parser.add_argument("--heartbeats", type=int, default=20000)
+    parser.add_argument("--checkpoints", type=int, default=10)
+    parser.add_argument("--storage", nargs="*", default=["sqlite", "csv"], choices=["sqlite", "csv"])
+    parser.add_argument("--records", type=int, default=1000, help="records created to measure their size")
+    args = parser.parse_args()
+
+    results = {'records' : record_sizes(args.records), 'sessions' : []}
+    for storage in args.storage:
+        for history in args.history:
+            with tempfile.TemporaryDirectory() as root:
+                ### the benchmark projects are catalogued in their own workspace, not the user's
+                os.environ[WORKSPACE_ENV] = root
+                parentid = make_project(root, history, storage, importanceruns=1)
+                for name, kwargs in (('flush every log', {}), ('flush at the end', {'logflushevery' : 0}),
+                        ('asynclogging', {'asynclogging' : True})):
+                    result = session(root, parentid, args.heartbeats, args.checkpoints, storage, **kwargs)
+                    results['sessions'].append({'storage' : storage, 'history' : history, 'mode' : name, **result})
+                os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+"""
+Benchmark suite for logging and dashboard scaling
+
+Generates synthetic projects (100, 10k and 100k runs by default) with deep parent
+chains and large importance artefacts, then times DeepFlow construction, log_status
+throughput, log_artefact at several sizes, the dashboard import and overview layout,
+details.create_layout and the comparison page. Results are written as json so that runs can be compared
+over time
+
+    python benchmarks/suite.py --runs 100 10000 100000 --output results.json
+    python benchmarks/suite.py --quick
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+REPO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, REPO)
+
+from __init__ import DeepFlow
+from artefacts import save_importance, write_artefact
+from storage import RUNMASTER_COLUMNS, encode_param, open_runstore
+from workspace import WORKSPACE_ENV
+
+
+def timed(function, repeat=1):
+    """
+    Returns (seconds of the fastest call, result of the last call)
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def importance(features, rng):
+    return pd.DataFrame({
+        'Feature' : [f"feature_{i}" for i in range(features)],
+        'Importance' : rng.gamma(1, 1, features)
+    })
+
+
+def make_project(root, runs, storage, chain=1000, features=1000, importanceruns=20, seed=0):
+    """
+    Writes a synthetic project with `runs` runs into root/Artefacts, runs form parent
+    chains `chain` runs deep, the `importanceruns` best runs have an importance artefact
+    of `features` features. Returns the ExpID of the best run
+    """
+    rng = np.random.default_rng(seed)
+    overviewpath = os.path.join(root, "Artefacts", "Overview")
+    runstore = open_runstore(overviewpath, storage)
+
+    expids = np.arange(1, runs + 1)
+    parents = np.where((expids - 1) % chain == 0, np.nan, expids - 1)
+    scores = (np.abs(rng.normal(1, 0.2, runs)) - 0.5 * (expids % chain) / chain).round(4)
+    parentscores = np.concatenate([[np.nan], scores[:-1]])
+    parentscores[np.isnan(parents)] = np.nan
+    starttimes = pd.Timestamp("2021-01-01").value + expids.astype(np.int64) * 60 * 10**9
+    durations = rng.gamma(2, 300, runs).round(3)
+
+    best = np.argsort(scores, kind='stable')[:importanceruns]
+    artefactpaths = {}
+    for row in best:
+        exppath = os.path.join(root, "Artefacts", f"exp_{expids[row]} - run {expids[row]}")
+        os.makedirs(exppath, exist_ok=True)
+        imp = importance(features, rng)
+        with contextlib.redirect_stdout(io.StringIO()):
+            write_artefact(imp, exppath, 'importance')
+            write_artefact(pd.DataFrame({'Observations' : []}), exppath, 'observations')
+        save_importance(imp, exppath)
+        artefactpaths[int(expids[row])] = exppath
+
+    params = [
+        {'model' : ['LGB', 'XGB', 'CatBoost'][i % 3], 'learning_rate' : 0.01 * (1 + i % 10), 'Lagslist' : '1,2,3'}
+        for i in range(runs)
+    ]
+    for expid, path in artefactpaths.items():
+        params[expid - 1]['Artefacts'] = path
+
+    dfrunmaster = pd.DataFrame({
+        'ProjectName' : "Benchmark",
+        'ExpID' : expids,
+        'ParentID' : parents,
+        'Description' : [f"run {i}" for i in expids],
+        'StartTime' : starttimes,
+        'EndTime' : starttimes + (durations * 10**9).astype(np.int64),
+        'Duration' : durations,
+        'ScoreType' : "error",
+        'Metric' : "RMSE",
+        'Score' : scores,
+        'ParentScore' : parentscores,
+        'ImprovementParent' : (scores - parentscores).round(4),
+        'Benchmark' : 1.0,
+        'ImprovementBenchmark' : (scores - 1.0).round(4),
+        'Status' : "Completed",
+        'Params' : [json.dumps({key : str(value) for key, value in param.items()}) for param in params]
+    })[RUNMASTER_COLUMNS]
+
+    with runstore.lock:
+        runstore.save(dfrunmaster)
+        for expid, param in zip(expids, params):
+            runstore.saveparams(expid, {key : encode_param(value) for key, value in param.items()})
+    runstore.compact()
+
+    os.makedirs(os.path.join(root, "Artefacts", "Overview"), exist_ok=True)
+    for name in ('learnings', 'observations'):
+        pd.DataFrame({name.capitalize() : []}).to_csv(os.path.join(overviewpath, f"{name}.csv"), index=False)
+    return int(expids[best[0]])
+
+
+def bench_logging(root, parentid, heartbeats, artefactrows, formats):
+    """
+    Times DeepFlow construction, log_status throughput and log_artefact in a project
+    """
+    os.chdir(root)
+    results = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        seconds, flow = timed(lambda : DeepFlow(projectname="Benchmark", description=f"bench {time.time()}",
+            parentID=parentid))
+        results['construct_ms'] = round(1000 * seconds, 2)
+
+        start = time.perf_counter()
+        for _ in range(heartbeats):
+            flow.log_status(logmessage="HeartBeat")
+        elapsed = time.perf_counter() - start
+        results['log_status_per_s'] = round(heartbeats / elapsed, 1)
+        results['log_status_mean_ms'] = round(1000 * elapsed / heartbeats, 4)
+
+        rng = np.random.default_rng(0)
+        results['log_artefact_ms'] = {}
+        for rows in artefactrows:
+            artefact = pd.DataFrame({'id' : np.arange(rows), 'prediction' : rng.random(rows),
+                'fold' : rng.integers(0, 5, rows)})
+            for format in formats:
+                try:
+                    seconds, _ = timed(lambda : flow.log_artefact(artefact, f"predictions_{format}_{rows}", format))
+                except ImportError:
+                    continue
+                results['log_artefact_ms'][f"{format}_{rows}"] = round(1000 * seconds, 2)
+
+        flow.log_status("Completed")
+    return results
+
+
+def bench_dashboard_import():
+    """
+    Times a cold import of the dashboard in a new interpreter, the import must not read any data
+    """
+    command = [sys.executable, "-W", "ignore", "-c",
+        "import time; start = time.perf_counter(); import app; print(time.perf_counter() - start)"]
+    output = subprocess.run(command, cwd=REPO, capture_output=True, text=True)
+    if output.returncode != 0:
+        return None
+    return round(1000 * float(output.stdout.strip().splitlines()[-1]), 1)
+
+
+def bench_dashboard(root, bestexpid, repeat):
+    """
+    Times the overview layout, the first page of the detailed log, the experiment page
+    of the best run, cold (empty caches) and warm, and the comparison page with a search
+    of its experiment picker
+    """
+    import plotly
+    import app
+    from loaders import project_data
+    from pages import compare, details, overview
+
+    def encode(layout):
+        return len(json.dumps(layout, cls=plotly.utils.PlotlyJSONEncoder))
+
+    results = {}
+    projectdata = project_data(os.path.join(root, "Artefacts", "Overview"))
+    details.layoutcache.__init__(details.LAYOUT_CACHE_SIZE)
+
+    seconds, size = timed(lambda : encode(app.overview_pages(projectdata)))
+    results['overview_cold_ms'] = round(1000 * seconds, 1)
+    results['overview_bytes'] = size
+    seconds, _ = timed(lambda : encode(app.overview_pages(projectdata)), repeat)
+    results['overview_warm_ms'] = round(1000 * seconds, 1)
+
+    seconds, _ = timed(lambda : overview.detailed_log_query(projectdata, 0, 15, [{'column_id' : 'Score', 'direction' : 'asc'}],
+        "{Status} contains Comp"), repeat)
+    results['detailed_log_page_ms'] = round(1000 * seconds, 1)
+
+    seconds, size = timed(lambda : encode(details.create_layout(app.app, projectdata, bestexpid)), repeat)
+    results['details_create_layout_ms'] = round(1000 * seconds, 1)
+    results['details_bytes'] = size
+    seconds, _ = timed(lambda : details.experiment_layout(app.app, projectdata, bestexpid), repeat)
+    results['details_cached_ms'] = round(1000 * seconds, 2)
+
+    ### a heartbeat of a running run changes the runmaster files, the next experiment page opened
+    ### is built cold and must not read the whole runmaster again
+    runstore = open_runstore(projectdata.overviewpath)
+    def after_heartbeat():
+        row = runstore.getrow(bestexpid)
+        runstore.saverow([row[col] for col in RUNMASTER_COLUMNS])
+        details.layoutcache.__init__(details.LAYOUT_CACHE_SIZE)
+        start = time.perf_counter()
+        details.experiment_layout(app.app, projectdata, bestexpid)
+        return time.perf_counter() - start
+    results['details_after_heartbeat_ms'] = round(1000 * min(after_heartbeat() for _ in range(repeat)), 1)
+
+    seconds, size = timed(lambda : encode(compare.create_layout(app.app, projectdata, [1, bestexpid])), repeat)
+    results['compare_create_layout_ms'] = round(1000 * seconds, 1)
+    results['compare_bytes'] = size
+    seconds, _ = timed(lambda : compare.run_options(projectdata, "12"), repeat)
+    results['compare_search_ms'] = round(1000 * seconds, 1)
+    return results
+
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO,
+            capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = None
+    return {
+        'time' : datetime.now().isoformat(timespec='seconds'),
+        'commit' : commit,
+        'python' : platform.python_version(),
+        'pandas' : pd.__version__,
+        'numpy' : np.__version__,
+        'machine' : platform.machine(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--runs", type=int, nargs="*", default=[100, 10000, 100000])
+    parser.add_argument("--storage", nargs="*", default=["sqlite", "csv"], choices=["sqlite", "csv"])
+    parser.add_argument("--chain", type=int, default=1000, help="depth of the parent chains")
+    parser.add_argument("--features", type=int, default=1000, help="features of the importance artefacts")
+    parser.add_argument("--heartbeats", type=int, default=500, help="log_status calls timed per project")
+    parser.add_argument("--artefactrows", type=int, nargs="*", default=[1000, 100000, 1000000])
+    parser.add_argument("--formats", nargs="*", default=["csv", "parquet", "feather"])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--nodashboard", action="store_true", help="skip the dashboard benchmarks")
+    parser.add_argument("--quick", action="store_true", help="small sizes, for a smoke run")
+    parser.add_argument("--output", default=None, help="json file the results are written to")
+    args = parser.parse_args()
+
+    if args.quick:
+        args.runs, args.heartbeats, args.artefactrows = [100, 1000], 100, [1000, 10000]
+
+    report = {'environment' : environment(), 'settings' : vars(args), 'results' : []}
+    if not args.nodashboard:
+        report['dashboard_import_ms'] = bench_dashboard_import()
+
+    for storage in args.storage:
+        for runs in args.runs:
+            with tempfile.TemporaryDirectory() as root:
+                ### the benchmark projects are catalogued in their own workspace, not the user's
+                os.environ[WORKSPACE_ENV] = root
+                result = {'storage' : storage, 'runs' : runs}
+                seconds, bestexpid = timed(lambda : make_project(root, runs, storage, args.chain, args.features))
+                result['generate_s'] = round(seconds, 2)
+
+                if not args.nodashboard and report['dashboard_import_ms'] is not None:
+                    result['dashboard'] = bench_dashboard(root, bestexpid, args.repeat)
+                result['logging'] = bench_logging(root, bestexpid, args.heartbeats, args.artefactrows, args.formats)
+                os.chdir(REPO)
+
+            report['results'].append(result)
+            print(json.dumps(result), file=sys.stderr)
+
+    output = json.dumps(report, indent=2, default=str)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
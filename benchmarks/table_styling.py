@@ -0,0 +1,120 @@
+"""
+Benchmark of the detailed log conditional styling
+
+Compares the previous styling, where every bin of every column was a range
+filter_query evaluated by the browser on every cell, with the precomputed bins
+of utils.discrete_background_color_bins
+
+    python benchmarks/table_styling.py --rows 10000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from utils import discrete_background_color_bins
+
+COLUMNS = ['ImprovementParent', 'Score', 'ImprovementBenchmark']
+
+
+def range_rules(df, n_bins=5, columns='all'):
+    """
+    Styling as it was before the bins were precomputed, kept here as the baseline
+    """
+    import colorlover
+    bounds = [i * (1.0 / n_bins) for i in range(n_bins + 1)]
+    df_numeric_columns = df[columns]
+    df_max = df_numeric_columns.max().max()
+    df_min = df_numeric_columns.min().min()
+    ranges = [((df_max - df_min) * i) + df_min for i in bounds]
+    styles = []
+    for i in range(1, len(bounds)):
+        min_bound = ranges[i - 1]
+        max_bound = ranges[i]
+        backgroundColor = colorlover.scales[str(n_bins)]['seq']['Blues'][i - 1]
+        color = 'white' if i > len(bounds) / 2. else 'inherit'
+        for column in df_numeric_columns:
+            styles.append({
+                'if': {
+                    'filter_query': (
+                        '{{{column}}} >= {min_bound}' +
+                        (' && {{{column}}} < {max_bound}' if (i < len(bounds) - 1) else '')
+                    ).format(column=column, min_bound=min_bound, max_bound=max_bound),
+                    'column_id': column
+                },
+                'backgroundColor': backgroundColor,
+                'color': color
+            })
+    return styles
+
+
+def comparisons(styles, rows):
+    """
+    Number of comparisons the browser evaluates to style every cell of the table once
+    """
+    return rows * sum(rule['if']['filter_query'].count('{') for rule in styles)
+
+
+def run_baseline(df):
+    styles = []
+    for col in COLUMNS:
+        styles += range_rules(df, columns=[col])
+    return df.to_dict('records'), styles
+
+
+def run_binned(df):
+    styles = []
+    dftable = df
+    for col in COLUMNS:
+        colstyles, _, bins = discrete_background_color_bins(df, columns=[col])
+        styles += colstyles
+        dftable = pd.concat([dftable, bins], axis=1)
+    return dftable.to_dict('records'), styles
+
+
+def measure(name, function, df, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        data, styles = function(df)
+        timings.append(time.perf_counter() - start)
+
+    return {
+        'name' : name,
+        'server_ms' : round(1000 * min(timings), 2),
+        'rules' : len(styles),
+        'style_bytes' : len(json.dumps(styles)),
+        'payload_bytes' : len(json.dumps({'data' : data, 'styles' : styles}, default=str)),
+        'client_comparisons' : comparisons(styles, df.shape[0])
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        'ExpID' : np.arange(1, args.rows + 1),
+        'Score' : rng.normal(1, 0.2, args.rows).round(4),
+        'ImprovementParent' : rng.normal(0, 0.05, args.rows).round(4),
+        'ImprovementBenchmark' : rng.normal(0, 0.1, args.rows).round(4)
+    })
+
+    results = [
+        measure('range rules', run_baseline, df, args.repeat),
+        measure('precomputed bins', run_binned, df, args.repeat)
+    ]
+    print(json.dumps({'rows' : args.rows, 'results' : results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+Content-addressed store of the artefacts of a project
+
+    python blobs.py gc <project root> [--grace 3600] [--dryrun]
+    python blobs.py du <project root>
+"""
+import argparse
+import glob
+import hashlib
+import json
+import os
+import threading
+import time
+
+import pandas as pd
+
+### rows of an artefact hashed at once, bounds the memory used to hash large frames
+HASH_CHUNK_ROWS = 1000000
+
+### bytes read at once when hashing a serialized artefact
+HASH_CHUNK_BYTES = 1024 * 1024
+
+
+def frame_digest(artefact, format, compression, chunkrows=HASH_CHUNK_ROWS):
+    """
+    sha256 of the content of a dataframe and the format it is saved in, computed from the
+    row hashes of pandas chunk by chunk so the frame is never serialized to be hashed.
+    The index is not part of the digest since artefacts are saved without it
+    """
+    digest = hashlib.sha256(json.dumps([
+        format, compression, [str(col) for col in artefact.columns], [str(dtype) for dtype in artefact.dtypes]
+    ]).encode())
+    for start in range(0, artefact.shape[0], chunkrows):
+        rows = pd.util.hash_pandas_object(artefact.iloc[start:start + chunkrows], index=False)
+        digest.update(rows.to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def file_digest(path, chunkbytes=HASH_CHUNK_BYTES):
+    """
+    sha256 of a file, read in chunks
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda : f.read(chunkbytes), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class BlobStore():
+    """
+    Content-addressed store shared by the experiments of a project. Every artefact is saved
+    once as Artefacts/Blobs/<2 characters>/<digest><extension>, and the <name>.meta.json sidecar
+    in the folder of each experiment logging it points to the blob, so re-logging the artefact of
+    a parent neither serializes nor writes it again. Blobs no sidecar points to are removed by gc()
+
+    Attributes
+    ----------
+    blobpath (str) : path of the Artefacts/Blobs folder of the project
+    """
+    def __init__(self, blobpath):
+        self.blobpath = blobpath
+
+    def path(self, digest, extension):
+        return os.path.join(self.blobpath, digest[:2], digest + extension)
+
+    def put(self, artefact, format, serializer):
+        """
+        Saves an artefact unless a blob with the same content exists, returns
+        (path of the blob, digest, True if the blob was written)
+
+        Parameters
+        ----------
+            artefact (pandas.DataFrame) : the artefact
+            format (str)                : format of the blob, eg: 'csv'
+            serializer (object)         : serializer of the format, see artefacts.get_serializer
+        """
+        try:
+            digest = frame_digest(artefact, format, serializer.compression)
+        except TypeError:
+            ### cells pandas cannot hash (eg: lists) are hashed from the serialized file
+            digest = None
+
+        if digest is not None:
+            path = self.path(digest, serializer.extension)
+            if os.path.exists(path):
+                ### a recent mtime protects the blob from a gc running at the same time
+                os.utime(path)
+                return path, digest, False
+
+        os.makedirs(self.blobpath, exist_ok=True)
+        tmpfile = os.path.join(self.blobpath, f"{os.getpid()}-{threading.get_ident()}.tmp")
+        serializer.write(artefact, tmpfile)
+        if digest is None:
+            digest = file_digest(tmpfile)
+            path = self.path(digest, serializer.extension)
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(tmpfile, path)
+        return path, digest, True
+
+    def blobs(self):
+        """
+        Returns the path of every blob of the store
+        """
+        return glob.glob(os.path.join(self.blobpath, "??", "*"))
+
+    def references(self, artefactspath):
+        """
+        Returns the blobs pointed to by the sidecars of the experiments, path -> number of references
+
+        Parameters
+        ----------
+            artefactspath (str) : path of the Artefacts folder of the project
+        """
+        references = {}
+        for sidecar in glob.glob(os.path.join(artefactspath, "*", "*.meta.json")):
+            try:
+                with open(sidecar, "r") as f:
+                    metadata = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if 'blob' in metadata:
+                path = os.path.normpath(os.path.join(os.path.dirname(sidecar), metadata['file']))
+                references[path] = references.get(path, 0) + 1
+        return references
+
+    def usage(self, artefactspath):
+        """
+        Returns the number and size of the blobs, and the size the artefacts would take without deduplication
+        """
+        references = self.references(artefactspath)
+        sizes = {os.path.normpath(path) : os.path.getsize(path) for path in self.blobs()}
+        return {
+            'blobs' : len(sizes),
+            'references' : sum(references.values()),
+            'bytes' : sum(sizes.values()),
+            'logical_bytes' : sum(sizes.get(path, 0) * count for path, count in references.items()),
+            'unreferenced' : len(set(sizes) - set(references))
+        }
+
+    def gc(self, artefactspath, grace=3600, dryrun=False):
+        """
+        Removes the blobs no experiment points to, blobs written or reused in the last
+        `grace` seconds are kept since the run logging them may not have saved its sidecar yet
+
+        Parameters
+        ----------
+            artefactspath (str) : path of the Artefacts folder of the project
+            grace (float)       : (Optional) age in seconds below which blobs are kept
+            dryrun (bool)       : (Optional) only report what would be removed
+        """
+        references = self.references(artefactspath)
+        cutoff = time.time() - grace
+        removed, freed = 0, 0
+        for path in self.blobs():
+            stat = os.stat(path)
+            if os.path.normpath(path) in references or stat.st_mtime > cutoff:
+                continue
+            if not dryrun:
+                os.remove(path)
+            removed += 1
+            freed += stat.st_size
+        return {'removed' : removed, 'freed_bytes' : freed, 'dryrun' : dryrun}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("command", choices=["gc", "du"])
+    parser.add_argument("root", nargs="?", default=os.getcwd(), help="project root, the folder holding Artefacts/")
+    parser.add_argument("--grace", type=float, default=3600, help="seconds during which new blobs are kept")
+    parser.add_argument("--dryrun", action="store_true", help="only report the blobs gc would remove")
+    args = parser.parse_args()
+
+    artefactspath = os.path.join(args.root, "Artefacts")
+    blobstore = BlobStore(os.path.join(artefactspath, "Blobs"))
+    if args.command == "gc":
+        print(json.dumps(blobstore.gc(artefactspath, args.grace, args.dryrun), indent=2))
+    else:
+        print(json.dumps(blobstore.usage(artefactspath), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+
+from storage import to_seconds
+
+
+def importance_matrix(vectors):
+    """
+    Aligns the importance vectors of several runs into one matrix
+
+    Parameters
+    ----------
+        vectors (list) : (features, importance) tuples, None for runs without importance
+
+    Returns
+    -------
+        features (numpy.ndarray)    : union of the features of all runs
+        matrix (numpy.ndarray)      : runs x features importance, 0 where a run does not use a feature
+    """
+    present = [vector for vector in vectors if vector is not None]
+    if len(present) == 0:
+        return np.asarray([], dtype=str), np.zeros((len(vectors), 0))
+
+    codes, features = pd.factorize(np.concatenate([features for features, _ in present]))
+    lengths = np.asarray([len(vector[0]) if vector is not None else 0 for vector in vectors])
+    rows = np.repeat(np.arange(len(vectors)), lengths)
+
+    matrix = np.zeros((len(vectors), len(features)))
+    np.add.at(matrix, (rows, codes), np.concatenate([values for _, values in present]))
+    return np.asarray(features), matrix
+
+
+def rank_correlations(matrix):
+    """
+    Spearman correlation of the feature rankings of every pair of runs, computed at once
+    as the Pearson correlation of the rank matrix. Runs with constant importance get NaN
+
+    Parameters
+    ----------
+        matrix (numpy.ndarray) : runs x features importance, see importance_matrix
+    """
+    if matrix.shape[1] < 2:
+        return np.full((matrix.shape[0], matrix.shape[0]), np.nan)
+
+    ranks = pd.DataFrame(matrix).rank(axis=1).to_numpy()
+    ranks = ranks - ranks.mean(axis=1, keepdims=True)
+    norms = np.sqrt((ranks ** 2).sum(axis=1))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return (ranks @ ranks.T) / np.outer(norms, norms)
+
+
+def diff_params(params, expids, onlychanged=True):
+    """
+    Returns a param x run table of the params of several runs
+
+    Parameters
+    ----------
+        params (list)       : param dictionaries of the runs
+        expids (list)       : ExpIDs of the runs, used as column names
+        onlychanged (bool)  : (Optional) only keep the params which differ between runs
+    """
+    dfparams = pd.DataFrame([{key : str(value) for key, value in param.items()} for param in params],
+        index=expids).T
+    dfparams = dfparams.drop(index=['Artefacts'], errors='ignore')
+    if onlychanged and dfparams.shape[1] > 0:
+        dfparams = dfparams[dfparams.nunique(axis=1, dropna=False) > 1]
+    dfparams.index.name = 'Param'
+    return dfparams
+
+
+def diff_scores(dfruns):
+    """
+    Returns the score and duration of the runs, with their difference to the first run
+
+    Parameters
+    ----------
+        dfruns (pandas.DataFrame) : runmaster rows of the runs, in the order they are compared
+    """
+    score = pd.to_numeric(dfruns['Score'], errors='coerce').to_numpy(dtype=float)
+    duration = to_seconds(dfruns['Duration']).to_numpy()
+    return pd.DataFrame({
+        'ExpID' : dfruns['ExpID'].to_numpy(),
+        'Description' : dfruns['Description'].to_numpy(),
+        'Metric' : dfruns['Metric'].to_numpy(),
+        'Score' : score,
+        'ScoreDiff' : (score - score[0]).round(4),
+        'DurationSeconds' : duration,
+        'DurationDiff' : duration - duration[0]
+    })
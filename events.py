@@ -0,0 +1,157 @@
+import json
+import os
+
+### the event log is rotated to events.jsonl.1 by the first run started after it grows beyond this
+EVENTS_MAX_BYTES = 16 * 1024 * 1024
+
+### heartbeats repeating the status and message of the last event are sent at most this often, in seconds
+EVENT_INTERVAL = 1.0
+
+LIVE_COLUMNS = ['ExpID', 'Description', 'Status', 'Message', 'Metric', 'Score', 'StartTime', 'LogTime']
+
+
+class EventLog():
+    """
+    Append-only log of the live events of the runs of a project (start, status, score, end),
+    one json line per event in Artefacts/Overview/events.jsonl. Every event is appended with a
+    single write to a file opened in append mode, so parallel runs can share the log and a
+    reader never sees two events interleaved
+
+    Attributes
+    ----------
+    eventfile (str) : path of the event log
+    """
+    def __init__(self, eventfile):
+        self.eventfile = eventfile
+
+    def emit(self, event):
+        """
+        Appends an event, returns the number of bytes written
+
+        Parameters
+        ----------
+            event (dict) : fields of the event, eg: {'Event' : 'status', 'ExpID' : 3, 'Status' : 'Running'}
+        """
+        line = (json.dumps(event, separators=(",", ":"), default=str) + "\n").encode()
+        fd = os.open(self.eventfile, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line)
+        finally:
+            os.close(fd)
+        return len(line)
+
+    def rotate(self, maxbytes=EVENTS_MAX_BYTES):
+        """
+        Moves the log to events.jsonl.1 once it is larger than `maxbytes`, readers finish
+        the rotated log before moving on to the new one
+        """
+        try:
+            if os.path.getsize(self.eventfile) > maxbytes:
+                os.replace(self.eventfile, self.eventfile + ".1")
+        except FileNotFoundError:
+            pass
+
+
+class EventTail():
+    """
+    Reader of an event log which only reads the bytes appended since its last read. The first
+    read starts at the end of the log, so the cost of a read is proportional to the new events
+    and not to the history of the project. A partially written last line is kept for the next read
+
+    Attributes
+    ----------
+    eventfile (str) : path of the event log
+    """
+    def __init__(self, eventfile):
+        self.eventfile = eventfile
+        self.inode = None
+        self.offset = None
+        self.partial = b""
+
+    def read(self):
+        """
+        Returns the events appended since the last read
+        """
+        try:
+            stat = os.stat(self.eventfile)
+        except FileNotFoundError:
+            ### the events of a log created later are all new
+            self.offset = 0
+            return []
+
+        if self.offset is None:
+            self.inode, self.offset = stat.st_ino, stat.st_size
+            return []
+
+        data = b""
+        if stat.st_ino != self.inode or stat.st_size < self.offset:
+            ### the log was rotated, the end of the previous log is read before the new one
+            data = self._readrotated()
+            self.inode, self.offset, self.partial = stat.st_ino, 0, b""
+
+        if stat.st_size > self.offset:
+            with open(self.eventfile, "rb") as f:
+                f.seek(self.offset)
+                data += f.read(stat.st_size - self.offset)
+            self.offset = stat.st_size
+
+        lines = (self.partial + data).split(b"\n")
+        self.partial = lines.pop()
+        return [json.loads(line) for line in lines if line]
+
+    def _readrotated(self):
+        rotated = self.eventfile + ".1"
+        try:
+            if os.stat(rotated).st_ino != self.inode:
+                return b""
+            with open(rotated, "rb") as f:
+                f.seek(self.offset)
+                data = self.partial + f.read()
+        except FileNotFoundError:
+            return b""
+        return data if data.endswith(b"\n") else data + b"\n"
+
+
+class LiveRuns():
+    """
+    Latest state of the running runs of a project, kept up to date from their events.
+    Runs are dropped once their end event is read. version is increased by every change,
+    so that each reader can tell whether the state changed since it last looked
+    """
+    def __init__(self):
+        self.runs = {}
+        self.version = 0
+
+    def bootstrap(self, dfrunning):
+        """
+        Starts from the runs marked Running in the run store, for runs started before the
+        dashboard began reading the event log
+        """
+        for run in dfrunning.to_dict('records'):
+            self.runs[int(run['ExpID'])] = {col : run.get(col) for col in LIVE_COLUMNS if col != 'Message'}
+        self.version += 1
+
+    def apply(self, events):
+        """
+        Applies new events, returns True if any running run changed
+        """
+        for event in events:
+            expid = event.get('ExpID')
+            if event.get('Event') == 'end':
+                self.runs.pop(expid, None)
+                continue
+            run = self.runs.setdefault(expid, {'ExpID' : expid})
+            run.update({col : event[col] for col in LIVE_COLUMNS if col in event})
+            run['LogTime'] = event.get('Time')
+        if len(events):
+            self.version += 1
+        return len(events) > 0
+
+    def frame(self):
+        """
+        Returns the running runs, the most recently started first
+        """
+        import pandas as pd
+
+        dfrunning = pd.DataFrame(list(self.runs.values()), columns=LIVE_COLUMNS)
+        return dfrunning.sort_values(by='ExpID', ascending=False)
@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+
+
+class LineageIndex():
+    """
+    Index over the parent links of the experiments in a runmaster. Holds an
+    ExpID -> row map, a parent pointer array and the children of every row
+    (in CSR layout), so ancestor chains, descendant subtrees and the best run
+    per metric are computed in time linear in the size of the answer or the
+    runmaster, instead of scanning the runmaster once per step
+
+    Attributes
+    ----------
+    dfrunmaster (pandas.DataFrame) : runmaster with at least ExpID and ParentID columns
+    """
+    def __init__(self, dfrunmaster):
+        self.dfrunmaster = dfrunmaster
+        self.expids = dfrunmaster['ExpID'].to_numpy(dtype=np.int64)
+        self.rows = pd.Index(self.expids)
+
+        ### parent[i] is the row of the parent of row i, -1 for runs from scratch
+        parentids = pd.to_numeric(dfrunmaster['ParentID'], errors='coerce').to_numpy(dtype=float)
+        self.parent = self.rows.get_indexer(parentids).astype(np.int64)
+
+        ### children of row i are childrows[childstart[i]:childstart[i + 1]]
+        haveparent = np.flatnonzero(self.parent >= 0)
+        order = np.argsort(self.parent[haveparent], kind='stable')
+        self.childrows = haveparent[order]
+        counts = np.bincount(self.parent[haveparent], minlength=len(self.expids))
+        self.childstart = np.concatenate([[0], np.cumsum(counts)])
+
+    def __len__(self):
+        return len(self.expids)
+
+    def row(self, expid):
+        """
+        Returns the row of an experiment in the runmaster, -1 if it does not exist
+        """
+        return int(self.rows.get_indexer([expid])[0])
+
+    def ancestors(self, expid, include_self=True):
+        """
+        Returns the ExpIDs from the experiment up to the run it started from scratch
+        """
+        row = self.row(expid)
+        chain = []
+        while row >= 0 and len(chain) <= len(self.expids):
+            chain.append(row)
+            row = self.parent[row]
+
+        if not include_self:
+            chain = chain[1:]
+        return self.expids[chain].tolist()
+
+    def descendants(self, expid, include_self=True):
+        """
+        Returns the ExpIDs of every experiment derived from the experiment, breadth first
+        """
+        row = self.row(expid)
+        if row < 0:
+            return []
+
+        subtree = [row]
+        seen = np.zeros(len(self.expids), dtype=bool)
+        seen[row] = True
+        position = 0
+        while position < len(subtree):
+            current = subtree[position]
+            for child in self.childrows[self.childstart[current]:self.childstart[current + 1]]:
+                if not seen[child]:
+                    seen[child] = True
+                    subtree.append(child)
+            position += 1
+
+        if not include_self:
+            subtree = subtree[1:]
+        return self.expids[subtree].tolist()
+
+    def mask(self, expids):
+        """
+        Returns a boolean array over the runmaster rows, True for the given ExpIDs
+        """
+        mask = np.zeros(len(self.expids), dtype=bool)
+        rows = self.rows.get_indexer(list(expids))
+        mask[rows[rows >= 0]] = True
+        return mask
+
+    def best_runs(self):
+        """
+        Returns the ExpID of the best run of every metric, the lowest score for errors
+        and the highest score for accuracies
+        """
+        dfscores = self.dfrunmaster[['ExpID', 'Metric', 'ScoreType', 'Score']].dropna(subset=['Metric', 'Score'])
+        if dfscores.shape[0] == 0:
+            return {}
+
+        ### negate accuracies so that the best run of every metric is the lowest value
+        accuracy = dfscores['ScoreType'].astype(str).str.lower() == 'accuracy'
+        key = np.where(accuracy, -dfscores['Score'], dfscores['Score'])
+        best = dfscores.assign(key=key).sort_values('key', kind='stable').drop_duplicates('Metric')
+        return dict(zip(best['Metric'], best['ExpID'].astype(np.int64).tolist()))
@@ -0,0 +1,449 @@
+import os
+import re
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from artefacts import artefact_files, load_importance, merge_importance, read_metadata, sample_artefact
+from comparison import diff_params, diff_scores, importance_matrix, rank_correlations
+from events import EventTail, LiveRuns
+from lineage import LineageIndex
+from metrics import downsample_curves, read_metrics
+from storage import file_signature, open_runstore, params_dict
+from workspace import PROJECT_COLUMNS, Workspace, default_catalog
+
+METRIC_COLUMNS = ['Score', 'ParentScore', 'ImprovementParent',
+                  'Benchmark', 'ImprovementBenchmark']
+
+### operators of the DataTable filter syntax, and the run store operator they map to
+FILTER_OPERATORS = {
+    'ge' : '>=', '>=' : '>=', 'le' : '<=', '<=' : '<=', 'lt' : '<', '<' : '<',
+    'gt' : '>', '>' : '>', 'ne' : '!=', '!=' : '!=', 'eq' : '=', '=' : '=',
+    'contains' : 'contains', 'datestartswith' : 'datestartswith'
+}
+
+### Artefacts/Overview folder of the project shown by pages without a /project/<ProjectID> prefix
+DEFAULT_OVERVIEWPATH = "../Artefacts/Overview"
+
+### projects whose parsed data is kept in memory, the least recently used is dropped first
+PROJECTS_KEPT = 8
+
+FILTER_PART = re.compile(
+    r"^\{(?P<column>[^}]+)\}\s*(?:s|i)?(?P<operator>>=|<=|!=|=|<|>|ge|le|lt|gt|ne|eq|contains|datestartswith)\s+(?P<value>.+)$"
+)
+
+
+class FileCache():
+    """
+    Cache of values computed from files, a value is recomputed only when the
+    mtime or size of one of the files it was computed from changes
+    """
+    def __init__(self):
+        self.entries = {}
+
+    def get(self, key, paths, loader):
+        """
+        Parameters
+        ----------
+            key (hashable)      : cache key of the value
+            paths (list)        : files the value is computed from
+            loader (callable)   : function without arguments computing the value
+        """
+        signature = file_signature(paths)
+        entry = self.entries.get(key)
+        if entry is not None and entry[0] == signature:
+            return entry[1]
+
+        value = loader()
+        self.entries[key] = (signature, value)
+        return value
+
+
+def folder_signature(folder):
+    """
+    Returns (name, mtime, size) of every file of a folder, changes whenever a file
+    of the folder is added, removed or rewritten
+    """
+    if folder is None or not os.path.isdir(folder):
+        return None
+    signature = []
+    with os.scandir(folder) as entries:
+        for entry in entries:
+            stat = entry.stat()
+            signature.append((entry.name, stat.st_mtime_ns, stat.st_size))
+    return tuple(sorted(signature))
+
+
+class LRUCache():
+    """
+    Cache holding at most `maxsize` values, the least recently used value is dropped
+    first. Every value is stored with a signature of what it was computed from and is
+    recomputed when the signature changes
+
+    Attributes
+    ----------
+    maxsize (int) : (Optional) number of values kept
+    """
+    def __init__(self, maxsize=64):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key, signature, loader):
+        """
+        Parameters
+        ----------
+            key (hashable)          : cache key of the value
+            signature (hashable)    : the value is recomputed when it differs from the cached one
+            loader (callable)       : function without arguments computing the value
+        """
+        entry = self.entries.get(key)
+        if entry is not None and entry[0] == signature:
+            self.entries.move_to_end(key)
+            return entry[1]
+
+        value = loader()
+        self.entries[key] = (signature, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+        return value
+
+
+class ProjectData():
+    """
+    Lazy access to the data of one project shown on the dashboard. Nothing is read
+    until a page asks for it, parsed frames are cached and only re-read when the
+    underlying files change, so new runs show up without restarting the app. Use
+    project_data to get the shared instance of a project
+
+    Attributes
+    ----------
+    overviewpath (str)  : (Optional) path of the Artefacts/Overview folder of the project
+
+    bestmetric (str)    : (Optional) metric used to find the best run, defaults to the metric
+        most runs were scored on
+    """
+    def __init__(self, overviewpath=DEFAULT_OVERVIEWPATH, bestmetric=None):
+        self.overviewpath = overviewpath
+        self.bestmetric = bestmetric
+        self.cache = FileCache()
+        ### values computed from the runmaster, recomputed when the version of the run store changes
+        self.runcache = LRUCache()
+        self._runstore = None
+        self.live = None
+        self.livelock = threading.Lock()
+
+    @property
+    def runstore(self):
+        if self._runstore is None:
+            self._runstore = open_runstore(self.overviewpath, readonly=True)
+        return self._runstore
+
+    def unavailable(self):
+        """
+        Returns why the runmaster of the project cannot be shown, eg: 'No runmaster at <path>', None
+        when it can. The run store is opened read-only, the dashboard never creates or migrates it
+        """
+        try:
+            self.runstore
+        except (FileNotFoundError, AssertionError) as e:
+            return str(e)
+        return None
+
+    def version(self):
+        """
+        Cheap token which changes whenever a run of the runmaster is saved, see the version of the
+        run stores, heartbeats which only write logs leave it unchanged. None while the project has
+        no runmaster
+        """
+        if self.unavailable() is not None:
+            return None
+        return str(self.runstore.version())
+
+    def runmaster(self):
+        """
+        Returns the runmaster with rounded scores and the Chosen flag for runs on the
+        road to the best model
+        """
+        return self.runcache.get('runmaster', self.version(), self._loadrunmaster)
+
+    def _loadrunmaster(self):
+        dfrunmaster = self.runstore.read()
+
+        for col in METRIC_COLUMNS:
+            dfrunmaster[col] = dfrunmaster[col].apply(lambda x : round(x, 4))
+
+        # ### find series of changes used in best run
+        lineage = LineageIndex(dfrunmaster)
+        bestmetric = self.bestmetric
+        if bestmetric is None:
+            metrics = dfrunmaster['Metric'].dropna().value_counts()
+            bestmetric = metrics.index[0] if len(metrics) else None
+        bestexp = lineage.best_runs().get(bestmetric)
+        bestruns = lineage.ancestors(bestexp) if bestexp is not None else []
+
+        dfrunmaster['Chosen'] = lineage.mask(bestruns).astype(int)
+        return dfrunmaster
+
+    def lineage(self):
+        """
+        Returns the LineageIndex of the runmaster, shared by every page
+        """
+        return self.runcache.get('lineage', self.version(), lambda : LineageIndex(self.runmaster()))
+
+    def liveruns(self):
+        """
+        Returns (version, running runs), the runs are kept up to date from the events appended
+        to the event log of the project since the last call, see events.EventTail. The state is
+        shared by every client, each one compares the version with the one it last rendered
+        """
+        with self.livelock:
+            if self.live is None:
+                tail, runs = EventTail(os.path.join(self.overviewpath, "events.jsonl")), LiveRuns()
+                tail.read()
+                runs.bootstrap(self.runstore.query(Status='Running') if self.runstore.exists() else pd.DataFrame())
+                self.live = (tail, runs)
+            else:
+                tail, runs = self.live
+                runs.apply(tail.read())
+            return runs.version, runs.frame()
+
+    def projectname(self):
+        projectnames = self.runmaster()['ProjectName'].dropna()
+        return projectnames.iloc[0] if len(projectnames) else ""
+
+    def importance(self, exppath):
+        """
+        Returns the normalized feature importance of an experiment, None if the
+        experiment did not save an importance artefact
+
+        Parameters
+        ----------
+            exppath (str) : artefact folder of the experiment
+        """
+        vector = self.importancevector(exppath)
+        if vector is None:
+            return None
+        return pd.DataFrame({'feature' : vector[0], 'importance' : vector[1]})
+
+    def importancevector(self, exppath):
+        """
+        Returns the cached (features, importance) vector of an experiment, see artefacts.load_importance
+        """
+        return self.cache.get(('importance', exppath),
+            [f"{exppath}/importance.npz"] + artefact_files(exppath, 'importance'),
+            lambda : load_importance(exppath))
+
+    def artefacts(self, expid):
+        """
+        Returns the artefacts saved by a run with their rows and size, the latest save of each name
+        """
+        dfartefacts = self.runstore.readartefacts(expid)
+        return dfartefacts.drop_duplicates(subset='Name', keep='last').reset_index(drop=True)
+
+    def artefactsample(self, exppath, name, rows=10):
+        """
+        Returns (sidecar metadata, uniform sample of `rows` rows) of an artefact, see artefacts.sample_artefact,
+        artefacts logged in chunks are sampled without being read whole
+        """
+        return self.cache.get(('artefactsample', exppath, name, rows), artefact_files(exppath, name),
+            lambda : (read_metadata(exppath, name), sample_artefact(exppath, name, rows)))
+
+    def metriccurves(self, exppath, maxpoints=2000, method="lttb"):
+        """
+        Returns the downsampled metric curves of an experiment, see metrics.downsample_curves,
+        an empty dict if the experiment did not log metrics
+        """
+        paths = [f"{exppath}/metrics.bin", f"{exppath}/metrics.json"]
+        return self.cache.get(('metriccurves', exppath, maxpoints, method), paths,
+            lambda : downsample_curves(read_metrics(exppath), maxpoints, method)
+                if os.path.exists(paths[0]) else {})
+
+    def params(self, expid):
+        """
+        Returns the params of a run as a dictionary of typed values, read from the params table
+        """
+        return self.runstore.getparams(expid)
+
+    def artefactpaths(self):
+        """
+        Returns the artefact folder of every run which saved artefacts, ExpID -> path
+        """
+        def load():
+            dfpaths = self.runstore.readparams(keys=['Artefacts'])
+            return dict(zip(dfpaths['ExpID'].astype(int), dfpaths['Value']))
+        return self.runcache.get('artefactpaths', self.version(), load)
+
+    def chosen(self):
+        """
+        Returns the ExpIDs on the road to the best model. The sqlite store finds them with a few
+        index lookups, see SQLiteRunStore.bestchain, so that a heartbeat of a running run, which
+        changes the database, does not read the whole runmaster again
+        """
+        if self.runstore.backend == "sqlite":
+            return self.runstore.bestchain(self.bestmetric)
+        dfrunmaster = self.runmaster()
+        return dfrunmaster.loc[dfrunmaster.Chosen==1, 'ExpID'].tolist()
+
+    def columnranges(self, columns):
+        """
+        Returns the (min, max) of the columns over all runs, computed by the run store
+        """
+        return self.runcache.get(('ranges', tuple(columns)), self.version(),
+            lambda : self.runstore.ranges(columns))
+
+    def topfeatures(self, topruns=5):
+        """
+        Returns the top 10 features across the top runs, and the number of runs
+        they were aggregated over
+
+        Parameters
+        ----------
+            topruns (int) : (Optional) number of best scoring runs to aggregate
+        """
+        ### TODO : Sort values based on Acc/Error col in runmaster
+        dfrunmaster = self.runmaster()
+        topruns = dfrunmaster.sort_values(by='Score').head(topruns)['ExpID']
+        artefactpaths = self.artefactpaths()
+
+        vectors = []
+        for expid in topruns:
+            vector = self.importancevector(artefactpaths[expid]) if expid in artefactpaths else None
+            if vector is not None:
+                vectors.append(vector)
+
+        return merge_importance(vectors), len(vectors)
+
+    def compare(self, expids, topfeatures=20):
+        """
+        Compares several runs, returns a dictionary with
+            'runs'          : scores and durations, and their difference to the first run
+            'params'        : the params which differ between the runs
+            'features'      : the top features by mean importance over the runs
+            'importance'    : runs x top features importance matrix
+            'correlation'   : runs x runs Spearman correlation of the feature rankings
+
+        Parameters
+        ----------
+            expids (list)       : ExpIDs of the runs, the first one is the reference, unknown ExpIDs are skipped
+            topfeatures (int)   : (Optional) number of features returned in the importance matrix
+        """
+        dfrunmaster = self.runmaster()
+        rows = self.lineage().rows.get_indexer([int(expid) for expid in expids])
+        dfruns = dfrunmaster.iloc[rows[rows >= 0]]
+        if dfruns.shape[0] == 0:
+            return None
+
+        dfparams = self.runstore.readparams(dfruns['ExpID'])
+        params = [params_dict(dfparams[dfparams.ExpID == expid]) for expid in dfruns['ExpID']]
+        vectors = [self.importancevector(param['Artefacts']) if 'Artefacts' in param else None
+            for param in params]
+        features, matrix = importance_matrix(vectors)
+        top = np.argsort(-matrix.mean(axis=0), kind='stable')[:topfeatures]
+
+        return {
+            'runs' : diff_scores(dfruns),
+            'params' : diff_params(params, dfruns['ExpID'].tolist()),
+            'features' : features[top],
+            'importance' : matrix[:, top],
+            'correlation' : rank_correlations(matrix)
+        }
+
+
+class WorkspaceData():
+    """
+    Lazy access to the workspace catalog listing the projects, see workspace.Workspace.
+    The list is cached until the catalog changes, projects whose folder no longer exists
+    are hidden but left in the catalog
+
+    Attributes
+    ----------
+    catalogfile (str) : (Optional) path of the catalog, defaults to workspace.default_catalog()
+    """
+    def __init__(self, catalogfile=None):
+        self.catalogfile = catalogfile or default_catalog()
+        self.cache = FileCache()
+        self._catalog = None
+
+    @property
+    def catalog(self):
+        if self._catalog is None:
+            self._catalog = Workspace(self.catalogfile)
+        return self._catalog
+
+    def catalogfiles(self):
+        return [self.catalogfile, self.catalogfile + "-wal"]
+
+    def projects(self):
+        """
+        Returns the projects of the workspace with their run counts, best scores and last
+        activity, an empty frame when no catalog exists
+        """
+        if not os.path.exists(self.catalogfile):
+            return pd.DataFrame(columns=PROJECT_COLUMNS + ['BestScores'])
+        return self.cache.get('projects', self.catalogfiles(), self.catalog.summary)
+
+    def overviewpath(self, projectid):
+        """
+        Returns the Artefacts/Overview folder of a project of the catalog, None if it is not in the catalog
+        """
+        if not os.path.exists(self.catalogfile):
+            return None
+        project = self.catalog.project(projectid)
+        return None if project is None else os.path.join(project['Root'], "Artefacts", "Overview")
+
+
+def parse_filter_query(filter_query):
+    """
+    Translates the filter_query of a DataTable ('{Score} >= 1 && {Status} contains Fail')
+    into (column, operator, value) conditions for the run store
+    """
+    conditions = []
+    for part in (filter_query or "").split(" && "):
+        match = FILTER_PART.match(part.strip())
+        if match is None:
+            continue
+
+        value = match.group('value').strip()
+        if len(value) > 1 and value[0] == value[-1] and value[0] in "'\"`":
+            value = value[1:-1]
+        else:
+            try:
+                value = float(value)
+            except ValueError:
+                pass
+        conditions.append((match.group('column'), FILTER_OPERATORS[match.group('operator')], value))
+    return conditions
+
+
+projects = OrderedDict()
+
+projectslock = threading.Lock()
+
+
+def project_data(overviewpath=DEFAULT_OVERVIEWPATH):
+    """
+    Returns the ProjectData of a project, created on first use and shared by every request
+    for the project. Requests for different projects never share state, the data of the
+    PROJECTS_KEPT most recently used projects is kept in memory
+
+    Parameters
+    ----------
+        overviewpath (str) : (Optional) path of the Artefacts/Overview folder of the project
+    """
+    with projectslock:
+        projectdata = projects.get(overviewpath)
+        if projectdata is None:
+            projectdata = projects[overviewpath] = ProjectData(overviewpath)
+        projects.move_to_end(overviewpath)
+        while len(projects) > PROJECTS_KEPT:
+            projects.popitem(last=False)
+        return projectdata
+
+
+workspacedata = WorkspaceData()
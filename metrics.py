@@ -0,0 +1,249 @@
+import json
+import os
+import time
+
+import numpy as np
+
+### metric curves of an experiment are saved as chunks appended to metrics.bin, every chunk
+### holds one .npy array per column, the metric names are kept in metrics.json
+METRIC_FIELDS = [('metric', np.int32), ('step', np.int64), ('value', np.float64), ('time', np.float64)]
+
+# Seconds a buffered value may wait before the buffer is written, even if it is not full
+METRIC_FLUSH_SECONDS = 5
+
+
+class MetricBuffer():
+    """
+    Preallocated buffer of the metric values logged by a run. Values are appended
+    to fixed size numpy arrays, one per column, and taken out as a chunk once the
+    buffer is full or its oldest value has waited flushseconds, so logging a value
+    allocates nothing and a run which stops early loses at most a few seconds of values
+
+    Attributes
+    ----------
+    chunksize (int) : (Optional) number of values held before the buffer is full
+    flushseconds (float) : (Optional) seconds after which the buffered values are due to be written
+    """
+    def __init__(self, chunksize=8192, flushseconds=METRIC_FLUSH_SECONDS):
+        self.chunksize = chunksize
+        self.flushseconds = flushseconds
+        self.columns = {field : np.empty(chunksize, dtype=dtype) for field, dtype in METRIC_FIELDS}
+        self.size = 0
+        self.oldest = None
+        self.names = {}
+        self.nextstep = {}
+
+    def __len__(self):
+        return self.size
+
+    def append(self, name, value, step=None):
+        """
+        Appends a value, returns True once the buffer is full or due to be written
+
+        Parameters
+        ----------
+            name (str)      : name of the metric, eg: 'train_loss'
+            value (float)   : value of the metric
+            step (int)      : (Optional) step of the value, defaults to the step after the last one logged
+        """
+        code = self.names.setdefault(name, len(self.names))
+        if step is None:
+            step = self.nextstep.get(code, 0)
+        self.nextstep[code] = step + 1
+
+        now = time.time()
+        if self.size == 0:
+            self.oldest = now
+        self.columns['metric'][self.size] = code
+        self.columns['step'][self.size] = step
+        self.columns['value'][self.size] = value
+        self.columns['time'][self.size] = now
+        self.size += 1
+        return self.size == self.chunksize or now - self.oldest >= self.flushseconds
+
+    def due(self):
+        """
+        Returns True if the oldest buffered value has waited flushseconds
+        """
+        return self.size > 0 and time.time() - self.oldest >= self.flushseconds
+
+    def take(self):
+        """
+        Returns (names, chunk) with the metric names and a copy of the buffered columns,
+        and empties the buffer
+        """
+        chunk = {field : values[:self.size].copy() for field, values in self.columns.items()}
+        self.size = 0
+        return list(self.names), chunk
+
+
+def write_metrics(exppath, names, chunk):
+    """
+    Appends a chunk of metric values to metrics.bin of an experiment, and saves the metric names
+
+    Parameters
+    ----------
+        exppath (str)   : artefact folder of the experiment
+        names (list)    : metric names, the metric column holds their positions
+        chunk (dict)    : arrays of the chunk keyed by field
+    """
+    with open(f"{exppath}/metrics.bin", "ab") as f:
+        for field, _ in METRIC_FIELDS:
+            np.save(f, chunk[field], allow_pickle=False)
+
+    with open(f"{exppath}/metrics.json", "w") as f:
+        json.dump({'metrics' : names}, f)
+
+
+def read_metrics(exppath, names=None):
+    """
+    Returns the metric values logged by an experiment as a dataframe with metric, step,
+    value and time columns, None if the experiment did not log metrics
+
+    Parameters
+    ----------
+        exppath (str)   : artefact folder of the experiment
+        names (list)    : (Optional) only return these metrics
+    """
+    import pandas as pd
+
+    if not os.path.exists(f"{exppath}/metrics.bin") or not os.path.exists(f"{exppath}/metrics.json"):
+        return None
+
+    with open(f"{exppath}/metrics.json", "r") as f:
+        metricnames = np.asarray(json.load(f)['metrics'], dtype=object)
+
+    columns = {field : [] for field, _ in METRIC_FIELDS}
+    size = os.path.getsize(f"{exppath}/metrics.bin")
+    with open(f"{exppath}/metrics.bin", "rb") as f:
+        while f.tell() < size:
+            try:
+                for field, _ in METRIC_FIELDS:
+                    columns[field].append(np.load(f, allow_pickle=False))
+            except (ValueError, EOFError):
+                ### chunk still being written by the run
+                break
+
+    chunks = min(len(values) for values in columns.values())
+    columns = {
+        field : np.concatenate(values[:chunks]) if chunks else np.empty(0, dtype=dtype)
+        for (field, dtype), values in zip(METRIC_FIELDS, columns.values())
+    }
+
+    dfmetrics = pd.DataFrame({
+        'metric' : metricnames[columns['metric']] if len(metricnames) else columns['metric'].astype(str),
+        'step' : columns['step'],
+        'value' : columns['value'],
+        'time' : columns['time']
+    })
+    if names is not None:
+        dfmetrics = dfmetrics[dfmetrics['metric'].isin(names)]
+    return dfmetrics
+
+
+def minmax_downsample(x, y, n_out):
+    """
+    Returns the indices of the points kept when reducing a curve to about n_out points,
+    the first, last, minimum and maximum point of every bucket, so spikes are never hidden
+    """
+    n = len(x)
+    if n <= n_out or n_out < 4:
+        return np.arange(n)
+
+    buckets = n_out // 4
+    edges = np.linspace(0, n, buckets + 1).astype(np.int64)
+    starts = edges[:-1]
+    keep = [starts, edges[1:] - 1,
+            starts + _segment_arg(y, edges, np.minimum),
+            starts + _segment_arg(y, edges, np.maximum)]
+    return np.unique(np.concatenate(keep))
+
+
+def _segment_arg(y, edges, ufunc):
+    """
+    Position of the min (ufunc=np.minimum) or max of every bucket y[edges[i]:edges[i + 1]]
+    relative to the start of the bucket, NaNs are ignored
+    """
+    fill = np.inf if ufunc is np.minimum else -np.inf
+    values = np.where(np.isnan(y), fill, y)
+    extreme = ufunc.reduceat(values, edges[:-1])
+    bucket = np.repeat(np.arange(len(edges) - 1), np.diff(edges))
+    hit = np.flatnonzero(values == extreme[bucket])
+    ### first hit of every bucket
+    first = np.unique(bucket[hit], return_index=True)[1]
+    position = np.zeros(len(edges) - 1, dtype=np.int64)
+    position[bucket[hit[first]]] = hit[first] - edges[:-1][bucket[hit[first]]]
+    return position
+
+
+def lttb_downsample(x, y, n_out):
+    """
+    Returns the indices of the points kept by Largest-Triangle-Three-Buckets when reducing
+    a curve to n_out points, which keeps the visual shape of the curve
+
+    Parameters
+    ----------
+        x (numpy.ndarray)   : increasing x values, eg: steps
+        y (numpy.ndarray)   : y values
+        n_out (int)         : number of points kept, first and last point included
+    """
+    n = len(x)
+    if n <= n_out or n_out < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    ### the first and last points are kept, the others are split in n_out - 2 buckets
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    keep = np.empty(n_out, dtype=np.int64)
+    keep[0] = 0
+    keep[-1] = n - 1
+
+    ### mean of every bucket, the third point of the triangle
+    meanx = np.add.reduceat(x[1:n - 1], edges[:-1] - 1) / np.diff(edges)
+    meany = np.add.reduceat(y[1:n - 1], edges[:-1] - 1) / np.diff(edges)
+    meanx = np.append(meanx, x[-1])
+    meany = np.append(meany, y[-1])
+
+    previous = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        area = np.abs(
+            (x[previous] - meanx[i + 1]) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (meany[i + 1] - y[previous])
+        )
+        previous = start + int(np.nanargmax(area)) if not np.all(np.isnan(area)) else start
+        keep[i + 1] = previous
+    return keep
+
+
+DOWNSAMPLERS = {
+    'lttb' : lttb_downsample,
+    'minmax' : minmax_downsample
+}
+
+
+def downsample_curves(dfmetrics, maxpoints=2000, method="lttb"):
+    """
+    Returns {metric : (steps, values)} with every curve sorted by step and reduced to
+    about maxpoints points
+
+    Parameters
+    ----------
+        dfmetrics (pandas.DataFrame)    : metric values, see read_metrics
+        maxpoints (int)                 : (Optional) points kept per curve
+        method (str)                    : (Optional) 'lttb' keeps the shape of the curve,
+            'minmax' keeps the extremes of every bucket
+    """
+    if method not in DOWNSAMPLERS:
+        raise AssertionError(f"Downsampling method should be one of {list(DOWNSAMPLERS)}, {method} was passed")
+
+    curves = {}
+    for name, dfcurve in dfmetrics.groupby('metric', sort=False):
+        steps = dfcurve['step'].to_numpy()
+        values = dfcurve['value'].to_numpy()
+        order = np.argsort(steps, kind='stable')
+        steps, values = steps[order], values[order]
+        keep = DOWNSAMPLERS[method](steps, values, maxpoints)
+        curves[name] = (steps[keep], values[keep])
+    return curves
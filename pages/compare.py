@@ -0,0 +1,106 @@
+import dash_core_components as dcc
+import dash_html_components as html
+
+from utils import Header, create_heatmap, make_data_table
+
+# Features shown on the importance heatmap
+COMPARE_TOP_FEATURES = 20
+
+
+# Runs the experiment picker lists for a search
+PICKER_OPTIONS = 50
+
+
+def run_option(expid, description):
+    return {'label' : f"{expid} : {description}", 'value' : int(expid)}
+
+
+def run_options(projectdata, search, picked=()):
+    """
+    Options of the experiment picker for a search : the options of the runs already picked, then
+    the run whose ExpID is the search and the first runs whose description contains it, queried
+    from the run store so the page never lists every run of the project
+
+    Parameters
+    ----------
+        projectdata (ProjectData) : project of the comparison
+        search (str) : text typed in the picker
+        picked (list) : options of the runs already picked, kept so the picker can still show them
+    """
+    runstore = projectdata.runstore
+    options = list(picked)
+    found = [runstore.page([('Description', 'contains', search)], limit=PICKER_OPTIONS)[0]]
+    if search.strip().isdigit():
+        found.insert(0, runstore.page([('ExpID', '=', int(search))], limit=1)[0])
+    seen = {option['value'] for option in options}
+    for dfruns in found:
+        for expid, description in zip(dfruns['ExpID'], dfruns['Description']):
+            if int(expid) not in seen:
+                seen.add(int(expid))
+                options.append(run_option(expid, description))
+    return options
+
+
+def create_layout(app, projectdata, expids, title=None):
+    """
+    Side by side comparison of several experiments, the first one is the reference
+    the differences are computed against
+    """
+    title = title or projectdata.projectname()
+    comparison = projectdata.compare(expids, COMPARE_TOP_FEATURES) if len(expids) else None
+
+    content = [html.H6("Pick the experiments to compare", className="subtitle padded")]
+    options = []
+    if comparison is not None:
+        runs = comparison['runs']
+        expids = runs['ExpID'].tolist()
+        options = [run_option(expid, description) for expid, description in zip(runs['ExpID'], runs['Description'])]
+        content = [
+            html.H6("Scores and Durations", className="subtitle padded"),
+            make_data_table(runs.round(4), 'compare-runs-table'),
+            html.H6("Params which differ", className="subtitle padded"),
+            make_data_table(comparison['params'].reset_index(), 'compare-params-table'),
+            html.Div(
+                [
+                    html.Div(
+                        [
+                            html.H6(f"Top {len(comparison['features'])} Features", className="subtitle padded"),
+                            create_heatmap(comparison['importance'].T, expids, comparison['features'],
+                                "compare-importance"),
+                        ],
+                        className="seven columns",
+                    ),
+                    html.Div(
+                        [
+                            html.H6("Feature Rank Correlation", className="subtitle padded"),
+                            create_heatmap(comparison['correlation'], expids, expids,
+                                "compare-correlation", colorscale="RdBu", hovertemplate="%{z:.02f}"),
+                        ],
+                        className="five columns",
+                    ),
+                ],
+                className="row ",
+            ),
+        ]
+
+    return html.Div(
+        [
+            html.Div([Header(app, title)]),
+            html.Div(
+                [
+                    html.H6("Compare Experiments", className="subtitle padded"),
+                    dcc.Dropdown(
+                        id='compare-picker',
+                        options=options,
+                        value=list(expids),
+                        multi=True,
+                        searchable=True,
+                        placeholder="Search the runs by ExpID or description",
+                    ),
+                    html.Div(content),
+                ],
+                className="sub_page",
+            ),
+        ],
+        className="page",
+    )
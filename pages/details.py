@@ -1,40 +1,86 @@
-import ast
 import os
-import pathlib
 
 import dash_core_components as dcc
 import dash_html_components as html
 import pandas as pd
 import plotly.graph_objs as go
 
-from utils import Header, create_feature_imp_plot, make_dash_table
+from artefacts import read_artefact
+from loaders import LRUCache, folder_signature
+from storage import format_times
+from utils import Header, create_feature_imp_plot, create_metric_plot, make_dash_table, make_data_table
 
-dfrunmaster = pd.read_csv('../Artefacts/Overview/runmaster.csv')
-projectname = dfrunmaster['ProjectName'].unique()[0]
 
+# Rendered experiment pages, at most LAYOUT_CACHE_SIZE are kept in memory
+LAYOUT_CACHE_SIZE = 128
 
-def create_layout(app, ExpID, projectname=projectname):
-    ### Read experiment specific learnings
-
-    try:
-        aim = dfrunmaster[dfrunmaster.ExpID==ExpID]['Description'].values[0]
-        param = dfrunmaster[dfrunmaster.ExpID==ExpID]['Params'].values[0]
-        param = ast.literal_eval(param)
+layoutcache = LRUCache(LAYOUT_CACHE_SIZE)
 
-        exppath = param['Artefacts']
-        dffeatobs = pd.read_csv(f"{exppath}/observations.csv")
+# Rows sampled from the artefacts logged in chunks
+SAMPLE_ROWS = 10
 
-        if os.path.exists(f"{exppath}/importance.csv"):
-            imp = pd.read_csv(f"{exppath}/importance.csv")
-            imp.columns = [i.lower() for i in imp.columns]
-            imp = imp.groupby('feature', as_index=False).agg({'importance':'sum'})
-            imp['importance'] = imp['importance']/sum(imp['importance'])
 
-            topfeatures = imp.sort_values(by='importance', ascending=False).head(10)
-            topfeatures.sort_values(by='importance', ascending=True, inplace=True)
-    except:
+def artefacts_section(projectdata, ExpID, exppath):
+    """
+    Artefacts of the run with their rows and size, and a sample of the rows of the
+    artefacts logged in chunks, which are too large to be shown or read whole
+    """
+    dfartefacts = projectdata.artefacts(ExpID)
+    if dfartefacts.shape[0] == 0:
         return html.Div()
 
+    content = [
+        html.H6("Artefacts", className="subtitle padded"),
+        make_data_table(format_times(dfartefacts.assign(MB=(dfartefacts['Bytes'] / 2**20).round(2)))[['Name', 'Rows', 'MB', 'SavedTime']],
+            f"artefacts-{ExpID}"),
+    ]
+    for name in dfartefacts['Name']:
+        metadata, dfsample = projectdata.artefactsample(exppath, name, SAMPLE_ROWS)
+        if metadata is None or 'chunks' not in metadata or dfsample is None:
+            continue
+        content += [
+            html.H6(f"Sample of {name} ({metadata['rows']} rows)", className="subtitle padded"),
+            make_data_table(dfsample, f"artefact-sample-{ExpID}-{name}"),
+        ]
+    return html.Div([html.Div(content, className="twelve columns")], className="row ")
+
+
+def experiment_layout(app, projectdata, ExpID):
+    """
+    Layout of the /exp/<ExpID> page, built on demand and memoized. A cached page is
+    reused while the run and the files of its artefact folder are unchanged
+    """
+    dfexp = projectdata.runstore.get(ExpID)
+    if dfexp.shape[0] == 0:
+        return html.Div([html.H6(f"Experiment {ExpID} not found")], className="page")
+
+    exppath = projectdata.params(ExpID).get('Artefacts')
+
+    signature = (tuple(dfexp.iloc[0].astype(str)), folder_signature(exppath))
+    return layoutcache.get((projectdata.overviewpath, int(ExpID)), signature,
+        lambda : create_layout(app, projectdata, ExpID, dfexp=dfexp))
+
+
+def create_layout(app, projectdata, ExpID, projectname=None, dfexp=None):
+    if dfexp is None:
+        dfexp = projectdata.runstore.get(ExpID)
+    ### the name is taken from the run rather than projectdata.projectname(), which parses the whole runmaster
+    projectname = projectname or dfexp['ProjectName'].iloc[0]
+    aim = dfexp['Description'].values[0]
+
+    exppath = projectdata.params(ExpID).get('Artefacts')
+    if exppath is None or not os.path.isdir(exppath):
+        sections = [
+            html.Div(
+                [
+                    html.H6(f"No artefacts saved for experiment {ExpID}", className="subtitle padded"),
+                ],
+                className="row ",
+            )
+        ]
+    else:
+        sections = artefact_sections(projectdata, ExpID, exppath)
+
     return html.Div(
         [
             html.Div([Header(app, projectname)]),
@@ -51,39 +97,77 @@ def create_layout(app, ExpID, projectname=projectname):
                         ],
                         className="row",
                     ),
-                    html.Div(
-                        [
-                            html.Div(
-                                [
-                                    html.H6(
-                                        f"Top 10 Features",
-                                        className="subtitle padded",
-                                    ),
-                                    create_feature_imp_plot(
-                                        topfeatures,
-                                        "graph-4",
-                                        topfeatures['importance'],
-                                        "<b>Importance : %{x:.02f}"
-                                    )
-                                ],
-                                className="seven columns",
-                            ),
-                            html.Div(
-                                [
-                                    html.H6(
-                                        "Observations from Features",
-                                        className="subtitle padded",
-                                    ),
-                                    html.Table(make_dash_table(dffeatobs)),
-                                ],
-                                className="five columns",
-                            ),
-                        ],
-                        className="row ",
-                    ),
-                ],
+                ] + sections,
                 className="sub_page",
             ),
         ],
         className="page",
     )
+
+
+def artefact_sections(projectdata, ExpID, exppath):
+    """
+    Rows of the experiment page built from the artefact folder of the run, artefacts the
+    run did not save are shown empty
+    """
+    ### Read experiment specific learnings
+    dffeatobs = read_artefact(exppath, 'observations')
+    if dffeatobs is None:
+        dffeatobs = pd.DataFrame()
+
+    imp = projectdata.importance(exppath)
+    topfeatures = pd.DataFrame({'feature' : [], 'importance' : []})
+    if imp is not None:
+        topfeatures = imp.sort_values(by='importance', ascending=False).head(10)
+        topfeatures.sort_values(by='importance', ascending=True, inplace=True)
+
+    curves = projectdata.metriccurves(exppath)
+
+    return [
+        html.Div(
+            [
+                html.Div(
+                    [
+                        html.H6(
+                            f"Top 10 Features",
+                            className="subtitle padded",
+                        ),
+                        create_feature_imp_plot(
+                            topfeatures,
+                            "graph-4",
+                            topfeatures['importance'],
+                            "<b>Importance : %{x:.02f}"
+                        )
+                    ],
+                    className="seven columns",
+                ),
+                html.Div(
+                    [
+                        html.H6(
+                            "Observations from Features",
+                            className="subtitle padded",
+                        ),
+                        html.Table(make_dash_table(dffeatobs)),
+                    ],
+                    className="five columns",
+                ),
+            ],
+            className="row ",
+        ),
+        html.Div(
+            [
+                html.Div(
+                    [
+                        html.H6(
+                            "Metric Curves",
+                            className="subtitle padded",
+                        ),
+                        create_metric_plot(curves, f"metric-curves-{ExpID}"),
+                    ],
+                    className="twelve columns",
+                ),
+            ],
+            className="row ",
+        ) if curves else html.Div(),
+        artefacts_section(projectdata, ExpID, exppath),
+    ]
@@ -1,14 +1,14 @@
-import ast
-import os
+import math
 import pathlib
 
 import dash_core_components as dcc
 import dash_html_components as html
-import numpy as np
 import pandas as pd
-import plotly.graph_objs as go
 from dash_table import DataTable
 
+from events import LIVE_COLUMNS
+from loaders import METRIC_COLUMNS, parse_filter_query
+from storage import format_times
 from utils import (Header, create_feature_imp_plot, create_journey_plot_line,
                    discrete_background_color_bins, make_unordered_list)
 
@@ -16,57 +16,69 @@ from utils import (Header, create_feature_imp_plot, create_journey_plot_line,
 PATH = pathlib.Path(__file__).parent
 DATA_PATH = PATH.joinpath("../data").resolve()
 
-f = open(DATA_PATH.joinpath("aim.txt"), "r")
-aim = f.read()
+DETAILED_LOG_COLUMNS = [
+    'ExpID', 'ParentID', 'Description', 'Status', 'Duration',
+    'Metric', 'Score', 'ParentScore', 'ImprovementParent',
+    'Benchmark', 'ImprovementBenchmark', 'Chosen'
+]
 
-dfrunmaster = pd.read_csv('../Artefacts/Overview/runmaster.csv')
+BINNED_COLUMNS = ['ImprovementParent', 'Score', 'ImprovementBenchmark']
 
-metriccols = ['Score', 'ParentScore', 'ImprovementParent',
-              'Benchmark', 'ImprovementBenchmark']
-for col in metriccols:
-    dfrunmaster[col] = dfrunmaster[col].apply(lambda x : round(x, 4))
+STATUS_STYLES = [
+    {
+        'if': {
+            'filter_query': '{Status} = "Completed"',
+            'column_id' : 'Status'
+        },
+        'backgroundColor': '#228B22',
+        'color': 'white'
+    },
+    {
+        'if': {
+            'filter_query': '{Status} = "Failed"',
+            'column_id' : 'Status'
+        },
+        'backgroundColor': '#FF6347',
+        'color': 'white'
+    },
+    {
+        'if': {
+            'filter_query': '{Status} = "Running"',
+            'column_id' : 'Status'
+        },
+        'backgroundColor': '#FFFF66',
+        'color': 'black'
+    },
+    {
+        'if': {
+            'filter_query': '{Chosen} = "1"',
+            'column_id' : 'Chosen'
+        },
+        'backgroundColor': '#228B22',
+        'color': 'white'
+    },
+    {
+        'if': {
+            'filter_query': '{Chosen} = "0"',
+            'column_id' : 'Chosen'
+        },
+        'backgroundColor': '#FF6347',
+        'color': 'white'
+    }
+]
 
-# ### find series of changes used in best run
-bestScore = min(dfrunmaster[(dfrunmaster.Metric=='Average RMSE')].Score)
-bestexp = dfrunmaster[dfrunmaster.Score==bestScore]['ExpID'].values[0]
-parent = dfrunmaster[dfrunmaster.Score==bestScore]['ParentID'].values[0]
-bestruns = [bestexp]
 
-while not np.isnan(parent):
-    bestexp = dfrunmaster[dfrunmaster.ExpID==parent]['ExpID'].values[0]
-    parent = dfrunmaster[dfrunmaster.ExpID==parent]['ParentID'].values[0]
-    bestruns.append(bestexp)
+def read_aim():
+    """
+    Objective of the project, read from data/aim.txt when the page is built
+    """
+    with open(DATA_PATH.joinpath("aim.txt"), "r") as f:
+        return f.read()
 
-dfrunmaster['Chosen'] = [1 if i in bestruns else 0 for i in dfrunmaster.ExpID]
 
-projectname = dfrunmaster['ProjectName'].unique()[0]
-
-### TODO : Sort values based on Acc/Error col in runmaster
-topruns = dfrunmaster.sort_values(by='Score').head(5)
-toprunparams = topruns['Params'].dropna()
-topfeatures = pd.DataFrame()
-featruns = 0
-
-for _, param in toprunparams.iteritems():
-    param = ast.literal_eval(param)
-    if os.path.exists(f"{param['Artefacts']}/importance.csv"):
-        featruns += 1
-        imp = pd.read_csv(f"{param['Artefacts']}/importance.csv")
-        imp.columns = [i.lower() for i in imp.columns]
-        imp = imp.groupby('feature', as_index=False).agg({'importance':'sum'})
-        imp['importance'] = imp['importance']/sum(imp['importance'])
-        topfeatures = pd.concat([topfeatures, imp], axis=0)
-
-if topfeatures.shape[0] != 0:
-    topfeatures['count'] = 1
-    topfeatures = topfeatures.groupby('feature', as_index=False).agg({'importance':sum, 'count':'sum'})
-    topfeatures['importance'] = topfeatures['importance']/sum(topfeatures['importance'])
-    topfeatures['importance'] = topfeatures['importance'].apply(lambda x : round(x, 2))
-    topfeatures = topfeatures.sort_values(by='importance', ascending=False).head(10)
-    topfeatures.sort_values(by='importance', ascending=True, inplace=True)
-
-
-def new_first_page(app, title=projectname):
+def new_first_page(app, projectdata, title=None):
+    title = title or projectdata.projectname()
+    aim = read_aim()
     return  html.Div(
                 [
                     html.Div([Header(app, title)]),
@@ -95,8 +107,9 @@ def new_first_page(app, title=projectname):
                 className="page"
             )
 
-def journey_page(app, title=projectname):
-    chosenChanges = dfrunmaster[dfrunmaster.Chosen==1]['Description'].values
+def journey_page(app, projectdata, title=None):
+    title = title or projectdata.projectname()
+    dfrunmaster = projectdata.runmaster()
     return  html.Div(
                 [
                     html.Div([Header(app, title)]),
@@ -118,7 +131,10 @@ def journey_page(app, title=projectname):
                                         "Road to best model",
                                         className="subtitle padded",
                                     ),
-                                    make_unordered_list(chosenChanges),
+                                    html.Div(
+                                        road_to_best(dfrunmaster),
+                                        id='road-to-best'
+                                    ),
                                 ],
                                 className="five columns",
                             ),
@@ -129,8 +145,10 @@ def journey_page(app, title=projectname):
                 className="page"
             )
 
-def top_features_page(app, title=projectname):
-        return  html.Div(
+def top_features_page(app, projectdata, title=None, topruns=5):
+    title = title or projectdata.projectname()
+    topfeatures, featruns = projectdata.topfeatures(topruns)
+    return  html.Div(
                 [
                     html.Div([Header(app, title)]),
                     html.Div(
@@ -182,15 +200,89 @@ def top_features_page(app, title=projectname):
                 className="page"
             )
 
-def detailed_log_page(app, title=projectname):
-    cols = [
-        'ExpID', 'ParentID', 'Description', 'Status', 'Duration',
-        'Metric', 'Score', 'ParentScore', 'ImprovementParent',
-        'Benchmark', 'ImprovementBenchmark', 'Chosen'
-    ]
-    scorestyles, _ = discrete_background_color_bins(dfrunmaster, columns=['Score'])
-    impParentstyles, _ = discrete_background_color_bins(dfrunmaster, columns=['ImprovementParent'])
-    impBenchstyles, _ = discrete_background_color_bins(dfrunmaster, columns=['ImprovementBenchmark'])
+def running_page(app, projectdata, title=None, interval=2):
+    """
+    Running now panel, the table is updated by a single timer callback every `interval`
+    seconds from the new events of the runs, see ProjectData.liveruns
+    """
+    title = title or projectdata.projectname()
+    version, dfrunning = projectdata.liveruns()
+    return  html.Div(
+                [
+                    html.Div([Header(app, title)]),
+                    html.Div(
+                        [
+                            html.H6("Running now",
+                                    className="subtitle padded",
+                            ),
+                            DataTable(
+                                id='running-now',
+                                columns=[{"name":i, "id":i} for i in LIVE_COLUMNS],
+                                data=running_table(dfrunning),
+                                style_cell={'textAlign': 'left'},
+                                style_data={'font-size' : '11px'},
+                                style_header={'font-size' : '11px', 'font-weight' : 'bold'},
+                                style_as_list_view=True,
+                                style_data_conditional=STATUS_STYLES
+                            ),
+                            dcc.Store(id='running-version', data=version),
+                            dcc.Interval(id='live-interval', interval=interval * 1000)
+                        ],
+                        className="sub_page",
+                    )
+                ],
+                className="page"
+            )
+
+def running_table(dfrunning):
+    return format_times(dfrunning).to_dict('records')
+
+def road_to_best(dfrunmaster):
+    chosenChanges = dfrunmaster[dfrunmaster.Chosen==1]['Description'].values
+    return make_unordered_list(chosenChanges)
+
+def detailed_log_table(dfrunmaster, valueranges=None):
+    """
+    Returns the records and conditional styles of the detailed log, the color bins
+    of the score columns are computed here once and sent with the records. Durations
+    are kept as seconds for sorting and filtering, and only formatted here for display
+    """
+    styles = list(STATUS_STYLES)
+    dftable = dfrunmaster[DETAILED_LOG_COLUMNS]
+    for col in BINNED_COLUMNS:
+        colstyles, _, bins = discrete_background_color_bins(dfrunmaster, columns=[col],
+            valuerange=None if valueranges is None else valueranges[col])
+        styles += colstyles
+        dftable = pd.concat([dftable, bins], axis=1)
+    return format_times(dftable).to_dict('records'), styles
+
+def detailed_log_query(projectdata, page_current, page_size, sort_by, filter_query):
+    """
+    Returns (records, page_count, styles) of the visible page of the detailed log,
+    filtering, sorting and paging are done by the run store
+    """
+    conditions = parse_filter_query(filter_query)
+    sort = [(i['column_id'], i['direction'] == 'asc') for i in sort_by or []]
+    dfpage, total = projectdata.runstore.page(conditions, sort, page_current * page_size, page_size,
+        flags={'Chosen' : projectdata.chosen()})
+    dfpage[METRIC_COLUMNS] = dfpage[METRIC_COLUMNS].round(4)
+
+    data, styles = detailed_log_table(dfpage, projectdata.columnranges(BINNED_COLUMNS))
+    return data, max(math.ceil(total / page_size), 1), styles
+
+def detailed_log_page(app, projectdata, title=None, serverside=True):
+    """
+    serverside=True only ships an empty table, the visible page is filled in by the
+    detailed log callback, serverside=False ships every run and sorts/filters in the browser
+    """
+    title = title or projectdata.projectname()
+    cols = DETAILED_LOG_COLUMNS
+    if serverside:
+        data, styles = [], STATUS_STYLES
+        action = "custom"
+    else:
+        data, styles = detailed_log_table(projectdata.runmaster())
+        action = "native"
 
     return  html.Div(
                 [
@@ -206,8 +298,10 @@ def detailed_log_page(app, title=projectname):
                             DataTable(
                                 id='detailed-log',
                                 columns=[{"name":i, "id":i} for i in cols],
-                                data=dfrunmaster[cols].to_dict('records'),
+                                data=data,
                                 page_size=15,
+                                page_current=0,
+                                page_action=action,
                                 style_cell_conditional=[
                                     {
                                         'if': {'column_id': c},
@@ -217,51 +311,12 @@ def detailed_log_page(app, title=projectname):
                                 style_data={'font-size' : '11px'},
                                 style_header={'font-size' : '11px', 'font-weight' : 'bold'},
                                 style_as_list_view=True,
-                                sort_action="native",
+                                sort_action=action,
                                 sort_mode="multi",
-                                filter_action="native",
-                                style_data_conditional=[
-                                    {
-                                        'if': {
-                                            'filter_query': '{Status} = "Completed"',
-                                            'column_id' : 'Status'
-                                        },
-                                        'backgroundColor': '#228B22',
-                                        'color': 'white'
-                                    },
-                                    {
-                                        'if': {
-                                            'filter_query': '{Status} = "Failed"',
-                                            'column_id' : 'Status'
-                                        },
-                                        'backgroundColor': '#FF6347',
-                                        'color': 'white'
-                                    },
-                                    {
-                                        'if': {
-                                            'filter_query': '{Status} = "Running"',
-                                            'column_id' : 'Status'
-                                        },
-                                        'backgroundColor': '#FFFF66',
-                                        'color': 'black'
-                                    },
-                                    {
-                                        'if': {
-                                            'filter_query': '{Chosen} = "1"',
-                                            'column_id' : 'Chosen'
-                                        },
-                                        'backgroundColor': '#228B22',
-                                        'color': 'white'
-                                    },
-                                    {
-                                        'if': {
-                                            'filter_query': '{Chosen} = "0"',
-                                            'column_id' : 'Chosen'
-                                        },
-                                        'backgroundColor': '#FF6347',
-                                        'color': 'white'
-                                    }
-                                ] + impParentstyles + scorestyles + impBenchstyles
+                                sort_by=[],
+                                filter_action=action,
+                                filter_query="",
+                                style_data_conditional=styles
                             )
                         ],
                         className="sub_page",
@@ -0,0 +1,40 @@
+import dash_html_components as html
+from dash_table import DataTable
+
+from loaders import workspacedata
+from utils import Header
+
+PICKER_COLUMNS = ['ProjectID', 'ProjectName', 'Runs', 'BestScores', 'LastActivity', 'Root']
+
+
+def create_layout(app):
+    """
+    Landing page listing the projects of the workspace, read from the workspace catalog
+    only, clicking a ProjectID opens the overview of the project
+    """
+    dfprojects = workspacedata.projects()
+    return html.Div(
+        [
+            html.Div([Header(app, "Projects")]),
+            html.Div(
+                [
+                    html.H6("Pick a project", className="subtitle padded"),
+                    DataTable(
+                        id='project-picker',
+                        columns=[{"name" : i, "id" : i} for i in PICKER_COLUMNS],
+                        data=dfprojects[PICKER_COLUMNS].to_dict('records'),
+                        page_size=20,
+                        sort_action="native",
+                        filter_action="native",
+                        style_cell={'textAlign': 'left', 'fontFamily': 'Raleway'},
+                        style_data={'font-size' : '11px'},
+                        style_header={'font-size' : '11px', 'font-weight' : 'bold'},
+                        style_as_list_view=True,
+                        style_table={'overflowX': 'auto'},
+                    ),
+                ],
+                className="sub_page",
+            ),
+        ],
+        className="page",
+    )
@@ -0,0 +1,88 @@
+import json
+import threading
+import time
+from array import array
+from functools import wraps
+
+
+class Profiler():
+    """
+    Records the calls made to the logging methods of a run, their wall clock time and
+    the bytes they wrote. Methods are instrumented by wrapping them on the instance, so
+    a run created without profiling runs the plain methods and pays nothing
+
+    Attributes
+    ----------
+    clock (callable) : (Optional) timer returning seconds, defaults to time.perf_counter
+    """
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.timings = {}
+        self.nbytes = {}
+        self.lock = threading.Lock()
+
+    def record(self, name, seconds, nbytes=0):
+        """
+        Records one call of `name` which took `seconds` and wrote `nbytes`
+        """
+        timings = self.timings.get(name)
+        if timings is None:
+            with self.lock:
+                timings = self.timings.setdefault(name, array('d'))
+                self.nbytes.setdefault(name, 0)
+        timings.append(seconds)
+        if nbytes:
+            self.nbytes[name] += nbytes
+
+    def wrap(self, name, function, nbytes=None):
+        """
+        Returns function instrumented under `name`
+
+        Parameters
+        ----------
+            name (str)          : name the calls are recorded under
+            function (callable) : the function to time
+            nbytes (callable)   : (Optional) nbytes(result, *args) returning the bytes written by a call
+        """
+        @wraps(function)
+        def profiled(*args, **kwargs):
+            start = self.clock()
+            result = None
+            try:
+                result = function(*args, **kwargs)
+                return result
+            finally:
+                self.record(name, self.clock() - start, nbytes(result, *args) if nbytes and result is not None else 0)
+        return profiled
+
+    def stats(self):
+        """
+        Returns {name : {calls, total_s, mean_ms, p50_ms, p99_ms, max_ms, bytes}} of every
+        instrumented name which was called
+        """
+        import numpy as np
+
+        stats = {}
+        for name in list(self.timings):
+            ### copied, the writer thread may still be appending
+            timings = np.array(self.timings[name], dtype=np.float64)
+            if len(timings) == 0:
+                continue
+            p50, p99 = np.percentile(timings, [50, 99])
+            stats[name] = {
+                'calls' : int(len(timings)),
+                'total_s' : round(float(timings.sum()), 6),
+                'mean_ms' : round(1000 * float(timings.mean()), 4),
+                'p50_ms' : round(1000 * float(p50), 4),
+                'p99_ms' : round(1000 * float(p99), 4),
+                'max_ms' : round(1000 * float(timings.max()), 4),
+                'bytes' : int(self.nbytes[name])
+            }
+        return stats
+
+    def save(self, path):
+        """
+        Writes the stats to a json file, eg: the profile.json artefact of a run
+        """
+        with open(path, "w") as f:
+            json.dump(self.stats(), f, indent=2)
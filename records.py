@@ -0,0 +1,57 @@
+try:
+    from .storage import LOG_COLUMNS, RUNMASTER_COLUMNS
+except ImportError:
+    from storage import LOG_COLUMNS, RUNMASTER_COLUMNS
+
+
+class Record():
+    """
+    A single row held in memory by a run, one slot per column. Far lighter than a
+    one-row DataFrame, and read by the writers like a dictionary through get()
+    """
+    __slots__ = ()
+
+    def __init__(self, **values):
+        for col in self.__slots__:
+            setattr(self, col, values.get(col))
+
+    def get(self, col, default=None):
+        value = getattr(self, col, None)
+        return default if value is None else value
+
+    def copy(self, **changes):
+        record = self.__class__.__new__(self.__class__)
+        for col in self.__slots__:
+            setattr(record, col, changes[col] if col in changes else getattr(self, col))
+        return record
+
+    def values(self):
+        """
+        Values of the row, in the order of the columns
+        """
+        return [getattr(self, col) for col in self.__slots__]
+
+    def frame(self):
+        """
+        The row as a one-row DataFrame, built on demand
+        """
+        import pandas as pd
+
+        return pd.DataFrame([self.values()], columns=list(self.__slots__))
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({', '.join(f'{col}={getattr(self, col)!r}' for col in self.__slots__)})"
+
+
+class RunRecord(Record):
+    """
+    The runmaster row of the current run
+    """
+    __slots__ = tuple(RUNMASTER_COLUMNS)
+
+
+class LogRecord(Record):
+    """
+    A row of the logs of a run, only the last one is kept by the run
+    """
+    __slots__ = tuple(LOG_COLUMNS)
@@ -0,0 +1,1263 @@
+import csv
+import json
+import os
+import sqlite3
+import sys
+from datetime import datetime, timedelta
+
+### pandas and numpy are imported by the functions reading the store, so that
+### a run only writing to it starts without importing them
+RUNMASTER_COLUMNS = [
+    'ProjectName', 'ExpID', 'ParentID', 'Description',
+    'StartTime', 'EndTime', 'Duration', 'ScoreType', 'Metric',
+    'Score', 'ParentScore', 'ImprovementParent', 'Benchmark',
+    'ImprovementBenchmark', 'Status', 'Params'
+]
+
+LOG_COLUMNS = [
+    'ExpID', 'Description', 'Status', 'LogMessage', 'ErrorMessage',
+    'StartTime', 'LogTime', 'DurationSinceLog', 'DurationSinceStart'
+]
+
+ARTEFACT_COLUMNS = ['ExpID', 'Name', 'Path', 'Rows', 'Bytes', 'SavedTime']
+
+### one row per param of a run, Value is the text of the value and Type how to read it
+### back, Number holds numeric values so that they can be compared as numbers
+PARAM_COLUMNS = ['ExpID', 'Key', 'Value', 'Type', 'Number']
+
+### sqlite column types, columns not listed are TEXT
+RUNMASTER_TYPES = {
+    'ExpID' : 'INTEGER', 'ParentID' : 'INTEGER', 'Score' : 'REAL', 'ParentScore' : 'REAL',
+    'ImprovementParent' : 'REAL', 'Benchmark' : 'REAL', 'ImprovementBenchmark' : 'REAL',
+    'Rows' : 'INTEGER', 'Bytes' : 'INTEGER', 'Number' : 'REAL',
+    'StartTime' : 'INTEGER', 'EndTime' : 'INTEGER', 'LogTime' : 'INTEGER', 'SavedTime' : 'INTEGER',
+    'Duration' : 'REAL', 'DurationSinceLog' : 'REAL', 'DurationSinceStart' : 'REAL'
+}
+
+### times are saved as nanoseconds since the epoch (of the naive local time) and durations
+### as seconds, they are only formatted as text for display, see format_times
+TIME_COLUMNS = ['StartTime', 'EndTime', 'LogTime', 'SavedTime', 'LastActivity']
+DURATION_COLUMNS = ['Duration', 'DurationSinceLog', 'DurationSinceStart']
+
+### origin of the epoch-ns times, naive like the times of the runs
+EPOCH = datetime(1970, 1, 1)
+
+### log rows held in memory by a sqlite log writer before they are committed, keeps the
+### memory of long runs flushing only at the end bounded
+MAX_PENDING_LOGS = 1024
+
+### version of the sqlite schema, see SQLiteRunStore.migrate
+SCHEMA_VERSION = 2
+
+try:
+    import fcntl
+
+    def _lockfile(f):
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+
+    def _unlockfile(f):
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+except ImportError:
+    import msvcrt
+
+    def _lockfile(f):
+        f.seek(0)
+        while True:
+            try:
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                continue
+
+    def _unlockfile(f):
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class FileLock():
+    """
+    Exclusive lock shared by all processes through a lock file, can be
+    re-entered by the object already holding it
+
+    Attributes
+    ----------
+    lockfile (str) : path of the lock file, created if it does not exist
+    """
+    def __init__(self, lockfile):
+        self.lockfile = lockfile
+        self.depth = 0
+        self.file = None
+
+    def __enter__(self):
+        if self.depth == 0:
+            self.file = open(self.lockfile, "a+")
+            _lockfile(self.file)
+        self.depth += 1
+        return self
+
+    def __exit__(self, *args):
+        self.depth -= 1
+        if self.depth == 0:
+            _unlockfile(self.file)
+            self.file.close()
+            self.file = None
+
+
+class CSVRunStore():
+    """
+    Append-only csv store for the runmaster file. Every status change of a run is
+    appended as one row to a journal next to runmaster.csv, the journal is folded
+    back into runmaster.csv (latest row per ExpID wins) every `compactevery` rows.
+    Appends and compactions hold `lock`, which writers can also hold to allocate
+    ExpIDs atomically across processes
+
+    Attributes
+    ----------
+    overviewpath (str)  : path of the Artefacts/Overview folder of the project
+
+    compactevery (int)  : (Optional) number of journal rows after which the journal
+        is compacted into the runmaster csv
+
+    readonly (bool)     : (Optional) only read the store, the Overview folder is not created
+    """
+    backend = "csv"
+
+    def __init__(self, overviewpath, compactevery=500, readonly=False):
+        self.overviewpath = overviewpath
+        self.runmasterfile = os.path.join(overviewpath, "runmaster.csv")
+        self.journalfile = os.path.join(overviewpath, "runmaster.journal.csv")
+        self.artefactfile = os.path.join(overviewpath, "artefacts.csv")
+        self.paramsfile = os.path.join(overviewpath, "params.csv")
+        self.columns = RUNMASTER_COLUMNS
+        self.compactevery = compactevery
+
+        if not readonly:
+            os.makedirs(overviewpath, exist_ok=True)
+        self.lock = FileLock(os.path.join(overviewpath, "runmaster.lock"))
+
+        self.journalrows = 0
+        if os.path.exists(self.journalfile):
+            with open(self.journalfile, "r") as f:
+                self.journalrows = max(sum(1 for _ in f) - 1, 0)
+
+    def exists(self):
+        """
+        True if any run has been saved, either in the runmaster or in the journal
+        """
+        return os.path.exists(self.runmasterfile) or os.path.exists(self.journalfile)
+
+    def version(self):
+        """
+        Returns a token which changes whenever a row of the runmaster is saved, the mtime and size
+        of the runmaster, journal and params files which only runmaster saves write to
+        """
+        return file_signature([self.runmasterfile, self.journalfile, self.paramsfile])
+
+    def read(self, columns=None):
+        """
+        Returns the runmaster as a dataframe with one row per ExpID
+
+        Parameters
+        ----------
+            columns (list) : (Optional) only read these columns, ExpID is always read
+        """
+        return read_runmaster(self.runmasterfile, columns)
+
+    def get(self, expid):
+        """
+        Returns the runmaster rows of a single experiment
+        """
+        dfrunmaster = self.read()
+        if dfrunmaster.shape[0] == 0:
+            return dfrunmaster
+        return dfrunmaster[dfrunmaster.ExpID == expid]
+
+    def getrow(self, expid):
+        """
+        Returns the runmaster record of a single experiment as a dictionary, None if it does not exist
+        """
+        dfexp = self.get(expid)
+        return None if dfexp.shape[0] == 0 else dfexp.iloc[-1].to_dict()
+
+    def query(self, **filters):
+        """
+        Returns the runmaster rows matching all of the column=value filters
+        """
+        dfrunmaster = self.read()
+        for col, value in filters.items():
+            if dfrunmaster.shape[0] == 0:
+                break
+            dfrunmaster = dfrunmaster[dfrunmaster[col] == value]
+        return dfrunmaster
+
+    def maxexpid(self):
+        dfrunmaster = self.read(['ExpID'])
+        return int(dfrunmaster.ExpID.max()) if dfrunmaster.shape[0] else 0
+
+    def hasdescription(self, description):
+        """
+        True if an experiment with the same description (ignoring case) exists
+        """
+        dfrunmaster = self.read(['Description'])
+        if dfrunmaster.shape[0] == 0:
+            return False
+        return description.lower() in dfrunmaster['Description'].str.lower().values
+
+    def save(self, dfrun):
+        """
+        Appends the record(s) in dfrun to the journal, compacts the journal once
+        it grows beyond `compactevery` rows. Returns the number of bytes appended
+
+        Parameters
+        ----------
+            dfrun (pandas.DataFrame) : formatted run record(s) with the runmaster columns
+        """
+        return self._append(lambda f, header : dfrun[self.columns].to_csv(f, header=header, index=False),
+            dfrun.shape[0])
+
+    def saverow(self, row):
+        """
+        Appends a single run record to the journal, without building a DataFrame.
+        Returns the number of bytes appended
+
+        Parameters
+        ----------
+            row (list) : formatted values of the run, in the order of the runmaster columns
+        """
+        def write(f, header):
+            writer = csv.writer(f)
+            if header:
+                writer.writerow(self.columns)
+            writer.writerow([_format_value(value) for value in row])
+        return self._append(write, 1)
+
+    def _append(self, write, rows):
+        """
+        Helper function which appends `rows` rows to the journal with write(file, header)
+        """
+        with self.lock:
+            writeheader = not os.path.exists(self.journalfile)
+            if writeheader:
+                ### journal was compacted by another run
+                self.journalrows = 0
+
+            with open(self.journalfile, "a", newline="") as f:
+                start = f.tell()
+                write(f, writeheader)
+                nbytes = f.tell() - start
+            self.journalrows += rows
+
+            if self.journalrows >= self.compactevery:
+                self.compact()
+        return nbytes
+
+    def compact(self):
+        """
+        Folds the journal into the runmaster csv and removes the journal
+        """
+        with self.lock:
+            if not os.path.exists(self.journalfile):
+                return
+
+            dfrunmaster = self.read()[self.columns]
+            tmpfile = f"{self.runmasterfile}.tmp"
+            dfrunmaster.to_csv(tmpfile, index=False)
+            os.replace(tmpfile, self.runmasterfile)
+            os.remove(self.journalfile)
+            self.journalrows = 0
+
+    def logwriter(self, logfile, flushevery=1):
+        """
+        Returns the writer used for the logs of an experiment
+        """
+        return LogWriter(logfile, LOG_COLUMNS, flushevery)
+
+    def saveartefact(self, artefact):
+        """
+        Appends the metadata of a saved artefact to artefacts.csv
+
+        Parameters
+        ----------
+            artefact (dict) : metadata keyed by the artefact columns
+        """
+        writeheader = not os.path.exists(self.artefactfile)
+        with open(self.artefactfile, "a", newline="") as f:
+            writer = csv.writer(f)
+            if writeheader:
+                writer.writerow(ARTEFACT_COLUMNS)
+            writer.writerow([_format_value(artefact.get(col)) for col in ARTEFACT_COLUMNS])
+
+    def page(self, conditions=(), sort_by=(), offset=0, limit=None, flags=None):
+        """
+        Returns (rows of a page of the runmaster, number of rows matching the conditions),
+        see SQLiteRunStore.page
+        """
+        dfrunmaster = self.read()
+        for name, expids in (flags or {}).items():
+            dfrunmaster[name] = dfrunmaster['ExpID'].isin(list(expids)).astype(int)
+
+        for col, operator, value in conditions:
+            _checkcolumn(col, set(dfrunmaster.columns))
+            dfrunmaster = dfrunmaster[_PANDAS_OPERATORS[operator](dfrunmaster[col], value)]
+
+        if len(sort_by):
+            dfrunmaster = dfrunmaster.sort_values(
+                by=[_checkcolumn(col, set(dfrunmaster.columns)) for col, _ in sort_by],
+                ascending=[ascending for _, ascending in sort_by], kind='stable')
+
+        end = None if limit is None else offset + limit
+        return dfrunmaster.iloc[offset:end], dfrunmaster.shape[0]
+
+    def ranges(self, columns):
+        """
+        Returns the (min, max) of every column
+        """
+        dfrunmaster = self.read()
+        return {col : (dfrunmaster[col].min(), dfrunmaster[col].max()) for col in columns}
+
+    def saveparams(self, expid, params):
+        """
+        Appends the params of a run to params.csv, the latest row of every (ExpID, Key) wins
+
+        Parameters
+        ----------
+            expid (int)     : ExpID of the run
+            params (dict)   : encoded params, key -> (Value, Type, Number), see encode_param
+        """
+        with self.lock:
+            writeheader = not os.path.exists(self.paramsfile)
+            with open(self.paramsfile, "a", newline="") as f:
+                writer = csv.writer(f)
+                if writeheader:
+                    writer.writerow(PARAM_COLUMNS)
+                for key, (value, type, number) in params.items():
+                    writer.writerow([int(expid), key, value, type, "" if number is None else repr(number)])
+
+    def readparams(self, expids=None, keys=None):
+        """
+        Returns the params table, optionally only for some runs and keys
+        """
+        import pandas as pd
+
+        if not os.path.exists(self.paramsfile):
+            return pd.DataFrame(columns=PARAM_COLUMNS)
+        dfparams = pd.read_csv(self.paramsfile, dtype={'Key' : str, 'Value' : str, 'Type' : str},
+            keep_default_na=False)
+        dfparams['Number'] = pd.to_numeric(dfparams['Number'], errors='coerce')
+        dfparams = dfparams.drop_duplicates(subset=['ExpID', 'Key'], keep='last')
+        if expids is not None:
+            dfparams = dfparams[dfparams.ExpID.isin([int(expid) for expid in expids])]
+        if keys is not None:
+            dfparams = dfparams[dfparams.Key.isin(list(keys))]
+        return dfparams.reset_index(drop=True)
+
+    def getparams(self, expid):
+        """
+        Returns the params of a run as a dictionary of typed values
+        """
+        return params_dict(self.readparams([expid]))
+
+    def findruns(self, conditions):
+        """
+        Returns the ExpIDs of the runs whose params match all the conditions, see SQLiteRunStore.findruns
+        """
+        dfparams = self.readparams()
+        expids = set(dfparams['ExpID'])
+        for key, operator, value in conditions:
+            dfkey = dfparams[dfparams.Key == key]
+            text, _, number = encode_param(value)
+            if operator in ('contains', 'datestartswith') or number is None:
+                match = _PANDAS_OPERATORS[operator](dfkey['Value'], text)
+            else:
+                match = _PANDAS_OPERATORS[operator](dfkey['Number'], number)
+            expids &= set(dfkey.loc[match, 'ExpID'])
+        return sorted(int(expid) for expid in expids)
+
+    def migrate(self):
+        """
+        One time migration of the Params column of the runmaster into params.csv, times
+        saved as text by older versions are converted when the runmaster is read
+        """
+        with self.lock:
+            if os.path.exists(self.paramsfile) or not self.exists():
+                return
+            with open(self.paramsfile, "w", newline="") as f:
+                csv.writer(f).writerow(PARAM_COLUMNS)
+            for expid, params in _runmaster_params(self.read()):
+                self.saveparams(expid, params)
+
+    def readartefacts(self, expid=None):
+        import pandas as pd
+
+        if not os.path.exists(self.artefactfile):
+            return pd.DataFrame(columns=ARTEFACT_COLUMNS)
+        dfartefacts = normalize_times(pd.read_csv(self.artefactfile, dtype={'SavedTime' : str}))
+        if expid is not None:
+            dfartefacts = dfartefacts[dfartefacts.ExpID == expid]
+        return dfartefacts
+
+
+class SQLiteRunStore():
+    """
+    SQLite store for the runmaster, logs and artefact metadata of a project, kept in
+    Artefacts/Overview/runmaster.db. The database runs in WAL mode so the dashboard
+    can read while runs are writing, and is indexed on ExpID, ParentID, Metric and
+    Status so point lookups and filters do not scan the whole history
+
+    Attributes
+    ----------
+    overviewpath (str)  : path of the Artefacts/Overview folder of the project
+
+    readonly (bool)     : (Optional) open an existing database read-only, it is neither created
+        nor upgraded, see migrate
+    """
+    backend = "sqlite"
+
+    def __init__(self, overviewpath, readonly=False):
+        self.overviewpath = overviewpath
+        self.dbfile = os.path.join(overviewpath, "runmaster.db")
+        self.columns = RUNMASTER_COLUMNS
+
+        if readonly:
+            self.conn = _connect(self.dbfile, readonly=True)
+            self.lock = SQLiteLock(self.conn)
+            if self.conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION and self.exists():
+                raise AssertionError(f"The runmaster at {overviewpath} was saved by an older version of DeepFlow, "
+                    "start a run of the project to upgrade it")
+            return
+
+        os.makedirs(overviewpath, exist_ok=True)
+        self.conn = _connect(self.dbfile)
+        self.lock = SQLiteLock(self.conn)
+
+        with self.lock:
+            self._createtables()
+
+    def _createtables(self):
+        self.conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS runmaster (
+                {', '.join(f'{col} {RUNMASTER_TYPES.get(col, "TEXT")}' for col in RUNMASTER_COLUMNS)},
+                PRIMARY KEY (ExpID)
+            )""")
+        self.conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS logs (
+                {', '.join(f'{col} {RUNMASTER_TYPES.get(col, "TEXT")}' for col in LOG_COLUMNS)}
+            )""")
+        self.conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS artefacts (
+                {', '.join(f'{col} {RUNMASTER_TYPES.get(col, "TEXT")}' for col in ARTEFACT_COLUMNS)}
+            )""")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS ix_runmaster_parentid ON runmaster (ParentID)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS ix_runmaster_metric ON runmaster (Metric, Score)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS ix_runmaster_best ON runmaster (Metric, ScoreType, Score)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS ix_runmaster_status ON runmaster (Status)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS ix_runmaster_description ON runmaster (Description COLLATE NOCASE)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS ix_runmaster_starttime ON runmaster (StartTime)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS ix_logs_expid ON logs (ExpID)")
+        self.conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS params (
+                {', '.join(f'{col} {RUNMASTER_TYPES.get(col, "TEXT")}' for col in PARAM_COLUMNS)},
+                PRIMARY KEY (ExpID, Key)
+            )""")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS ix_artefacts_expid ON artefacts (ExpID)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS ix_params_value ON params (Key, Value)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS ix_params_number ON params (Key, Number)")
+        ### number of saves of runmaster rows, the version the dashboard refreshes on, which the
+        ### logs and artefacts written to the same database leave unchanged
+        self.conn.execute("CREATE TABLE IF NOT EXISTS runmasterversion (Version INTEGER NOT NULL)")
+        self.conn.execute("INSERT INTO runmasterversion SELECT 0 WHERE NOT EXISTS (SELECT 1 FROM runmasterversion)")
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            self.conn.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS tr_runmaster_{event.lower()} AFTER {event} ON runmaster
+                BEGIN UPDATE runmasterversion SET Version = Version + 1; END""")
+
+    def exists(self):
+        return self.conn.execute("SELECT 1 FROM runmaster LIMIT 1").fetchone() is not None
+
+    def version(self):
+        """
+        Returns a token which changes whenever a row of the runmaster is saved, counted by triggers
+        on the runmaster. Databases not yet opened for writing by this version of DeepFlow have no
+        counter and fall back to the mtime and size of their files
+        """
+        try:
+            return self.conn.execute("SELECT Version FROM runmasterversion").fetchone()[0]
+        except sqlite3.OperationalError:
+            return file_signature([self.dbfile, self.dbfile + "-wal"])
+
+    def select(self, sql, params=()):
+        """
+        Runs a query and returns the result as a dataframe, numeric columns which
+        are entirely NULL come back as NaN rather than None and times as Int64
+        """
+        import pandas as pd
+
+        df = read_sql(self.conn, sql, params)
+        for col in df.columns:
+            if (RUNMASTER_TYPES.get(col) in ('REAL', 'INTEGER') and df[col].dtype == object
+                    and col not in TIME_COLUMNS + DURATION_COLUMNS):
+                df[col] = pd.to_numeric(df[col])
+        return normalize_times(df)
+
+    def read(self):
+        return self.select("SELECT * FROM runmaster ORDER BY ExpID")
+
+    def get(self, expid):
+        return self.select("SELECT * FROM runmaster WHERE ExpID = ?", (int(expid),))
+
+    def getrow(self, expid):
+        """
+        Returns the runmaster record of a single experiment as a dictionary, None if it does not exist,
+        read without pandas
+        """
+        cursor = self.conn.execute("SELECT * FROM runmaster WHERE ExpID = ?", (int(expid),))
+        row = cursor.fetchone()
+        return None if row is None else dict(zip([col[0] for col in cursor.description], row))
+
+    def query(self, **filters):
+        where = " AND ".join(f"{col} = ?" for col in filters) or "1"
+        return self.select(f"SELECT * FROM runmaster WHERE {where} ORDER BY ExpID",
+            [_sqlvalue(value) for value in filters.values()])
+
+    def maxexpid(self):
+        return self.conn.execute("SELECT COALESCE(MAX(ExpID), 0) FROM runmaster").fetchone()[0]
+
+    def hasdescription(self, description):
+        return self.conn.execute("SELECT 1 FROM runmaster WHERE Description = ? COLLATE NOCASE LIMIT 1",
+            (description,)).fetchone() is not None
+
+    def save(self, dfrun):
+        """
+        Inserts or replaces the record(s) in dfrun, keyed on ExpID. Returns the size of
+        the values written, in bytes of their text
+
+        Parameters
+        ----------
+            dfrun (pandas.DataFrame) : formatted run record(s) with the runmaster columns
+        """
+        return self._saverows([[_sqlvalue(value) for value in row]
+            for row in dfrun[self.columns].itertuples(index=False)])
+
+    def saverow(self, row):
+        """
+        Inserts or replaces a single run record, without building a DataFrame
+
+        Parameters
+        ----------
+            row (list) : formatted values of the run, in the order of the runmaster columns
+        """
+        return self._saverows([[_sqlvalue(value) for value in row]])
+
+    def _saverows(self, rows):
+        with self.lock:
+            self.conn.executemany(
+                f"INSERT OR REPLACE INTO runmaster ({', '.join(self.columns)}) "
+                f"VALUES ({', '.join('?' * len(self.columns))})", rows)
+        return _rowbytes(rows)
+
+    def page(self, conditions=(), sort_by=(), offset=0, limit=None, flags=None):
+        """
+        Returns (rows of a page of the runmaster, number of rows matching the conditions),
+        filtering, sorting and paging are all done by sqlite
+
+        Parameters
+        ----------
+            conditions (list)   : (column, operator, value) tuples which all have to match, operators are
+                '=', '!=', '<', '<=', '>', '>=', 'contains' and 'datestartswith'
+            sort_by (list)      : (column, ascending) tuples
+            offset (int)        : number of matching rows to skip
+            limit (int)         : (Optional) number of rows of the page, all rows if None
+            flags (dict)        : (Optional) derived 0/1 columns, column name -> ExpIDs for which it is 1
+        """
+        flags = flags or {}
+        columns = set(self.columns) | set(flags)
+
+        select = ["*"]
+        params = []
+        for name, expids in flags.items():
+            _checkcolumn(name, columns)
+            select.append(f"(ExpID IN ({', '.join('?' * len(expids))})) AS {name}")
+            params += [int(expid) for expid in expids]
+        source = f"(SELECT {', '.join(select)} FROM runmaster)"
+
+        where = []
+        for col, operator, value in conditions:
+            where.append(_SQL_OPERATORS[operator].format(col=_checkcolumn(col, columns)))
+            params.append(str(value) if operator in ('contains', 'datestartswith') else value)
+        where = " AND ".join(where) or "1"
+
+        total = self.conn.execute(f"SELECT COUNT(*) FROM {source} WHERE {where}", params).fetchone()[0]
+
+        order = ", ".join(
+            f"{_checkcolumn(col, columns)} {'ASC' if ascending else 'DESC'}" for col, ascending in sort_by
+        ) or "ExpID"
+        sql = f"SELECT * FROM {source} WHERE {where} ORDER BY {order} LIMIT ? OFFSET ?"
+        dfpage = self.select(sql, params + [-1 if limit is None else int(limit), int(offset)])
+        return dfpage, total
+
+    def ranges(self, columns):
+        """
+        Returns the (min, max) of every column
+        """
+        for col in columns:
+            _checkcolumn(col, set(self.columns))
+        row = self.conn.execute(
+            f"SELECT {', '.join(f'MIN({col}), MAX({col})' for col in columns)} FROM runmaster").fetchone()
+        return {col : (row[2 * i], row[2 * i + 1]) for i, col in enumerate(columns)}
+
+    def bestchain(self, metric=None):
+        """
+        Returns the ExpIDs from the best run of a metric up to the run it started from scratch,
+        the road to the best model, as lineage.LineageIndex finds it from the runmaster. The best
+        run is the lowest score for errors and the highest for accuracies, it is found on the
+        (Metric, ScoreType, Score) index and its ancestors on the ExpID key, so the runmaster is
+        never read
+
+        Parameters
+        ----------
+            metric (str) : (Optional) metric of the best run, defaults to the metric most runs were scored on
+        """
+        if metric is None:
+            row = self.conn.execute("""
+                SELECT Metric FROM runmaster WHERE Metric IS NOT NULL
+                GROUP BY Metric ORDER BY COUNT(*) DESC, MIN(ExpID) LIMIT 1""").fetchone()
+            if row is None:
+                return []
+            metric = row[0]
+
+        ### best score of every score type of the metric, accuracies are negated so the lowest wins
+        best = None
+        for scoretype, lowest, highest in self.conn.execute("""
+                SELECT ScoreType, MIN(Score), MAX(Score) FROM runmaster
+                WHERE Metric = ? AND Score IS NOT NULL GROUP BY ScoreType""", (metric,)):
+            score = highest if str(scoretype).lower() == 'accuracy' else lowest
+            expid = self.conn.execute("""
+                SELECT MIN(ExpID) FROM runmaster WHERE Metric = ? AND ScoreType IS ? AND Score = ?""",
+                (metric, scoretype, score)).fetchone()[0]
+            key = (-score if str(scoretype).lower() == 'accuracy' else score, expid)
+            best = key if best is None or key < best else best
+        if best is None:
+            return []
+
+        return [row[0] for row in self.conn.execute("""
+            WITH RECURSIVE chain (ExpID, ParentID) AS (
+                SELECT ExpID, ParentID FROM runmaster WHERE ExpID = ?
+                UNION
+                SELECT runmaster.ExpID, runmaster.ParentID FROM runmaster JOIN chain ON runmaster.ExpID = chain.ParentID
+            )
+            SELECT ExpID FROM chain""", (best[1],))]
+
+    def compact(self):
+        pass
+
+    def logwriter(self, logfile, flushevery=1):
+        return SQLiteLogWriter(self.dbfile, LOG_COLUMNS, flushevery)
+
+    def saveartefact(self, artefact):
+        with self.lock:
+            self.conn.execute(
+                f"INSERT INTO artefacts ({', '.join(ARTEFACT_COLUMNS)}) VALUES ({', '.join('?' * len(ARTEFACT_COLUMNS))})",
+                [_sqlvalue(_format_value(artefact.get(col))) for col in ARTEFACT_COLUMNS])
+
+    def readartefacts(self, expid=None):
+        if expid is None:
+            return self.select("SELECT * FROM artefacts")
+        return self.select("SELECT * FROM artefacts WHERE ExpID = ?", (int(expid),))
+
+    def saveparams(self, expid, params):
+        """
+        Inserts or replaces the params of a run, keyed on (ExpID, Key)
+
+        Parameters
+        ----------
+            expid (int)     : ExpID of the run
+            params (dict)   : encoded params, key -> (Value, Type, Number), see encode_param
+        """
+        rows = [(int(expid), key, value, type, number) for key, (value, type, number) in params.items()]
+        with self.lock:
+            self.conn.executemany(
+                f"INSERT OR REPLACE INTO params ({', '.join(PARAM_COLUMNS)}) VALUES (?, ?, ?, ?, ?)", rows)
+
+    def readparams(self, expids=None, keys=None):
+        """
+        Returns the params table, optionally only for some runs and keys
+        """
+        where, params = [], []
+        for col, values in (('ExpID', expids), ('Key', keys)):
+            if values is not None:
+                values = [int(value) for value in values] if col == 'ExpID' else list(values)
+                where.append(f"{col} IN ({', '.join('?' * len(values))})")
+                params += values
+        dfparams = self.select(f"SELECT * FROM params WHERE {' AND '.join(where) or '1'}", params)
+        dfparams['Value'] = dfparams['Value'].fillna("")
+        return dfparams
+
+    def getparams(self, expid):
+        """
+        Returns the params of a run as a dictionary of typed values
+        """
+        return params_dict(self.readparams([expid]))
+
+    def findruns(self, conditions):
+        """
+        Returns the ExpIDs of the runs whose params match all the conditions, eg:
+        [('model', '=', 'LGB'), ('Lagslist', 'contains', '3')]. Values are encoded as
+        they are saved, see encode_param, so numbers and bools are compared as numbers,
+        every condition is one lookup on the (Key, Value) or (Key, Number) index
+
+        Parameters
+        ----------
+            conditions (list) : (key, operator, value) tuples, operators as in page()
+        """
+        selects, params = [], []
+        for key, operator, value in conditions:
+            value, _, number = encode_param(value)
+            if operator in ('contains', 'datestartswith') or number is None:
+                col = 'Value'
+            else:
+                col, value = 'Number', number
+            selects.append(f"SELECT ExpID FROM params WHERE Key = ? AND {_SQL_OPERATORS[operator].format(col=col)}")
+            params += [key, value]
+        sql = " INTERSECT ".join(selects) or "SELECT DISTINCT ExpID FROM params"
+        return [row[0] for row in self.conn.execute(f"{sql} ORDER BY ExpID", params)]
+
+    def migrate(self):
+        """
+        Brings databases created by older versions up to SCHEMA_VERSION, the version
+        the database is at is kept in its user_version
+            1 : the Params column of the runmaster is copied into the params table
+            2 : times saved as text are converted to epoch-ns, durations to seconds
+        """
+        with self.lock:
+            version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+            if version >= SCHEMA_VERSION:
+                return
+
+            if version < 1 and not self.exists():
+                ### new databases are created with the latest schema
+                self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+                return
+
+            if version < 1:
+                for expid, params in _runmaster_params(self.read()):
+                    self.saveparams(expid, params)
+
+            if version < 2:
+                ### the column types changed, so the tables are rebuilt
+                dfrunmaster = normalize_times(self.select("SELECT * FROM runmaster ORDER BY ExpID"))
+                dflogs = normalize_times(self.select("SELECT * FROM logs ORDER BY rowid"))
+                dfartefacts = normalize_times(self.select("SELECT * FROM artefacts ORDER BY rowid"))
+                for table in ("runmaster", "logs", "artefacts"):
+                    self.conn.execute(f"DROP TABLE {table}")
+                self._createtables()
+                for table, df, columns in (("runmaster", dfrunmaster, RUNMASTER_COLUMNS),
+                        ("logs", dflogs, LOG_COLUMNS), ("artefacts", dfartefacts, ARTEFACT_COLUMNS)):
+                    self.conn.executemany(
+                        f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                        [[_sqlvalue(value) for value in row] for row in df[columns].itertuples(index=False)])
+
+            self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def readlogs(self, expid):
+        return self.select("SELECT * FROM logs WHERE ExpID = ? ORDER BY rowid", (int(expid),))
+
+    def export_csv(self, runmasterfile=None):
+        """
+        Writes the runmaster to a csv file, for use with tools expecting the csv layout
+
+        Parameters
+        ----------
+            runmasterfile (str) : (Optional) path of the csv, defaults to Overview/runmaster.csv
+        """
+        if runmasterfile is None:
+            runmasterfile = os.path.join(self.overviewpath, "runmaster.csv")
+        self.read()[self.columns].to_csv(runmasterfile, index=False)
+
+
+### sql and pandas versions of the operators accepted by page()
+_SQL_OPERATORS = {
+    '=' : "{col} = ?", '!=' : "{col} != ?",
+    '<' : "{col} < ?", '<=' : "{col} <= ?",
+    '>' : "{col} > ?", '>=' : "{col} >= ?",
+    'contains' : "INSTR(CAST({col} AS TEXT), ?) > 0",
+    'datestartswith' : "INSTR(CAST({col} AS TEXT), ?) = 1",
+}
+
+_PANDAS_OPERATORS = {
+    '=' : lambda series, value : series == value, '!=' : lambda series, value : series != value,
+    '<' : lambda series, value : series < value, '<=' : lambda series, value : series <= value,
+    '>' : lambda series, value : series > value, '>=' : lambda series, value : series >= value,
+    'contains' : lambda series, value : series.astype(str).str.contains(str(value), regex=False),
+    'datestartswith' : lambda series, value : series.astype(str).str.startswith(str(value)),
+}
+
+
+def _checkcolumn(col, columns):
+    """
+    Column names are put into the sql, so only known columns are accepted
+    """
+    if col not in columns:
+        raise AssertionError(f"Unknown runmaster column {col}")
+    return col
+
+
+def file_signature(paths):
+    """
+    Returns (mtime, size) of every path, None for paths which do not exist
+    """
+    signature = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            signature.append((stat.st_mtime_ns, stat.st_size))
+        except FileNotFoundError:
+            signature.append(None)
+    return tuple(signature)
+
+
+def _connect(dbfile, readonly=False):
+    if readonly:
+        ### read-only connections neither create the database nor change its journal mode
+        from urllib.request import pathname2url
+
+        return sqlite3.connect(f"file:{pathname2url(os.path.abspath(dbfile))}?mode=ro", uri=True, timeout=60,
+            isolation_level=None, check_same_thread=False)
+    conn = sqlite3.connect(dbfile, timeout=60, isolation_level=None, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def _sqlvalue(value):
+    """
+    Converts numpy scalars, NaN, NaT, <NA> and blank strings into values sqlite can bind
+    """
+    if _ismissing(value) or (isinstance(value, str) and value == ""):
+        return None
+    if hasattr(value, 'item'):
+        value = value.item()
+        if isinstance(value, float) and value != value:
+            return None
+    return value
+
+
+class SQLiteLock():
+    """
+    Write transaction on a sqlite connection (BEGIN IMMEDIATE), used the same way as
+    FileLock so that allocating an ExpID and saving the run happen atomically
+    """
+    def __init__(self, conn):
+        self.conn = conn
+        self.depth = 0
+
+    def __enter__(self):
+        if self.depth == 0:
+            self.conn.execute("BEGIN IMMEDIATE")
+        self.depth += 1
+        return self
+
+    def __exit__(self, exc_type, *args):
+        self.depth -= 1
+        if self.depth == 0:
+            self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+
+
+def runstore_backend(overviewpath):
+    """
+    Returns the backend of the runmaster of a project, 'sqlite' for a runmaster.db, 'csv' for a
+    runmaster.csv or its journal, None if the project has no runmaster yet
+    """
+    if os.path.exists(os.path.join(overviewpath, "runmaster.db")):
+        return "sqlite"
+    if (os.path.exists(os.path.join(overviewpath, "runmaster.csv"))
+            or os.path.exists(os.path.join(overviewpath, "runmaster.journal.csv"))):
+        return "csv"
+    return None
+
+
+def open_runstore(overviewpath, backend=None, readonly=False):
+    """
+    Opens the run store of a project
+
+    Parameters
+    ----------
+        overviewpath (str)  : path of the Artefacts/Overview folder of the project
+        backend (str)       : (Optional) 'sqlite' or 'csv', by default an existing runmaster.db
+            is opened as sqlite, an existing runmaster.csv as csv, and new projects use sqlite
+        readonly (bool)     : (Optional) only read an existing runmaster, as the dashboard does, nothing
+            is created or migrated. Raises FileNotFoundError when the project has no runmaster
+    """
+    existing = runstore_backend(overviewpath)
+    if readonly and existing is None:
+        raise FileNotFoundError(f"No runmaster at {overviewpath}")
+    backend = backend or existing or "sqlite"
+
+    if backend == "sqlite":
+        runstore = SQLiteRunStore(overviewpath, readonly=readonly)
+    elif backend == "csv":
+        runstore = CSVRunStore(overviewpath, readonly=readonly)
+    else:
+        raise AssertionError(f"Storage backend should be 'sqlite' or 'csv', {backend} was passed")
+
+    if not readonly:
+        runstore.migrate()
+    return runstore
+
+
+def encode_param(value):
+    """
+    Returns the (Value, Type, Number) row of a param value, see PARAM_COLUMNS
+    """
+    if hasattr(value, 'item') and getattr(value, 'ndim', None) == 0:
+        ### numpy scalars
+        value = value.item()
+    if value is None:
+        return "null", "null", None
+    if isinstance(value, bool):
+        return str(value).lower(), "bool", float(value)
+    if isinstance(value, int):
+        return str(value), "int", float(value)
+    if isinstance(value, float):
+        return repr(value), "float", value
+    if isinstance(value, str):
+        return value, "str", None
+    return json.dumps(value, default=str), "json", None
+
+
+def decode_param(value, type):
+    """
+    Returns the python value of a (Value, Type) param row
+    """
+    if type == "str":
+        return value
+    if type == "null":
+        return None
+    if type == "bool":
+        return value == "true"
+    if type == "int":
+        return int(value)
+    if type == "float":
+        return float(value)
+    return json.loads(value)
+
+
+def params_dict(dfparams):
+    """
+    Returns the params of a run from its rows of the params table
+    """
+    return {key : decode_param(value, type)
+        for key, value, type in zip(dfparams['Key'], dfparams['Value'], dfparams['Type'])}
+
+
+def _runmaster_params(dfrunmaster):
+    """
+    Yields (ExpID, encoded params) of the runs of a runmaster, parsed from its Params column.
+    Runs saved before the params table stringified every value, they are read back as
+    json where possible ('5', 'true', '[1, 2]') and kept as text otherwise
+    """
+    if dfrunmaster.shape[0] == 0 or 'Params' not in dfrunmaster:
+        return
+    for expid, params in zip(dfrunmaster['ExpID'], dfrunmaster['Params']):
+        if not isinstance(params, str) or params == "":
+            continue
+        try:
+            params = json.loads(params)
+        except ValueError:
+            continue
+        encoded = {}
+        for key, value in params.items():
+            if isinstance(value, str):
+                try:
+                    value = json.loads({'True' : 'true', 'False' : 'false', 'None' : 'null'}.get(value, value))
+                except ValueError:
+                    pass
+            encoded[key] = encode_param(value)
+        yield int(expid), encoded
+
+
+class LogWriter():
+    """
+    Streaming writer for the logs.csv of an experiment. Keeps the file open and
+    appends one formatted row per log, so the cost of a log does not grow with
+    the number of logs already written
+
+    Attributes
+    ----------
+    logfile (str)       : path of the logs csv, truncated when the writer is created
+
+    columns (list)      : columns of the logs, in the order they are saved
+
+    flushevery (int)    : (Optional) number of rows after which the buffer is flushed to disk,
+        1 flushes after every row, 0 leaves flushing to the file buffer until close()
+    """
+    def __init__(self, logfile, columns, flushevery=1):
+        self.logfile = logfile
+        self.columns = columns
+        self.flushevery = flushevery
+        self.rows = 0
+
+        self.file = open(logfile, "w", newline="")
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(columns)
+        self.file.flush()
+
+    def write(self, log):
+        """
+        Appends a single log row
+
+        Parameters
+        ----------
+            log (dict) : values of the row keyed by column name, missing columns are left blank
+
+        Returns the number of characters written
+        """
+        nbytes = self.writer.writerow([_format_value(log.get(col)) for col in self.columns])
+        self.rows += 1
+
+        if self.flushevery and self.rows % self.flushevery == 0:
+            self.file.flush()
+        return nbytes
+
+    def flush(self):
+        if not self.file.closed:
+            self.file.flush()
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
+
+
+class SQLiteLogWriter():
+    """
+    Writer for the logs of an experiment into the logs table of runmaster.db, uses its
+    own connection so that batched log inserts do not hold the runmaster lock
+
+    Attributes
+    ----------
+    dbfile (str)        : path of the sqlite database
+
+    columns (list)      : columns of the logs
+
+    flushevery (int)    : (Optional) number of rows after which the pending rows are committed,
+        1 commits after every row, 0 commits only on close() or once MAX_PENDING_LOGS rows are pending
+    """
+    def __init__(self, dbfile, columns, flushevery=1):
+        self.dbfile = dbfile
+        self.columns = columns
+        self.flushevery = flushevery
+        self.rows = 0
+        self.pending = []
+        self.conn = _connect(dbfile)
+
+    def write(self, log):
+        row = [_sqlvalue(_format_value(log.get(col))) for col in self.columns]
+        self.pending.append(row)
+        self.rows += 1
+
+        if (self.flushevery and self.rows % self.flushevery == 0) or len(self.pending) >= MAX_PENDING_LOGS:
+            self.flush()
+        return _rowbytes([row])
+
+    def flush(self):
+        if self.conn is None or len(self.pending) == 0:
+            return
+        self.conn.execute("BEGIN")
+        self.conn.executemany(
+            f"INSERT INTO logs ({', '.join(self.columns)}) VALUES ({', '.join('?' * len(self.columns))})",
+            self.pending)
+        self.conn.execute("COMMIT")
+        self.pending = []
+
+    def close(self):
+        if self.conn is not None:
+            self.flush()
+            self.conn.close()
+            self.conn = None
+
+
+def _rowbytes(rows):
+    """
+    Size of rows written to sqlite, counted as the length of the text of their values
+    """
+    return sum(len(str(value)) for row in rows for value in row if value is not None)
+
+
+def _ismissing(value):
+    """
+    True for None, NaN, NaT and <NA>, the pandas ones are only checked once pandas was
+    imported, since a value cannot be one of them before
+    """
+    if value is None or (isinstance(value, float) and value != value):
+        return True
+    pd = sys.modules.get('pandas')
+    return pd is not None and (value is pd.NaT or value is pd.NA)
+
+
+def _format_value(value):
+    """
+    Formats a single value the way it is saved, times as epoch-ns and durations as seconds
+    """
+    if _ismissing(value):
+        return ""
+    if isinstance(value, datetime):
+        return str(epochns(value))
+    if isinstance(value, timedelta):
+        return repr(seconds(value))
+    return str(value)
+
+
+def epochns(value):
+    """
+    Nanoseconds since the epoch of a single time, None for blanks. Naive datetimes, the
+    times of the runs, are converted without pandas
+    """
+    if type(value) is datetime and value.tzinfo is None:
+        return (value - EPOCH) // timedelta(microseconds=1) * 1000
+    if _ismissing(value):
+        return None
+
+    import pandas as pd
+    return None if pd.isna(value) else pd.Timestamp(value).value
+
+
+def seconds(value):
+    """
+    Seconds of a single duration, None for blanks
+    """
+    if type(value) is timedelta:
+        return value.total_seconds()
+    if _ismissing(value):
+        return None
+
+    import pandas as pd
+    return None if pd.isna(value) else pd.Timedelta(value).total_seconds()
+
+
+def to_epochns(values):
+    """
+    Converts times to nanoseconds since the epoch, values can be datetimes, epoch-ns
+    numbers or text saved by older versions ('2021-05-01 10:00:00'), blanks become <NA>
+    """
+    import pandas as pd
+
+    values = pd.Series(values)
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return pd.Series(values.array.asi8, index=values.index, dtype='Int64').mask(values.isna())
+    if pd.api.types.is_integer_dtype(values):
+        return values.astype('Int64')
+
+    ### integers and their text are converted exactly, float64 only holds epoch-ns to the closest 256ns
+    text = values.astype(str)
+    integers = text.str.fullmatch(r"-?\d+")
+    epochs = text.where(integers).astype('Int64')
+
+    others = values.where(~integers & values.notna() & (text != ""))
+    if others.notna().any():
+        numbers = pd.to_numeric(others, errors='coerce')
+        parsed = pd.to_datetime(others.where(numbers.isna()), errors='coerce')
+        numbers = numbers.fillna(pd.Series(parsed.array.asi8, index=values.index, dtype=float).mask(parsed.isna()))
+        epochs = epochs.fillna(numbers.round().astype('Int64'))
+    return epochs
+
+
+def to_seconds(values):
+    """
+    Converts durations to seconds, values can be timedeltas, numbers of seconds or
+    text saved by older versions ('0 days 00:01:05', '0:01:05'), blanks become NaN
+    """
+    import pandas as pd
+
+    values = pd.Series(values)
+    if pd.api.types.is_timedelta64_dtype(values):
+        return values.dt.total_seconds()
+    numbers = pd.to_numeric(values, errors='coerce')
+    text = values.where(numbers.isna() & values.notna() & (values.astype(str) != ""))
+    if text.notna().any():
+        numbers = numbers.fillna(pd.to_timedelta(text, errors='coerce').dt.total_seconds())
+    return numbers.astype(float)
+
+
+def read_sql(conn, sql, params=()):
+    """
+    Runs a query and returns the result as a dataframe, the time columns as epoch-ns. They are
+    converted from the integers sqlite returns, pandas.read_sql_query reads a column with NULLs
+    as float64 which would lose the last digits of the times
+    """
+    import pandas as pd
+
+    cursor = conn.execute(sql, params)
+    columns = [col[0] for col in cursor.description]
+    rows = cursor.fetchall()
+    df = pd.DataFrame.from_records(rows, columns=columns, coerce_float=True)
+    for i, col in enumerate(columns):
+        if col in TIME_COLUMNS:
+            df[col] = to_epochns(pd.Series([row[i] for row in rows], index=df.index, dtype=object))
+    return df
+
+
+def normalize_times(df):
+    """
+    Converts the time columns of a runmaster, logs or artefacts frame to epoch-ns and
+    the duration columns to seconds, whatever format they were saved in
+    """
+    for col in df.columns:
+        if col in TIME_COLUMNS:
+            df[col] = to_epochns(df[col])
+        elif col in DURATION_COLUMNS:
+            df[col] = to_seconds(df[col])
+    return df
+
+
+def format_times(df):
+    """
+    Formats the time columns of a frame as text for display, '2021-05-01 10:00:00' for
+    times and 'H:MM:SS' for durations, vectorized over the whole column
+    """
+    import numpy as np
+    import pandas as pd
+
+    df = df.copy()
+    for col in df.columns:
+        if col in TIME_COLUMNS:
+            times = pd.to_datetime(pd.to_numeric(df[col], errors='coerce'), unit='ns')
+            df[col] = times.dt.strftime('%Y-%m-%d %H:%M:%S').fillna("")
+        elif col in DURATION_COLUMNS:
+            seconds = pd.to_numeric(df[col], errors='coerce')
+            whole = np.floor(seconds.fillna(0).to_numpy()).astype(np.int64)
+            text = (pd.Series(whole // 3600, index=df.index).astype(str) + ":"
+                + pd.Series(whole % 3600 // 60, index=df.index).astype(str).str.zfill(2) + ":"
+                + pd.Series(whole % 60, index=df.index).astype(str).str.zfill(2))
+            df[col] = text.where(seconds.notna(), "")
+    return df
+
+
+def read_runmaster(runmasterfile, columns=None):
+    """
+    Reads the runmaster csv along with its uncompacted journal, keeping only
+    the latest record of every experiment
+
+    Parameters
+    ----------
+        runmasterfile (str) : path of the runmaster csv
+        columns (list)      : (Optional) only read these columns, ExpID is always read
+    """
+    import pandas as pd
+
+    journalfile = os.path.splitext(runmasterfile)[0] + ".journal.csv"
+    usecols = None if columns is None else (lambda col : col == 'ExpID' or col in columns)
+
+    ### times are read as text, a column with blanks would otherwise be parsed as float64
+    dtype = {col : str for col in TIME_COLUMNS}
+
+    frames = []
+    if os.path.exists(runmasterfile):
+        frames.append(pd.read_csv(runmasterfile, usecols=usecols, dtype=dtype))
+    if os.path.exists(journalfile):
+        frames.append(pd.read_csv(journalfile, usecols=usecols, dtype=dtype))
+
+    if len(frames) == 0:
+        return pd.DataFrame()
+
+    dfrunmaster = pd.concat(frames, axis=0, ignore_index=True)
+    dfrunmaster = dfrunmaster.drop_duplicates(subset='ExpID', keep='last')
+    return normalize_times(dfrunmaster.sort_values(by='ExpID').reset_index(drop=True))
@@ -1,7 +1,11 @@
 import dash_html_components as html
 import dash_core_components as dcc
+from dash_table import DataTable
 import plotly.graph_objs as go
-import plotly.express as px
+import numpy as np
+import pandas as pd
+
+from metrics import minmax_downsample
 
 
 def Header(app, projectname):
@@ -25,10 +29,11 @@ def get_header(app, projectname):
                         [html.H5(projectname)],
                         className="seven columns main-title",
                     ),
-                    # html.Div(
-                    #     [html.H6("Add best score here")],
-                    #     className="five columns",
-                    # ),
+                    html.Div(
+                        [dcc.Link("All projects", href="/")],
+                        className="five columns",
+                        style={"text-align": "right"},
+                    ),
                 ],
                 className="twelve columns",
                 style={"padding-left": "0"},
@@ -49,6 +54,19 @@ def make_dash_table(df):
         table.append(html.Tr(html_row))
     return table
 
+def make_data_table(df, tableid):
+    """ Return a paged dash DataTable of a Pandas dataframe, as shown on the experiment and comparison pages """
+    return DataTable(
+        id=tableid,
+        columns=[{"name" : str(i), "id" : str(i)} for i in df.columns],
+        data=df.rename(columns=str).to_dict('records'),
+        page_size=15,
+        style_cell={'textAlign': 'left', 'fontFamily': 'Raleway'},
+        style_data={'font-size' : '11px'},
+        style_header={'font-size' : '11px', 'font-weight' : 'bold'},
+        style_table={'overflowX': 'auto'},
+    )
+
 def make_unordered_list(arr):
     """ Return a dash definition of a bulleted list of an array """
     return html.Div(
@@ -110,16 +128,85 @@ def create_feature_imp_plot(df, graphid, text, hovertemplate="Count : %{text}"):
                 config={"displayModeBar": False},
             )
 
+### traces with more points are drawn with WebGL, and are downsampled to about JOURNEY_MAX_POINTS
+SCATTERGL_THRESHOLD = 1000
+JOURNEY_MAX_POINTS = 2000
+
+
+def scatter_trace(points):
+    """
+    Returns go.Scattergl for traces above SCATTERGL_THRESHOLD points, go.Scatter (SVG) otherwise
+    """
+    return go.Scattergl if points > SCATTERGL_THRESHOLD else go.Scatter
+
+
+def journey_points(scores, chosen=None, maxpoints=JOURNEY_MAX_POINTS):
+    """
+    Returns the positions of the runs drawn on the journey plot, the min and max score
+    of every bucket of runs are kept along with the runs on the road to the best model
+
+    Parameters
+    ----------
+        scores (numpy.ndarray)  : scores of the runs, in ExpID order
+        chosen (numpy.ndarray)  : (Optional) True for the runs which must be kept
+        maxpoints (int)         : (Optional) about the number of runs kept
+    """
+    keep = minmax_downsample(np.arange(len(scores)), np.asarray(scores, dtype=float), maxpoints)
+    if chosen is not None and len(keep) < len(scores):
+        keep = np.union1d(keep, np.flatnonzero(chosen))
+    return keep
+
+
+def create_heatmap(z, x, y, graphid, colorscale="Blues", hovertemplate="%{z:.02f}"):
+    """
+    Heatmap of a matrix, x and y label its columns and rows
+    """
+    return dcc.Graph(
+            id=graphid,
+            figure={
+                "data": [
+                    go.Heatmap(
+                        z=z,
+                        x=[str(i) for i in x],
+                        y=[str(i) for i in y],
+                        colorscale=colorscale,
+                        hovertemplate=hovertemplate,
+                        name=""
+                    )
+                ],
+                "layout": go.Layout(
+                    autosize=True,
+                    font={"family": "Raleway", "size": 14},
+                    height=max(320, 20 * len(y)),
+                    margin={"r": 20, "t": 20, "b": 40, "l": 120},
+                    xaxis={"type": "category"},
+                    yaxis={"type": "category", "autorange": "reversed"},
+                ),
+            },
+            config={"displayModeBar": False},
+        )
+
 def create_journey_plot_line(dfrunmaster):
+    return dcc.Graph(
+            id="graph-2",
+            figure=create_journey_figure(dfrunmaster),
+            config={"displayModeBar": False},
+        )
+
+def create_journey_figure(dfrunmaster, maxpoints=JOURNEY_MAX_POINTS):
     figure = go.Figure()
+    chosen = dfrunmaster['Chosen'].to_numpy() == 1 if 'Chosen' in dfrunmaster else None
 
-    ### Add traces for scores
-    for metric in dfrunmaster.Metric.unique():
+    ### Add traces for scores, one pass over the runmaster for all metrics
+    for metric, rows in dfrunmaster.groupby('Metric', sort=False).indices.items():
+        keep = journey_points(dfrunmaster['Score'].to_numpy()[rows],
+            chosen[rows] if chosen is not None else None, maxpoints)
+        rows = rows[keep]
         figure.add_traces([
-            go.Scatter(
-                x=dfrunmaster[dfrunmaster.Metric==metric]['ExpID'],
-                y=dfrunmaster[dfrunmaster.Metric==metric]['Score'],
-                text=dfrunmaster[dfrunmaster.Metric==metric]['Description'],
+            scatter_trace(len(rows))(
+                x=dfrunmaster['ExpID'].to_numpy()[rows],
+                y=dfrunmaster['Score'].to_numpy()[rows],
+                text=dfrunmaster['Description'].to_numpy()[rows],
                 mode="lines+markers",
                 name=metric,
                 hovertemplate= "%{text}<br>" + "<b>Score : <b>%{y}<br>"
@@ -127,10 +214,11 @@ def create_journey_plot_line(dfrunmaster):
         ])
 
     ### Add trace for benchmark
+    keep = journey_points(dfrunmaster['Benchmark'].to_numpy(dtype=float), None, maxpoints)
     figure.add_traces([
-        go.Scatter(
-            x=dfrunmaster['ExpID'],
-            y=dfrunmaster['Benchmark'],
+        scatter_trace(len(keep))(
+            x=dfrunmaster['ExpID'].to_numpy()[keep],
+            y=dfrunmaster['Benchmark'].to_numpy()[keep],
             line={'dash':'dash'},
             name="Benchmark",
             hovertemplate="Benchmark %{y}"
@@ -186,15 +274,63 @@ def create_journey_plot_line(dfrunmaster):
         overwrite=True
     )
 
-    return dcc.Graph(
-            id="graph-2",
-            figure=figure,
-            config={"displayModeBar": False},
-        )
+    return figure
+
+def create_metric_plot(curves, graphid):
+    """
+    Plots the downsampled metric curves of an experiment, see loaders.ProjectData.metriccurves
+    """
+    figure = go.Figure()
+    for metric, (steps, values) in curves.items():
+        figure.add_traces([
+            go.Scattergl(
+                x=steps,
+                y=values,
+                mode="lines",
+                name=metric,
+                hovertemplate="Step %{x}<br><b>" + str(metric) + " : <b>%{y}<br>"
+            )
+        ])
+
+    figure.update_layout(
+        go.Layout(
+            autosize=True,
+            font={"family": "Raleway", "size": 14},
+            height=320,
+            hovermode="x",
+            hoverlabel={"font_family": "Raleway", "font_size": 14},
+            legend={"orientation": "h"},
+            margin={"r": 20, "t": 20, "b": 20, "l": 50},
+            showlegend=True,
+            xaxis={"title": "Step", "showgrid": False, "showline": True, "zeroline": False},
+            yaxis={"gridcolor": "rgba(127, 127, 127, 0.2)", "showline": True, "zeroline": False},
+        ),
+        overwrite=True
+    )
+
+    return dcc.Graph(id=graphid, figure=figure, config={"displayModeBar": False})
 
-def discrete_background_color_bins(df, n_bins=5, columns='all'):
-    import colorlover
-    bounds = [i * (1.0 / n_bins) for i in range(n_bins + 1)]
+### colorlover palettes, loaded once per number of bins
+PALETTES = {}
+
+def get_palette(n_bins, scale='Blues'):
+    if (n_bins, scale) not in PALETTES:
+        import colorlover
+        PALETTES[(n_bins, scale)] = colorlover.scales[str(n_bins)]['seq'][scale]
+    return PALETTES[(n_bins, scale)]
+
+def discrete_background_color_bins(df, n_bins=5, columns='all', valuerange=None):
+    """
+    Assigns the values of the numeric columns of df to n_bins equal width bins (shared
+    across the columns) with np.digitize, and returns one style rule per bin and column
+    which only compares the precomputed bin of the row, the bins have to be sent along
+    with the table data as the '<column>_bin' fields
+
+    Returns (styles, legend, bins), bins is a dataframe of the '<column>_bin' fields
+    aligned with df, -1 for missing values. valuerange (min, max) sets the range of the
+    bins when df is only a page of the data
+    """
+    bounds = np.linspace(0, 1, n_bins + 1)
     if columns == 'all':
         if 'id' in df:
             df_numeric_columns = df.select_dtypes('number').drop(['id'], axis=1)
@@ -202,27 +338,30 @@ def discrete_background_color_bins(df, n_bins=5, columns='all'):
             df_numeric_columns = df.select_dtypes('number')
     else:
         df_numeric_columns = df[columns]
-    df_max = df_numeric_columns.max().max()
-    df_min = df_numeric_columns.min().min()
-    ranges = [
-        ((df_max - df_min) * i) + df_min
-        for i in bounds
-    ]
+    values = df_numeric_columns.to_numpy(dtype=float)
+    if valuerange is not None:
+        df_min, df_max = [0 if pd.isna(i) else i for i in valuerange]
+    else:
+        df_max = np.nanmax(values) if np.isfinite(values).any() else 0
+        df_min = np.nanmin(values) if np.isfinite(values).any() else 0
+    ranges = ((df_max - df_min) * bounds) + df_min
+
+    binned = np.clip(np.digitize(values, ranges[1:-1]), 0, n_bins - 1)
+    binned[np.isnan(values)] = -1
+    bins = pd.DataFrame(binned, index=df.index,
+        columns=[f"{column}_bin" for column in df_numeric_columns])
+
+    palette = get_palette(n_bins)
     styles = []
     legend = []
-    for i in range(1, len(bounds)):
-        min_bound = ranges[i - 1]
-        max_bound = ranges[i]
-        backgroundColor = colorlover.scales[str(n_bins)]['seq']['Blues'][i - 1]
-        color = 'white' if i > len(bounds) / 2. else 'inherit'
+    for i in range(n_bins):
+        backgroundColor = palette[i]
+        color = 'white' if i + 1 > len(bounds) / 2. else 'inherit'
 
         for column in df_numeric_columns:
             styles.append({
                 'if': {
-                    'filter_query': (
-                        '{{{column}}} >= {min_bound}' +
-                        (' && {{{column}}} < {max_bound}' if (i < len(bounds) - 1) else '')
-                    ).format(column=column, min_bound=min_bound, max_bound=max_bound),
+                    'filter_query': f'{{{column}_bin}} = {i}',
                     'column_id': column
                 },
                 'backgroundColor': backgroundColor,
@@ -237,8 +376,8 @@ def discrete_background_color_bins(df, n_bins=5, columns='all'):
                         'height': '10px'
                     }
                 ),
-                html.Small(round(min_bound, 2), style={'paddingLeft': '2px'})
+                html.Small(round(ranges[i], 2), style={'paddingLeft': '2px'})
             ])
         )
 
-    return (styles, html.Div(legend, style={'padding': '5px 0 5px 0'}))
\ No newline at end of file
+    return (styles, html.Div(legend, style={'padding': '5px 0 5px 0'}), bins)
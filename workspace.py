@@ -0,0 +1,221 @@
+"""
+Catalog of the DeepFlow projects of a workspace
+
+    python workspace.py index <project root> [<project root> ...]
+    python workspace.py list
+
+list also removes the projects whose folder no longer exists from the catalog
+"""
+import argparse
+import os
+
+try:
+    from .storage import (SQLiteLock, _connect, _sqlvalue, format_times, open_runstore, read_sql,
+                          runstore_backend)
+except ImportError:
+    from storage import (SQLiteLock, _connect, _sqlvalue, format_times, open_runstore, read_sql,
+                         runstore_backend)
+
+### folder of the workspace catalog, defaults to ~/.deepflow
+WORKSPACE_ENV = "DEEPFLOW_WORKSPACE"
+
+PROJECT_COLUMNS = ['ProjectID', 'Root', 'ProjectName', 'Backend', 'Runs', 'LastActivity']
+
+BEST_COLUMNS = ['ProjectID', 'Metric', 'ScoreType', 'ExpID', 'Score']
+
+
+def default_catalog():
+    """
+    Path of the workspace catalog, workspace.db in $DEEPFLOW_WORKSPACE or in ~/.deepflow
+    """
+    folder = os.environ.get(WORKSPACE_ENV) or os.path.join(os.path.expanduser("~"), ".deepflow")
+    return os.path.join(folder, "workspace.db")
+
+
+class Workspace():
+    """
+    Catalog of many projects, with the number of runs, the best score of every metric and
+    the time of the last activity of each. Every DeepFlow run updates the row of its project
+    when it starts and ends, so the dashboard lists the projects of a workspace with a single
+    query instead of reading the runmaster of each. Projects run before the catalog existed
+    are added with index()
+
+    Attributes
+    ----------
+    catalogfile (str) : (Optional) path of the sqlite catalog, defaults to default_catalog()
+    """
+    def __init__(self, catalogfile=None):
+        self.catalogfile = catalogfile or default_catalog()
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.catalogfile)), exist_ok=True)
+        self.conn = _connect(self.catalogfile)
+        self.lock = SQLiteLock(self.conn)
+
+        with self.lock:
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS projects (
+                    ProjectID INTEGER PRIMARY KEY AUTOINCREMENT, Root TEXT UNIQUE, ProjectName TEXT,
+                    Backend TEXT, Runs INTEGER, LastActivity INTEGER
+                )""")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS bestscores (
+                    ProjectID INTEGER, Metric TEXT, ScoreType TEXT, ExpID INTEGER, Score REAL,
+                    PRIMARY KEY (ProjectID, Metric)
+                )""")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS ix_projects_activity ON projects (LastActivity)")
+
+    def _register(self, root, projectname, backend):
+        """
+        Helper function which adds or renames a project and returns its ProjectID,
+        must be called while holding the catalog lock
+        """
+        root = os.path.abspath(root)
+        row = self.conn.execute("SELECT ProjectID FROM projects WHERE Root = ?", (root,)).fetchone()
+        if row is None:
+            return self.conn.execute("INSERT INTO projects (Root, ProjectName, Backend, Runs) VALUES (?, ?, ?, 0)",
+                (root, projectname, backend)).lastrowid
+        self.conn.execute("UPDATE projects SET ProjectName = ?, Backend = ? WHERE ProjectID = ?",
+            (projectname, backend, row[0]))
+        return row[0]
+
+    def _touch(self, projectid, expid, time):
+        self.conn.execute("""
+            UPDATE projects SET Runs = MAX(Runs, ?), LastActivity = MAX(COALESCE(LastActivity, 0), ?)
+            WHERE ProjectID = ?""", (_sqlvalue(expid), _sqlvalue(time), projectid))
+
+    def runstarted(self, root, projectname, backend, expid, time):
+        """
+        Records the start of run `expid` of a project, `time` in epoch-ns
+        """
+        with self.lock:
+            self._touch(self._register(root, projectname, backend), expid, time)
+
+    def runended(self, root, projectname, backend, expid, time, metric=None, scoretype=None, score=None):
+        """
+        Records the end of run `expid` of a project, its score replaces the best score of
+        its metric when it is better, the lowest for errors and the highest for accuracies
+        """
+        with self.lock:
+            projectid = self._register(root, projectname, backend)
+            self._touch(projectid, expid, time)
+            if metric is None or _sqlvalue(score) is None:
+                return
+            self.conn.execute("""
+                INSERT INTO bestscores (ProjectID, Metric, ScoreType, ExpID, Score) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (ProjectID, Metric) DO UPDATE SET
+                    ScoreType = excluded.ScoreType, ExpID = excluded.ExpID, Score = excluded.Score
+                WHERE CASE WHEN excluded.ScoreType = 'accuracy' THEN excluded.Score > bestscores.Score
+                    ELSE excluded.Score < bestscores.Score END""",
+                (projectid, metric, scoretype, _sqlvalue(expid), _sqlvalue(score)))
+
+    def index(self, root):
+        """
+        Adds a project to the catalog from its run store, or refreshes it. Reads the whole
+        runmaster of the project, runs keep the catalog up to date without it
+        """
+        try:
+            from .lineage import LineageIndex
+        except ImportError:
+            from lineage import LineageIndex
+
+        overviewpath = os.path.join(root, "Artefacts", "Overview")
+        if runstore_backend(overviewpath) is None:
+            raise AssertionError(f"No DeepFlow project found in {root}")
+        runstore = open_runstore(overviewpath)
+        if not runstore.exists():
+            raise AssertionError(f"No DeepFlow project found in {root}")
+
+        dfrunmaster = runstore.read()
+        best = LineageIndex(dfrunmaster).best_runs()
+        dfbest = dfrunmaster.set_index('ExpID').loc[list(best.values()), ['Metric', 'ScoreType', 'Score']]
+        times = dfrunmaster[['StartTime', 'EndTime']].max().dropna()
+
+        with self.lock:
+            projectid = self._register(root, str(dfrunmaster['ProjectName'].iloc[0]), runstore.backend)
+            self.conn.execute("UPDATE projects SET Runs = ?, LastActivity = ? WHERE ProjectID = ?",
+                (int(dfrunmaster['ExpID'].max()), _sqlvalue(times.max()) if len(times) else None, projectid))
+            self.conn.execute("DELETE FROM bestscores WHERE ProjectID = ?", (projectid,))
+            self.conn.executemany("INSERT INTO bestscores VALUES (?, ?, ?, ?, ?)",
+                [(projectid, metric, scoretype, int(expid), _sqlvalue(score))
+                    for expid, (metric, scoretype, score) in zip(dfbest.index, dfbest.itertuples(index=False))])
+        return projectid
+
+    def remove(self, projectid):
+        with self.lock:
+            self.conn.execute("DELETE FROM projects WHERE ProjectID = ?", (int(projectid),))
+            self.conn.execute("DELETE FROM bestscores WHERE ProjectID = ?", (int(projectid),))
+
+    def projects(self, prune=False):
+        """
+        Returns the projects of the catalog, the most recently active first, projects whose folder
+        no longer exists are left out
+
+        Parameters
+        ----------
+            prune (bool) : (Optional) also remove the projects whose folder no longer exists from the
+                catalog, as 'python workspace.py list' does. The dashboard only hides them
+        """
+        dfprojects = read_sql(self.conn,
+            f"SELECT {', '.join(PROJECT_COLUMNS)} FROM projects ORDER BY LastActivity DESC")
+        missing = ~dfprojects['Root'].map(os.path.isdir).astype(bool)
+        if prune:
+            for projectid in dfprojects.loc[missing, 'ProjectID']:
+                self.remove(projectid)
+        return dfprojects[~missing].reset_index(drop=True)
+
+    def project(self, projectid):
+        """
+        Returns the catalog row of a project as a dictionary, None if it is not in the catalog
+        """
+        row = self.conn.execute(f"SELECT {', '.join(PROJECT_COLUMNS)} FROM projects WHERE ProjectID = ?",
+            (int(projectid),)).fetchone()
+        return None if row is None else dict(zip(PROJECT_COLUMNS, row))
+
+    def bestscores(self):
+        """
+        Returns the best score of every metric of every project
+        """
+        import pandas as pd
+
+        return pd.read_sql_query(
+            f"SELECT {', '.join(BEST_COLUMNS)} FROM bestscores ORDER BY ProjectID, Metric", self.conn)
+
+    def summary(self, prune=False):
+        """
+        Returns the projects with their best scores as text, eg: 'RMSE 0.12 (#45)', for display
+
+        Parameters
+        ----------
+            prune (bool) : (Optional) remove the projects whose folder no longer exists, see projects
+        """
+        dfprojects = self.projects(prune)
+        dfbest = self.bestscores()
+        best = dfbest.assign(Best=dfbest['Metric'] + " " + dfbest['Score'].round(4).astype(str)
+            + " (#" + dfbest['ExpID'].astype(str) + ")").groupby('ProjectID')['Best'].agg(", ".join)
+        dfprojects['BestScores'] = dfprojects['ProjectID'].map(best).fillna("")
+        return format_times(dfprojects)
+
+    def close(self):
+        self.conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("command", choices=["index", "list"])
+    parser.add_argument("roots", nargs="*", help="project roots, the folders holding Artefacts/")
+    parser.add_argument("--catalog", default=None, help="path of the catalog, defaults to " + default_catalog())
+    args = parser.parse_args()
+
+    workspace = Workspace(args.catalog)
+    if args.command == "index":
+        for root in args.roots:
+            print(f"Indexed {root} as project {workspace.index(root)}")
+    else:
+        import pandas as pd
+
+        with pd.option_context('display.width', 200, 'display.max_colwidth', 80):
+            print(workspace.summary(prune=True).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()